@@ -14,6 +14,8 @@ from ._astropy_init import *
 
 import os
 
+from astropy import config as _config
+
 
 # Set the bibtex entry to the article referenced in CITATION.
 def _get_bibtex():
@@ -27,3 +29,45 @@ def _get_bibtex():
 
 
 __citation__ = __bibtex__ = _get_bibtex()
+
+
+class Cache_Conf(_config.ConfigNamespace):
+    """
+    Configuration parameters for the response cache shared by all services.
+    """
+    cache_timeout = _config.ConfigItem(
+        604800,
+        'Lifetime of cached query responses in seconds (default is one week). '
+        'Set to 0 to keep responses until they are evicted or cleared.')
+    cache_max_size = _config.ConfigItem(
+        1073741824,
+        'Maximum size in bytes of the cached query responses of each service. '
+        'The least recently used responses are removed once the budget is '
+        'exceeded. Set to 0 for an unbounded cache.')
+
+
+cache_conf = Cache_Conf()
+
+
+class Request_Conf(_config.ConfigNamespace):
+    """
+    Configuration parameters for concurrent requests.
+    """
+    max_workers = _config.ConfigItem(
+        8,
+        'Maximum number of requests a service sends concurrently.')
+    max_per_host = _config.ConfigItem(
+        4,
+        'Maximum number of concurrent requests a service sends to a single '
+        'host.')
+    download_segments = _config.ConfigItem(
+        1,
+        'Number of byte ranges of a large file to download concurrently, if '
+        'the server supports range requests. 1 downloads files in a single '
+        'stream.')
+    min_segment_size = _config.ConfigItem(
+        16777216,
+        'Minimum size in bytes of a byte range downloaded concurrently.')
+
+
+request_conf = Request_Conf()
@@ -812,7 +812,7 @@ class GaiaClass(TapPlus):
     def launch_job(self, query, name=None, output_file=None,
                    output_format="votable", verbose=False,
                    dump_to_file=False, upload_resource=None,
-                   upload_table_name=None):
+                   upload_table_name=None, stream=False):
         """Launches a synchronous job
 
         Parameters
@@ -836,6 +836,9 @@ class GaiaClass(TapPlus):
         upload_table_name : str, optional, default None
             resource temporary table name associated to the uploaded resource.
             This argument is required if upload_resource is provided.
+        stream : bool, optional, default 'False'
+            if True, the results are not loaded: they are read and parsed
+            chunk by chunk by the Job.iter_results generator
 
         Returns
         -------
@@ -847,13 +850,14 @@ class GaiaClass(TapPlus):
                                   verbose=verbose,
                                   dump_to_file=dump_to_file,
                                   upload_resource=upload_resource,
-                                  upload_table_name=upload_table_name)
+                                  upload_table_name=upload_table_name,
+                                  stream=stream)
 
     def launch_job_async(self, query, name=None, output_file=None,
                          output_format="votable", verbose=False,
                          dump_to_file=False, background=False,
                          upload_resource=None, upload_table_name=None,
-                         autorun=True):
+                         autorun=True, stream=False):
         """Launches an asynchronous job
 
         Parameters
@@ -883,6 +887,10 @@ class GaiaClass(TapPlus):
         autorun : boolean, optional, default True
             if 'True', sets 'phase' parameter to 'RUN',
             so the framework can start the job.
+        stream : bool, optional, default 'False'
+            if True, the results are not loaded: they are read and parsed
+            chunk by chunk by the Job.iter_results generator, once the job
+            is finished
 
         Returns
         -------
@@ -897,7 +905,8 @@ class GaiaClass(TapPlus):
                                         background=background,
                                         upload_resource=upload_resource,
                                         upload_table_name=upload_table_name,
-                                        autorun=autorun)
+                                        autorun=autorun,
+                                        stream=stream)
 
 
 Gaia = GaiaClass()
@@ -26,6 +26,31 @@ class Conf(_config.ConfigNamespace):
     pagesize = _config.ConfigItem(
         50000,
         'Number of results to request at once from the STScI server.')
+    paging_workers = _config.ConfigItem(
+        4,
+        'Number of result pages fetched concurrently from the STScI server '
+        '(1 fetches them one after another).')
+    max_rows = _config.ConfigItem(
+        1000000,
+        'Number of observations above which a planned query is refused, '
+        'or split for cone queries (0 for no limit).')
+    product_chunk_size = _config.ConfigItem(
+        500,
+        'Number of observations whose products are requested at once '
+        '(the requests are sent concurrently, by paging_workers threads).')
+    download_workers = _config.ConfigItem(
+        4,
+        'Number of data products downloaded concurrently.')
+    cloud_transfer_concurrency = _config.ConfigItem(
+        10,
+        'Number of parts of a file downloaded concurrently from the cloud.')
+    cloud_multipart_chunksize = _config.ConfigItem(
+        16777216,
+        'Size in bytes of the parts of a file downloaded from the cloud.')
+    col_config_timeout = _config.ConfigItem(
+        604800,
+        'Time in seconds after which the column configurations saved in the '
+        'cache are fetched again (0 to never expire).')
 
 
 conf = Conf()
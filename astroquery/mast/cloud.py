@@ -6,17 +6,22 @@ Cloud Access
 This file contains functionality for accessing MAST holdings in the cloud.
 """
 
+import io
 import os
 import warnings
 import threading
-import requests
+
+from concurrent.futures import ThreadPoolExecutor
 
 from astropy.logger import log
+from astropy.table import Table
 from astropy.utils.console import ProgressBarOrSpinner
 
+from .. import request_conf
+from ..query import suspend_progress
 from ..exceptions import NoResultsWarning, InvalidQueryError
 
-from . import utils
+from . import conf, utils
 
 
 __all__ = []
@@ -46,6 +51,8 @@ class CloudAccess(object):  # pragma:no-cover
 
         import boto3
         import botocore
+        import botocore.config
+        from boto3.s3.transfer import TransferConfig
 
         self.supported_missions = ["mast:hst/product", "mast:tess/product", "mast:kepler"]
 
@@ -57,6 +64,16 @@ class CloudAccess(object):  # pragma:no-cover
 
         self.pubdata_bucket = "stpubdata"
 
+        # A single client, which is thread safe, and transfer configuration serve all the
+        # requests and downloads
+        self._s3_client = None
+        self._client_lock = threading.Lock()
+        self.transfer_config = TransferConfig(max_concurrency=conf.cloud_transfer_concurrency,
+                                              multipart_chunksize=conf.cloud_multipart_chunksize)
+
+        # Paths and sizes of the files looked up by lookup_products, by data URI
+        self._lookups = dict()
+
         if verbose:
             log.info("Using the S3 STScI public dataset")
             log.warning("Your AWS account will be charged for access to the S3 bucket")
@@ -64,6 +81,20 @@ class CloudAccess(object):  # pragma:no-cover
             log.info("If you have not configured boto3, follow the instructions here: "
                      "https://boto3.readthedocs.io/en/latest/guide/configuration.html")
 
+    @property
+    def s3_client(self):
+        """
+        The boto3 S3 client shared by all requests.
+        """
+        with self._client_lock:
+            if self._s3_client is None:
+                # enough connections for the parts of files downloaded concurrently
+                max_connections = max(request_conf.max_workers, conf.download_workers) * \
+                    conf.cloud_transfer_concurrency
+                self._s3_client = self.boto3.client(
+                    's3', config=self.botocore.config.Config(max_pool_connections=max_connections))
+            return self._s3_client
+
     def is_supported(self, data_product):
         """
         Given a data product, determines if it is in a mission available in the cloud.
@@ -84,6 +115,121 @@ class CloudAccess(object):  # pragma:no-cover
                 return True
         return False
 
+    def _bucket_paths(self, data_products, strict=True):
+        """
+        Returns the paths of data products relative to the top level cloud storage location,
+        resolving their data URIs in batches. Unless ``strict``, the path of a data URI that
+        cannot be resolved is None instead of raising an error.
+        """
+
+        uris = [data_product["dataURI"] for data_product in data_products]
+        paths = utils.mast_relative_paths(uris)
+        for uri, path in zip(uris, paths):
+            if path is None and strict:
+                raise InvalidQueryError("Malformed data uri {}".format(uri))
+
+        return [path.lstrip("/") if path is not None else None for path in paths]
+
+    def _lookup(self, path):
+        """
+        Returns the size of the file at the given bucket path, or None if it is not in the bucket.
+        """
+
+        try:
+            info_lookup = self.s3_client.head_object(Bucket=self.pubdata_bucket, Key=path,
+                                                     RequestPayer='requester')
+        except self.botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] != "404":
+                raise
+            return None
+        return info_lookup["ContentLength"]
+
+    def _lookup_or_none(self, path):
+        """
+        Returns the size of the file at the given bucket path, or None if it is not in the bucket
+        or cannot be looked up.
+        """
+
+        try:
+            return self._lookup(path)
+        except Exception as ex:
+            log.warning("Error looking up {0} in the S3 bucket: {1}".format(path, ex))
+            return None
+
+    def _lookup_products(self, data_products, max_workers=None, strict=True):
+        """
+        Looks up many data products in the cloud concurrently (see `lookup_products`),
+        without remembering the results. Unless ``strict``, a product whose data URI cannot be
+        resolved or whose lookup fails is looked up as None instead of raising an error.
+        """
+
+        paths = self._bucket_paths(data_products, strict)
+        unique_paths = [path for path in dict.fromkeys(paths) if path is not None]
+        lookup = self._lookup if strict else self._lookup_or_none
+
+        with ThreadPoolExecutor(max_workers or request_conf.max_workers) as pool:
+            lengths = dict(zip(unique_paths, pool.map(lookup, unique_paths)))
+
+        return [(path, lengths[path]) if lengths.get(path) is not None else None for path in paths]
+
+    def lookup_products(self, data_products, max_workers=None):
+        """
+        Looks up many data products in the cloud in one pass: their data URIs are resolved in
+        batches and the files looked up in the bucket concurrently.
+
+        The results are remembered, so that the next `download_file` or `get_cloud_uri`
+        of each product does not need to look it up again. A product whose data URI cannot
+        be resolved, or whose lookup fails, is remembered as not found in the cloud, so that
+        the error only affects that product.
+
+        Parameters
+        ----------
+        data_products : `~astropy.table.Table` or list of `~astropy.table.Row`
+            Products to look up.
+        max_workers : int, optional
+            Number of concurrent requests. Defaults to ``astroquery.request_conf.max_workers``.
+
+        Returns
+        -------
+        response : list
+            The path relative to the top level cloud storage location and size of each
+            product, or None for the products that cannot be found in the cloud.
+        """
+
+        lookups = self._lookup_products(data_products, max_workers, strict=False)
+        for data_product, lookup in zip(data_products, lookups):
+            self._lookups[data_product["dataURI"]] = lookup
+        return lookups
+
+    def _lookup_product(self, data_product):
+        """
+        Looks up a data product in the cloud (see `lookup_products`), unless it was already.
+        """
+
+        lookup = self._lookups.pop(data_product["dataURI"], False)
+        if lookup is False:
+            lookup = self._lookup_products([data_product])[0]
+        return lookup
+
+    def _remembered_lookup(self, data_product):
+        """
+        Returns the lookup of a data product remembered by `lookup_products`, without forgetting
+        it, or None if the product was not looked up or not found in the cloud.
+        """
+
+        return self._lookups.get(data_product["dataURI"])
+
+    def _cloud_uri(self, path, include_bucket=True, full_url=False):
+        """
+        Formats the cloud URI of a bucket path (see `get_cloud_uri`).
+        """
+
+        if include_bucket:
+            path = "s3://{}/{}".format(self.pubdata_bucket, path)
+        elif full_url:
+            path = "http://s3.amazonaws.com/{}/{}".format(self.pubdata_bucket, path)
+        return path
+
     def get_cloud_uri(self, data_product, include_bucket=True, full_url=False):
         """
         For a given data product, returns the associated cloud URI.
@@ -110,24 +256,9 @@ class CloudAccess(object):  # pragma:no-cover
             found in the cloud, None is returned.
         """
 
-        s3_client = self.boto3.client('s3')
-
-        path = utils.mast_relative_path(data_product["dataURI"])
-        if path is None:
-            raise InvalidQueryError("Malformed data uri {}".format(data_product['dataURI']))
-
-        path = path.lstrip("/")
-
-        try:
-            s3_client.head_object(Bucket=self.pubdata_bucket, Key=path, RequestPayer='requester')
-            if include_bucket:
-                path = "s3://{}/{}".format(self.pubdata_bucket, path)
-            elif full_url:
-                path = "http://s3.amazonaws.com/{}/{}".format(self._pubdata_bucket, path)
-            return path
-        except self.botocore.exceptions.ClientError as e:
-            if e.response['Error']['Code'] != "404":
-                raise
+        lookup = self._lookup_product(data_product)
+        if lookup is not None:
+            return self._cloud_uri(lookup[0], include_bucket, full_url)
 
         warnings.warn("Unable to locate file {}.".format(data_product['productFilename']), NoResultsWarning)
         return None
@@ -136,6 +267,8 @@ class CloudAccess(object):  # pragma:no-cover
         """
         Takes an `~astropy.table.Table` of data products and returns the associated cloud data uris.
 
+        The products are looked up concurrently, in one pass (see `lookup_products`).
+
         Parameters
         ----------
         data_products : `~astropy.table.Table`
@@ -155,7 +288,45 @@ class CloudAccess(object):  # pragma:no-cover
             if data_products includes products not found in the cloud.
         """
 
-        return [self.get_cloud_uri(product, include_bucket, full_url) for product in data_products]
+        uri_list = []
+        for data_product, lookup in zip(data_products, self._lookup_products(data_products)):
+            if lookup is None:
+                warnings.warn("Unable to locate file {}.".format(data_product['productFilename']),
+                              NoResultsWarning)
+                uri_list.append(None)
+            else:
+                uri_list.append(self._cloud_uri(lookup[0], include_bucket, full_url))
+        return uri_list
+
+    @staticmethod
+    def _is_cached(local_path, length):
+        """
+        Checks whether a file was already downloaded, with the expected length.
+        """
+
+        if os.path.exists(local_path):
+            if length is not None:
+                statinfo = os.stat(local_path)
+                if statinfo.st_size != length:
+                    log.warning("Found cached file {0} with size {1} that is "
+                                "different from expected size {2}"
+                                .format(local_path,
+                                        statinfo.st_size,
+                                        length))
+                else:
+                    log.info("Found cached file {0} with expected size {1}."
+                             .format(local_path, statinfo.st_size))
+                    return True
+        return False
+
+    def _download_object(self, path, local_path, callback):
+        """
+        Downloads the file at the given bucket path, in parts transferred concurrently.
+        """
+
+        self.s3_client.download_file(self.pubdata_bucket, path, local_path,
+                                     ExtraArgs={"RequestPayer": "requester"},
+                                     Callback=callback, Config=self.transfer_config)
 
     def download_file(self, data_product, local_path, cache=True):
         """
@@ -172,52 +343,90 @@ class CloudAccess(object):  # pragma:no-cover
             Default is True. If file is found on disc it will not be downloaded again.
         """
 
-        s3 = self.boto3.resource('s3')
-        s3_client = self.boto3.client('s3')
-        bkt = s3.Bucket(self.pubdata_bucket)
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            bucket_path = self.get_cloud_uri(data_product, False)
-        if not bucket_path:
-            raise Exception("Unable to locate file {}.".format(data_product['productFilename']))
-
         # Ask the webserver (in this case S3) what the expected content length is and use that.
-        info_lookup = s3_client.head_object(Bucket=self.pubdata_bucket, Key=bucket_path, RequestPayer='requester')
-        length = info_lookup["ContentLength"]
+        lookup = self._lookup_product(data_product)
+        if lookup is None:
+            raise Exception("Unable to locate file {}.".format(data_product['dataURI']))
+        bucket_path, length = lookup
 
-        if cache and os.path.exists(local_path):
-            if length is not None:
-                statinfo = os.stat(local_path)
-                if statinfo.st_size != length:
-                    log.warning("Found cached file {0} with size {1} that is "
-                                "different from expected size {2}"
-                                .format(local_path,
-                                        statinfo.st_size,
-                                        length))
-                else:
-                    log.info("Found cached file {0} with expected size {1}."
-                             .format(local_path, statinfo.st_size))
-                    return
+        if cache and self._is_cached(local_path, length):
+            return
 
         with ProgressBarOrSpinner(length, ('Downloading URL s3://{0}/{1} to {2} ...'.format(
-                self.pubdata_bucket, bucket_path, local_path))) as pb:
+                self.pubdata_bucket, bucket_path, local_path)),
+                file=io.StringIO() if suspend_progress.active() else None) as pb:
+            self._download_object(bucket_path, local_path, _Progress(pb))
 
-            # Bytes read tracks how much data has been received so far
-            # This variable will be updated in multiple threads below
-            global bytes_read
-            bytes_read = 0
+    def download_files(self, data_products, local_paths, cache=True, max_workers=None):
+        """
+        Downloads many data products from the cloud concurrently, with a single progress bar.
 
-            progress_lock = threading.Lock()
+        The products are looked up in one pass (see `lookup_products`), and each file is
+        transferred in parts with the ``transfer_config`` transfer configuration.
 
-            def progress_callback(numbytes):
-                # Boto3 calls this from multiple threads pulling the data from S3
-                global bytes_read
+        Parameters
+        ----------
+        data_products : `~astropy.table.Table` or list of `~astropy.table.Row`
+            Products to download.
+        local_paths : list of str
+            The local filename of each product.
+        cache : bool
+            Default is True. If a file is found on disc with the expected size it will not be
+            downloaded again.
+        max_workers : int, optional
+            Number of files downloaded concurrently. Defaults to
+            ``astroquery.request_conf.max_workers``.
 
-                # This callback can be called in multiple threads
-                # Access to updating the console needs to be locked
-                with progress_lock:
-                    bytes_read += numbytes
-                    pb.update(bytes_read)
+        Returns
+        -------
+        response : `~astropy.table.Table`
+            The manifest of the downloads, in the order of ``data_products``.
+        """
+
+        max_workers = max_workers or request_conf.max_workers
+        lookups = self._lookup_products(data_products, max_workers)
+
+        total = sum(lookup[1] for lookup in lookups if lookup is not None)
+
+        with ProgressBarOrSpinner(total, 'Downloading {0} files from s3://{1} ...'.format(
+                len(lookups), self.pubdata_bucket)) as pb:
+
+            progress = _Progress(pb)
+
+            def download(data_product, local_path, lookup):
+                if lookup is None:
+                    return [local_path, "ERROR", "Unable to locate file {}.".format(
+                        data_product['productFilename']), data_product['dataURI']]
+                path, length = lookup
+                try:
+                    if cache and self._is_cached(local_path, length):
+                        progress(length)
+                    else:
+                        self._download_object(path, local_path, progress)
+                except Exception as ex:
+                    return [local_path, "ERROR", "{0}: {1}".format(type(ex).__name__, ex),
+                            self._cloud_uri(path)]
+                return [local_path, "COMPLETE", None, None]
+
+            with ThreadPoolExecutor(max_workers) as pool:
+                manifest_array = list(pool.map(download, data_products, local_paths, lookups))
+
+        return Table(rows=manifest_array, names=('Local Path', 'Status', 'Message', "URL"))
+
+
+class _Progress(object):
+    """
+    Progress callback updating a progress bar with the bytes received by several threads.
+    """
 
-            bkt.download_file(bucket_path, local_path, ExtraArgs={"RequestPayer": "requester"},
-                              Callback=progress_callback)
+    def __init__(self, progress_bar):
+        self.progress_bar = progress_bar
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, numbytes):
+        # Boto3 calls this from multiple threads pulling the data from S3
+        # Access to updating the console needs to be locked
+        with self._lock:
+            self.bytes_read += numbytes
+            self.progress_bar.update(self.bytes_read)
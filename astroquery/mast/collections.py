@@ -7,6 +7,7 @@ This module contains various methods for querying MAST collections such as catal
 """
 
 import warnings
+import functools
 import os
 import time
 
@@ -22,7 +23,7 @@ from ..utils.class_or_instance import class_or_instance
 from ..exceptions import InvalidQueryError, MaxResultsWarning, InputWarning
 
 from . import conf, utils
-from .core import MastQueryWithLogin
+from .core import DOWNLOAD_MANIFEST, MastQueryWithLogin
 
 
 __all__ = ['Catalogs', 'CatalogsClass']
@@ -460,16 +461,7 @@ class CatalogsClass(MastQueryWithLogin):
             if not os.path.exists(base_dir):
                 os.makedirs(base_dir)
 
-            manifest_array = []
-            for spec in spectra:
-
-                if spec['SpectrumType'] < 2:
-                    data_url = f'https://hla.stsci.edu/cgi-bin/getdata.cgi?config=ops&dataset={spec["DatasetName"]}'
-                else:
-                    data_url = f'https://hla.stsci.edu/cgi-bin/ecfproxy?file_id=spec["DatasetName"].fits'
-
-                local_path = os.path.join(base_dir, "{spec['DatasetName']}.fits")
-
+            def download(data_url, local_path):
                 status = "COMPLETE"
                 msg = None
                 url = None
@@ -488,9 +480,22 @@ class CatalogsClass(MastQueryWithLogin):
                     msg = "HTTPError: {0}".format(err)
                     url = data_url
 
-                manifest_array.append([local_path, status, msg, url])
+                return status, msg, url
+
+            downloads = []
+            for spec in spectra:
+
+                if spec['SpectrumType'] < 2:
+                    data_url = f'https://hla.stsci.edu/cgi-bin/getdata.cgi?config=ops&dataset={spec["DatasetName"]}'
+                else:
+                    data_url = f'https://hla.stsci.edu/cgi-bin/ecfproxy?file_id={spec["DatasetName"]}.fits'
+
+                local_path = os.path.join(base_dir, f"{spec['DatasetName']}.fits")
+
+                downloads.append((local_path, data_url,
+                                  functools.partial(download, data_url, local_path)))
 
-                manifest = Table(rows=manifest_array, names=('Local Path', 'Status', 'Message', "URL"))
+            manifest = self._download_many(downloads, os.path.join(base_dir, DOWNLOAD_MANIFEST), cache=cache)
 
         return manifest
 
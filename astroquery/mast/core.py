@@ -6,14 +6,24 @@ MAST Core
 This the base class for MAST queries.
 """
 
+import contextlib
+import json
+import os
+import threading
 import warnings
 
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from astropy.logger import log
+from astropy.table import Table
 from astropy.utils import deprecated
 from astropy.utils.exceptions import AstropyDeprecationWarning
 
-from ..query import QueryWithLogin
+from .. import request_conf
+from ..query import QueryWithLogin, suspend_progress
 
-from . import utils
+from . import conf, utils
 from .auth import MastAuth
 from .cloud import CloudAccess
 from .discovery_portal import PortalAPI
@@ -23,6 +33,39 @@ from .services import ServiceAPI
 __all__ = []
 
 
+# Name of the file recording the completed downloads in a download directory
+DOWNLOAD_MANIFEST = "download_manifest.jsonl"
+
+
+def _read_download_manifest(manifest_path):
+    """
+    Reads the files recorded by `MastQueryWithLogin._download_many` as downloaded.
+
+    Parameters
+    ----------
+    manifest_path : str
+        The manifest file.
+
+    Returns
+    -------
+    response : dict
+        The size of each downloaded file, by absolute local path.
+    """
+
+    completed = dict()
+    try:
+        with open(manifest_path) as manifest:
+            for line in manifest:
+                try:
+                    record = json.loads(line)
+                    completed[record["local_path"]] = record["size"]
+                except (ValueError, KeyError, TypeError):
+                    continue  # line cut short by an interrupted download
+    except OSError:
+        pass
+    return completed
+
+
 class MastQueryWithLogin(QueryWithLogin):
     """
     Super class for MAST functionality (should not be called directly by users).
@@ -156,3 +199,97 @@ class MastQueryWithLogin(QueryWithLogin):
             The sky position of the given object.
         """
         return utils.resolve_object(objectname)
+
+    def _download_many(self, downloads, manifest_path, cache=True, max_workers=None, max_per_host=None,
+                       prepare=None, host=None):
+        """
+        Downloads files concurrently, recording the completed downloads in a manifest file.
+
+        The files the manifest lists as downloaded are not downloaded again, nor checked against the
+        server, as long as they are still on disk with the same size. An interrupted download of many
+        files thus resumes with the files it had not downloaded yet.
+
+        Parameters
+        ----------
+        downloads : list of tuple
+            The local path, data URL and download function of each file. The download function takes no
+            argument and returns the status, message and URL of the download like
+            `~astroquery.mast.ObservationsClass.download_file`.
+        manifest_path : str
+            The file recording the downloaded files.
+        cache : bool
+            Default is True. If False, the manifest is not read and all files are downloaded.
+        max_workers : int, optional
+            Number of files downloaded concurrently. Defaults to ``astroquery.mast.conf.download_workers``.
+        max_per_host : int, optional
+            Maximum number of concurrent downloads from a single host. Defaults to
+            ``astroquery.request_conf.max_per_host``.
+        prepare : function, optional
+            Called with the list of the downloads that are not already complete,
+            before they start.
+        host : function, optional
+            Called with the local path and data URL of each download once prepared, returns
+            the host the file is actually downloaded from, or None if the download is not
+            limited by ``max_per_host``. Defaults to the host of the data URL.
+
+        When files are downloaded concurrently, their progress bars are not shown.
+
+        Returns
+        -------
+        response : `~astropy.table.Table`
+            The manifest of the downloads, in the order of ``downloads``.
+        """
+
+        max_workers = max_workers or conf.download_workers
+        max_per_host = max_per_host or request_conf.max_per_host
+
+        completed = _read_download_manifest(manifest_path) if cache else dict()
+
+        def is_complete(local_path):
+            abs_path = os.path.abspath(local_path)
+            size = completed.get(abs_path)
+            return size is not None and os.path.isfile(abs_path) and os.path.getsize(abs_path) == size
+
+        if prepare is not None:
+            try:
+                prepare([download for download in downloads if not is_complete(download[0])])
+            except Exception as ex:
+                # the downloads deal with their own errors
+                log.warning("Error preparing the downloads: {0}".format(ex))
+
+        if host is None:
+            def host(local_path, url):
+                return urlparse(url).netloc
+
+        download_hosts = [host(local_path, url) for local_path, url, _ in downloads]
+        hosts = {name: threading.BoundedSemaphore(max_per_host) for name in download_hosts if name is not None}
+        self._grow_connection_pool(min(max_workers, max_per_host))
+        manifest_lock = threading.Lock()
+        concurrent = max_workers > 1 and len(downloads) > 1
+
+        def download_one(local_path, url, download, download_host):
+            if is_complete(local_path):
+                return [local_path, "COMPLETE", None, None]
+
+            with contextlib.ExitStack() as stack:
+                if download_host is not None:
+                    stack.enter_context(hosts[download_host])
+                if concurrent:
+                    # concurrent progress bars would be mixed up on the terminal
+                    stack.enter_context(suspend_progress())
+                status, msg, url = download()
+
+            abs_path = os.path.abspath(local_path)
+            if status == "COMPLETE" and os.path.isfile(abs_path):
+                record = json.dumps({"local_path": abs_path, "size": os.path.getsize(abs_path)})
+                with manifest_lock:
+                    with open(manifest_path, "a") as manifest:
+                        manifest.write(record + "\n")
+            return [local_path, status, msg, url]
+
+        # downloads completed before an exception are recorded in the manifest
+        with ThreadPoolExecutor(max_workers) as pool:
+            manifest_array = list(pool.map(lambda args: download_one(*args), [
+                download + (download_host,) for download, download_host in zip(downloads, download_hosts)]))
+
+        return Table(rows=manifest_array, names=('Local Path', 'Status', 'Message', "URL"))
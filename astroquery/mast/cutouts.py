@@ -16,22 +16,24 @@ import json
 import zipfile
 import os
 
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 import numpy as np
 
 import astropy.units as u
-from astropy.coordinates import Angle
+from astropy.coordinates import Angle, SkyCoord
 
 from astropy.table import Table
 from astropy.io import fits
 
+from .. import request_conf
 from ..query import BaseQuery
 from ..utils import commons
 from ..exceptions import NoResultsWarning, InvalidQueryError, RemoteServiceError
 
 from . import conf
-from .utils import parse_input_location
+from .utils import parse_input_location, resolve_object
 from .core import MastQueryWithLogin
 
 
@@ -92,6 +94,76 @@ def _parse_cutout_size(size):
     return {"x": x, "y": y, "units": units}
 
 
+def _open_cutout_zip(response):
+    """
+    Open the zip file of an astrocut response in memory.
+
+    Parameters
+    ----------
+    response : `~requests.Response`
+        The response of an astrocut request, either a zip file or a json no results message.
+
+    Returns
+    -------
+    response : `~zipfile.ZipFile` or None
+        The zip file, or None (with a warning) if the request returned no results.
+    """
+
+    try:
+        return zipfile.ZipFile(BytesIO(response.content), 'r')
+    except zipfile.BadZipFile:
+        message = response.json()
+        warnings.warn(message['msg'], NoResultsWarning)
+        return None
+
+
+def _resolve_or_exception(objectname):
+    """
+    Resolve an object name with `~astroquery.mast.utils.resolve_object`, returning the
+    exception raised instead if it fails.
+    """
+    try:
+        return resolve_object(objectname)
+    except Exception as ex:
+        return ex
+
+
+def _parse_cutout_zip(response):
+    """
+    Open the target pixel files of an astrocut response.
+
+    Parameters
+    ----------
+    response : `~requests.Response`
+        The response of an astrocut request, either a zip file or a json no results message.
+
+    Returns
+    -------
+    response : A list of `~astropy.io.fits.HDUList` objects.
+    """
+
+    ZIPFILE = _open_cutout_zip(response)
+    if ZIPFILE is None:
+        return []
+
+    # Open all the contained fits files, without writing them to disk.
+    # Stored files are read (lazily) straight from the zip, but since seeking
+    # in a compressed file means decompressing it again, compressed files are
+    # inflated once into another BytesIO object
+    cutout_hdus_list = []
+    for info in ZIPFILE.infolist():
+        if info.compress_type == zipfile.ZIP_STORED:
+            CUTOUT = ZIPFILE.open(info)
+        else:
+            CUTOUT = BytesIO(ZIPFILE.read(info))
+        cutout_hdus_list.append(fits.open(CUTOUT, lazy_load_hdus=True))
+
+        # preserve the original filename in the fits object
+        cutout_hdus_list[-1].filename = info.filename
+
+    return cutout_hdus_list
+
+
 class TesscutClass(MastQueryWithLogin):
     """
     MAST TESS FFI cutout query class.
@@ -210,6 +282,29 @@ class TesscutClass(MastQueryWithLogin):
         size_dict = _parse_cutout_size(size)
 
         path = os.path.join(path, '')
+        localpath_table = Table(names=["Local Path"], dtype=[str])
+
+        if inflate:
+            # the zip is read in memory, only the target pixel files are written
+            param_dict = dict(size_dict, ra=coordinates.ra.deg, dec=coordinates.dec.deg)
+            if sector:
+                param_dict["sector"] = sector
+
+            response = self._service_api_connection.service_request_async("astrocut", param_dict)
+            response.raise_for_status()  # Raise any errors
+
+            zip_ref = _open_cutout_zip(response)
+            if zip_ref is None:
+                return localpath_table
+
+            print("Inflating...")
+            with zip_ref:
+                cutout_files = zip_ref.namelist()
+                zip_ref.extractall(path, members=cutout_files)
+
+            localpath_table['Local Path'] = [path+x for x in cutout_files]
+            return localpath_table
+
         astrocut_request = "ra={}&dec={}&y={}&x={}&units={}".format(coordinates.ra.deg,
                                                                     coordinates.dec.deg,
                                                                     size_dict["y"],
@@ -222,28 +317,16 @@ class TesscutClass(MastQueryWithLogin):
         zipfile_path = "{}tesscut_{}.zip".format(path, time.strftime("%Y%m%d%H%M%S"))
         self._download_file(astrocut_url, zipfile_path)
 
-        localpath_table = Table(names=["Local Path"], dtype=[str])
-
         # Checking if we got a zip file or a json no results message
         if not zipfile.is_zipfile(zipfile_path):
             with open(zipfile_path, 'r') as FLE:
                 response = json.load(FLE)
             warnings.warn(response['msg'], NoResultsWarning)
+            os.remove(zipfile_path)
             return localpath_table
 
-        if not inflate:  # not unzipping
-            localpath_table['Local Path'] = [zipfile_path]
-            return localpath_table
-
-        print("Inflating...")
-        # unzipping the zipfile
-        zip_ref = zipfile.ZipFile(zipfile_path, 'r')
-        cutout_files = zip_ref.namelist()
-        zip_ref.extractall(path, members=cutout_files)
-        zip_ref.close()
-        os.remove(zipfile_path)
-
-        localpath_table['Local Path'] = [path+x for x in cutout_files]
+        # not unzipping
+        localpath_table['Local Path'] = [zipfile_path]
         return localpath_table
 
     def get_cutouts(self, coordinates=None, size=5, sector=None, objectname=None):
@@ -292,26 +375,106 @@ class TesscutClass(MastQueryWithLogin):
         response = self._service_api_connection.service_request_async("astrocut", param_dict)
         response.raise_for_status()  # Raise any errors
 
-        try:
-            ZIPFILE = zipfile.ZipFile(BytesIO(response.content), 'r')
-        except zipfile.BadZipFile:
-            message = response.json()
-            warnings.warn(message['msg'], NoResultsWarning)
-            return []
+        return _parse_cutout_zip(response)
+
+    def get_cutouts_batch(self, coordinates=None, size=5, sector=None, objectnames=None, max_workers=None):
+        """
+        Get cutout target pixel files around many targets with indicated size,
+        and return them as a list of `~astropy.io.fits.HDUList` objects per target.
 
-        # Open all the contained fits files:
-        # Since we cannot seek on a compressed zip file,
-        # we have to read the data, wrap it in another BytesIO object,
-        # and then open that using fits.open
-        cutout_hdus_list = []
-        for name in ZIPFILE.namelist():
-            CUTOUT = BytesIO(ZIPFILE.open(name).read())
-            cutout_hdus_list.append(fits.open(CUTOUT))
+        The cutout requests are sent concurrently, and the target pixel files are
+        read from the responses in memory. Repeated targets are only requested once,
+        and repeated object names only resolved once.
 
-            # preserve the original filename in the fits object
-            cutout_hdus_list[-1].filename = name
+        Parameters
+        ----------
+        coordinates : `~astropy.coordinates.SkyCoord`, `~astropy.table.Table` or list, optional
+            The targets, as an array of coordinates, a table with ``ra`` and ``dec``
+            columns in degrees (e.g. a `~astroquery.mast.CatalogsClass` TIC query result),
+            or a list of targets as accepted by `get_cutouts`.
+            One and only one of coordinates and objectnames must be supplied.
+        size : int, array-like, `~astropy.units.Quantity`
+            Optional, default 5 pixels.
+            The size of the cutout arrays (see `get_cutouts`).
+        sector : int
+            Optional.
+            The TESS sector to return the cutouts from.  If not supplied, cutouts
+            from all available sectors on which each coordinate appears will be returned.
+        objectnames : list of str, optional
+            The targets, by name (e.g. "M104") or TIC ID (e.g. "TIC 141914082").
+            One and only one of coordinates and objectnames must be supplied.
+        max_workers : int, optional
+            Number of cutouts requested concurrently. Defaults to
+            ``astroquery.request_conf.max_workers``.
 
-        return cutout_hdus_list
+        Returns
+        -------
+        response : list
+            For each target, a list of `~astropy.io.fits.HDUList` objects. The list is
+            empty, with a warning, for targets without cutouts, whose name could not be
+            resolved or whose request failed.
+        """
+
+        if (objectnames is None) == (coordinates is None):
+            raise InvalidQueryError("One and only one of objectnames and coordinates must be specified.")
+
+        targets = coordinates if objectnames is None else objectnames
+        if not isinstance(targets, SkyCoord) and not len(targets):
+            return []
+
+        max_workers = max_workers or request_conf.max_workers
+
+        # indices of the targets to request
+        requested = None
+        if objectnames is not None:
+            names = list(dict.fromkeys(objectnames))
+            with ThreadPoolExecutor(max_workers) as pool:
+                resolved = dict(zip(names, pool.map(_resolve_or_exception, names)))
+            requested = []
+            for index, name in enumerate(objectnames):
+                if isinstance(resolved[name], Exception):
+                    warnings.warn("Could not resolve target {} ({}): {}".format(index, name, resolved[name]),
+                                  NoResultsWarning)
+                else:
+                    requested.append(index)
+            resolved = [resolved[objectnames[index]] for index in requested]
+            coordinates = SkyCoord(resolved) if resolved else SkyCoord([], [], unit="deg")
+        elif isinstance(coordinates, Table):
+            coordinates = SkyCoord(coordinates['ra'], coordinates['dec'], unit="deg")
+        elif not isinstance(coordinates, SkyCoord):
+            coordinates = SkyCoord([commons.parse_coordinates(target) for target in coordinates])
+
+        ra_list = np.atleast_1d(coordinates.ra.deg)
+        dec_list = np.atleast_1d(coordinates.dec.deg)
+        if requested is None:
+            requested = list(range(len(ra_list)))
+
+        size_dict = _parse_cutout_size(size)
+        params_list = []
+        for ra, dec in zip(ra_list, dec_list):
+            param_dict = dict(size_dict, ra=ra, dec=dec)
+            if sector:
+                param_dict["sector"] = sector
+            params_list.append(param_dict)
+
+        cutouts = [[] for _ in (objectnames if objectnames is not None else requested)]
+        if not params_list:
+            return cutouts
+
+        # each response is parsed, and released, as soon as it arrives
+        responses = self._service_api_connection.service_request_many("astrocut", params_list,
+                                                                      max_workers=max_workers,
+                                                                      as_completed=True)
+        for index, response in responses:
+            target = requested[index]
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                cutouts[target] = _parse_cutout_zip(response)
+            except Exception as ex:
+                warnings.warn("Cutout request of target {} failed: {}".format(target, ex),
+                              NoResultsWarning)
+        return cutouts
 
 
 Tesscut = TesscutClass()
@@ -11,14 +11,20 @@ import uuid
 import json
 import time
 
+from operator import itemgetter
+
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import requests
 
 from urllib.parse import quote as urlencode
 
-from astropy.table import Table, vstack, MaskedColumn
+from astropy.table import Table, MaskedColumn
 from astropy.utils import deprecated
 
-from ..query import BaseQuery, QueryWithLogin
+from .. import version
+from ..query import AstroQuery, BaseQuery, QueryWithLogin
 from ..utils import async_to_sync
 from ..utils.class_or_instance import class_or_instance
 from ..exceptions import InputWarning, NoResultsWarning, RemoteServiceError
@@ -29,6 +35,11 @@ from . import conf, utils
 __all__ = []
 
 
+# Version of the column configurations saved in the cache, to be increased
+# whenever _get_col_config changes what it saves
+COL_CONFIG_VERSION = 1
+
+
 def _prepare_service_request_string(json_obj):
     """
     Takes a mashup JSON request object and turns it into a url-safe string.
@@ -69,14 +80,45 @@ def _json_to_table(json_obj, col_config=None):
 
     data_table = Table(masked=True)
 
+    for col, col_data, col_mask in _json_to_columns(json_obj, col_config):
+        data_table.add_column(MaskedColumn(col_data, name=col, mask=col_mask))
+
+    return data_table
+
+
+def _json_to_columns(json_obj, col_config=None):
+    """
+    Takes a JSON object as returned from a Mashup request and converts each of its columns.
+
+    Parameters
+    ----------
+    json_obj : dict
+        A Mashup response JSON object (python dictionary)
+    col_config : dict, optional
+        Dictionary that defines column properties, e.g. default value.
+
+    Returns
+    -------
+    response : generator of (str, `~numpy.ndarray`, `~numpy.ndarray`)
+        The name, typed values and mask of each column.
+    """
+
     if not all(x in json_obj.keys() for x in ['fields', 'data']):
         raise KeyError("Missing required key(s) 'data' and/or 'fields.'")
 
-    for col, atype in [(x['name'], x['type']) for x in json_obj['fields']]:
+    fields = [(x['name'], x['type']) for x in json_obj['fields'] if x['name'] != "_selected_"]
+    rows = json_obj['data']
+
+    # transposing the rows into columns in one pass
+    columns = None
+    if len(fields) > 1:
+        try:
+            columns = list(zip(*map(itemgetter(*[col for col, _ in fields]), rows))) or None
+        except KeyError:
+            # some rows lack some of the columns
+            columns = None
 
-        # Removing "_selected_" column
-        if col == "_selected_":
-            continue
+    for i, (col, atype) in enumerate(fields):
 
         # reading the colum config if given
         ignore_value = None
@@ -90,21 +132,134 @@ def _json_to_table(json_obj, col_config=None):
         ignore_value = reg_type[2] if (ignore_value is None) else ignore_value
 
         # Make the column list (don't assign final type yet or there will be errors)
-        col_data = np.array([x.get(col, ignore_value) for x in json_obj['data']], dtype=object)
-        if ignore_value is not None:
-            col_data[np.where(np.equal(col_data, None))] = ignore_value
-
-        # no consistant way to make the mask because np.equal fails on ''
-        # and array == value fails with None
-        if atype == 'str':
-            col_mask = (col_data == ignore_value)
+        if columns is not None:
+            col_data = columns[i]
         else:
-            col_mask = np.equal(col_data, ignore_value)
+            col_data = [x.get(col, ignore_value) for x in rows]
 
-        # add the column
-        data_table.add_column(MaskedColumn(col_data.astype(atype), name=col, mask=col_mask))
+        yield (col,) + _typed_column(col_data, atype, ignore_value)
 
-    return data_table
+
+def _typed_column(col_data, atype, ignore_value):
+    """
+    Converts the raw values of a column, replacing the null values by the ignore value and masking the
+    ignore value.
+
+    Numerical and string columns are converted by NumPy in a single pass, without going through an
+    intermediate object array.
+
+    Parameters
+    ----------
+    col_data : sequence
+        The column values as decoded from JSON.
+    atype : type
+        The python datatype of the column.
+    ignore_value
+        The value of the column standing for missing data.
+
+    Returns
+    -------
+    response : tuple of `~numpy.ndarray`
+        The typed values and the mask.
+    """
+
+    if ignore_value is not None and atype in (np.float64, np.int64, str):
+        if None in col_data:
+            col_data = [ignore_value if x is None else x for x in col_data]
+        try:
+            typed = np.array(col_data, dtype=atype)
+        except (TypeError, ValueError):
+            typed = None
+        if typed is not None and typed.shape == (len(col_data),):
+            return typed, typed == ignore_value
+
+    values = col_data
+    col_data = np.empty(len(values), dtype=object)
+    col_data[:] = values
+    if ignore_value is not None:
+        col_data[np.where(np.equal(col_data, None))] = ignore_value
+
+    # no consistant way to make the mask because np.equal fails on ''
+    # and array == value fails with None
+    if atype == 'str':
+        col_mask = (col_data == ignore_value)
+    else:
+        col_mask = np.equal(col_data, ignore_value)
+
+    return col_data.astype(atype), col_mask
+
+
+class _TableBuilder:
+    """
+    Assembles the pages of a Mashup response into a single `~astropy.table.Table`.
+
+    Each page is converted into preallocated column buffers as soon as it is added,
+    so neither the per-page tables nor the decoded pages need to be kept until the end.
+
+    Parameters
+    ----------
+    col_config : dict, optional
+        Dictionary that defines column properties, e.g. default value.
+    """
+
+    def __init__(self, col_config=None):
+        self.col_config = col_config
+        self.nrows = 0
+        self._columns = None
+
+    def add_page(self, json_obj, capacity=None):
+        """
+        Append the rows of a Mashup response JSON object.
+
+        Parameters
+        ----------
+        json_obj : dict
+            A Mashup response JSON object (python dictionary)
+        capacity : int, optional
+            Expected total number of rows, used to size the column buffers when the first page is added.
+        """
+
+        columns = list(_json_to_columns(json_obj, self.col_config))
+        page_rows = len(json_obj['data'])
+        end = self.nrows + page_rows
+
+        if self._columns is None:
+            size = max(capacity or 0, page_rows)
+            self._columns = {col: (np.empty(size, dtype=col_data.dtype), np.empty(size, dtype=bool))
+                             for col, col_data, _ in columns}
+
+        for col, col_data, col_mask in columns:
+            buffer, mask = self._columns[col]
+
+            # growing the buffers if there are more rows than expected
+            # or if the values do not fit (e.g. longer strings)
+            dtype = np.result_type(buffer.dtype, col_data.dtype)
+            if end > len(buffer) or dtype != buffer.dtype:
+                size = len(buffer) if end <= len(buffer) else max(end, 2 * len(buffer))
+                new_buffer = np.empty(size, dtype=dtype)
+                new_buffer[:self.nrows] = buffer[:self.nrows]
+                new_mask = np.empty(size, dtype=bool)
+                new_mask[:self.nrows] = mask[:self.nrows]
+                buffer, mask = self._columns[col] = new_buffer, new_mask
+
+            buffer[self.nrows:end] = col_data
+            mask[self.nrows:end] = col_mask
+
+        self.nrows = end
+
+    def table(self):
+        """
+        Returns
+        -------
+        response : `~astropy.table.Table`
+            The rows added so far.
+        """
+
+        data_table = Table(masked=True)
+        for col, (buffer, mask) in (self._columns or {}).items():
+            data_table.add_column(MaskedColumn(buffer[:self.nrows], name=col, mask=mask[:self.nrows],
+                                               copy=False))
+        return data_table
 
 
 @async_to_sync
@@ -129,12 +284,14 @@ class PortalAPI(BaseQuery):
 
         self.TIMEOUT = conf.timeout
         self.PAGESIZE = conf.pagesize
+        self.PAGING_WORKERS = conf.paging_workers
 
         self._column_configs = dict()
         self._current_service = None
 
     def _request(self, method, url, params=None, data=None, headers=None,
-                 files=None, stream=False, auth=None, retrieve_all=True):
+                 files=None, stream=False, auth=None, retrieve_all=True,
+                 max_workers=None):
         """
         Override of the parent method:
         A generic HTTP request method, similar to `~requests.Session.request`
@@ -163,58 +320,108 @@ class PortalAPI(BaseQuery):
             See `~requests.request`
         retrieve_all : bool
             Default True. Retrieve all pages of data or just the one indicated in the params value.
+        max_workers : int, optional
+            Number of pages fetched concurrently once the first page has revealed the page count.
+            Defaults to ``astroquery.mast.conf.paging_workers``.
 
         Returns
         -------
-        response : `~requests.Response`
-            The response from the server.
+        response : list of `~requests.Response`
+            The responses from the server, one per page.
         """
 
         start_time = time.time()
-        all_responses = []
-        total_pages = 1
-        cur_page = 0
 
-        while cur_page < total_pages:
-            status = "EXECUTING"
+        def request_page(page_data):
+            return self._request_page(method, url, start_time, params=params, data=page_data,
+                                      headers=headers, files=files, stream=stream, auth=auth)
+
+        response, status, result = request_page(data)
+        all_responses = [response]
+
+        if (status != "COMPLETE") or (not retrieve_all):
+            return all_responses
+
+        paging = result.get("paging")
+        if paging is None:
+            return all_responses
+        total_pages = paging['pagesFiltered']
+        cur_page = paging['page']
+
+        # the following pages only differ by their page number
+        page_marker = "page%22%3A%20{}%2C"
+        pages_data = [data.replace(page_marker.format(cur_page), page_marker.format(page))
+                      for page in range(cur_page + 1, total_pages + 1)]
+
+        max_workers = min(max_workers or self.PAGING_WORKERS, len(pages_data))
+        if max_workers > 1:
+            self._grow_connection_pool(max_workers)
+            with ThreadPoolExecutor(max_workers) as pool:
+                pages = pool.map(request_page, pages_data)
+                for response, status, result in pages:
+                    all_responses.append(response)
+                    if status != "COMPLETE":
+                        break
+        else:
+            for page_data in pages_data:
+                response, status, result = request_page(page_data)
+                all_responses.append(response)
+                if status != "COMPLETE":
+                    break
+
+        return all_responses
 
-            while status == "EXECUTING":
-                response = super(PortalAPI, self)._request(method, url, params=params, data=data,
-                                                           headers=headers, files=files, cache=False,
-                                                           stream=stream, auth=auth)
+    def _request_page(self, method, url, start_time, **kwargs):
+        """
+        Request a single page of results, polling the server until it is no longer executing.
 
-                if (time.time() - start_time) >= self.TIMEOUT:
-                    raise TimeoutError("Timeout limit of {} exceeded.".format(self.TIMEOUT))
+        Parameters
+        ----------
+        method : 'GET' or 'POST'
+        url : str
+        start_time : float
+            Time at which the whole request started, for the timeout.
+        **kwargs
+            Passed to `~astroquery.query.BaseQuery._request`.
 
-                # Raising error based on HTTP status if necessary
-                response.raise_for_status()
+        Returns
+        -------
+        response : `~requests.Response`
+            The last response from the server.
+        status : str
+            The status of the mashup request.
+        result : dict
+            The decoded JSON response.
+        """
 
-                result = response.json()
+        status = "EXECUTING"
 
-                if not result:  # kind of hacky, but col_config service returns nothing if there is an error
-                    status = "ERROR"
-                else:
-                    status = result.get("status")
+        while status == "EXECUTING":
+            response = super(PortalAPI, self)._request(method, url, cache=False, **kwargs)
 
-            all_responses.append(response)
+            if (time.time() - start_time) >= self.TIMEOUT:
+                raise TimeoutError("Timeout limit of {} exceeded.".format(self.TIMEOUT))
 
-            if (status != "COMPLETE") or (not retrieve_all):
-                break
+            # Raising error based on HTTP status if necessary
+            response.raise_for_status()
 
-            paging = result.get("paging")
-            if paging is None:
-                break
-            total_pages = paging['pagesFiltered']
-            cur_page = paging['page']
+            result = response.json()
 
-            data = data.replace("page%22%3A%20"+str(cur_page)+"%2C", "page%22%3A%20"+str(cur_page+1)+"%2C")
+            if not result:  # kind of hacky, but col_config service returns nothing if there is an error
+                status = "ERROR"
+            else:
+                status = result.get("status")
 
-        return all_responses
+        return response, status, result
 
     def _get_col_config(self, service, fetch_name=None):
         """
         Gets the columnsConfig entry for given service and stores it in `self._column_configs`.
 
+        The columns config is also saved in the cache, where it is reused by later sessions for
+        ``astroquery.mast.conf.col_config_timeout`` seconds, as long as it was saved by the same
+        version of astroquery.
+
         Parameters
         ----------
         service : string
@@ -227,6 +434,13 @@ class PortalAPI(BaseQuery):
         if not fetch_name:
             fetch_name = service
 
+        cache_key = AstroQuery("POST", self.COLUMNS_CONFIG_URL,
+                               data={"colConfigId": fetch_name, "service": service}).hash()
+        col_config = self._load_col_config(cache_key)
+        if col_config is not None:
+            self._column_configs[service] = col_config
+            return
+
         headers = {"User-Agent": self._session.headers["User-Agent"],
                    "Content-type": "application/x-www-form-urlencoded",
                    "Accept": "text/plain"}
@@ -257,6 +471,72 @@ class PortalAPI(BaseQuery):
             for col, val in self._column_configs[service].items():
                 val.pop('hist', None)  # don't want to save all this unecessary data
 
+        self._save_col_config(cache_key, self._column_configs[service])
+
+    def _load_col_config(self, cache_key):
+        """
+        Reads a columns config saved in the cache by `_save_col_config`.
+
+        Parameters
+        ----------
+        cache_key : str
+            The cache key of the columns config.
+
+        Returns
+        -------
+        response : dict or None
+            The columns config, or None if it is not in the cache, expired, or was saved by
+            another version of astroquery.
+        """
+
+        cache_backend = self.cache_backend
+        if cache_backend is None or not self._cache_active:
+            return None
+
+        response = cache_backend.get(cache_key)
+        if response is None:
+            return None
+        try:
+            entry = json.loads(response.content.decode('utf-8'))
+        except ValueError:
+            entry = None
+        finally:
+            response.close()
+
+        if (not isinstance(entry, dict) or entry.get("version") != COL_CONFIG_VERSION
+                or entry.get("astroquery") != version.version):
+            return None
+        timeout = conf.col_config_timeout
+        if timeout and time.time() - entry.get("created", 0) > timeout:
+            return None
+        return entry.get("config")
+
+    def _save_col_config(self, cache_key, col_config):
+        """
+        Saves a columns config in the cache, along with its creation time and version.
+
+        Parameters
+        ----------
+        cache_key : str
+            The cache key of the columns config.
+        col_config : dict
+            The columns config.
+        """
+
+        cache_backend = self.cache_backend
+        if cache_backend is None or not self._cache_active:
+            return
+
+        entry = {"version": COL_CONFIG_VERSION,
+                 "astroquery": version.version,
+                 "created": time.time(),
+                 "config": col_config}
+        response = requests.Response()
+        response._content = json.dumps(entry).encode('utf-8')
+        response.status_code = 200
+        response.url = self.COLUMNS_CONFIG_URL
+        cache_backend.put(cache_key, response)
+
     def _parse_result(self, responses, verbose=False):
         """
         Parse the results of a list of `~requests.Response` objects and returns an `~astropy.table.Table` of results.
@@ -275,13 +555,61 @@ class PortalAPI(BaseQuery):
         response : `~astropy.table.Table`
         """
 
-        result_list = []
+        builder = _TableBuilder(self._pop_col_config())
+
+        for result in self._iter_json(responses):
+            capacity = None
+            paging = result.get('paging')
+            if not builder.nrows and paging:
+                # sizing the table from the number of rows in the pages to be added
+                pages = len(responses) if hasattr(responses, '__len__') else \
+                    paging['pagesFiltered'] - paging['page'] + 1
+                capacity = min(paging.get('rowsFiltered', 0), len(result['data']) * pages)
+            builder.add_page(result, capacity)
+
+        all_results = builder.table()
+
+        # Check for no results
+        if not all_results:
+            warnings.warn("Query returned no results.", NoResultsWarning)
+        return all_results
+
+    def iter_tables(self, responses):
+        """
+        Parse the results of `~requests.Response` objects one by one, as an alternative to
+        `_parse_result` for results too large to be kept in memory as a single table.
+
+        Parameters
+        ----------
+        responses : iterable of `~requests.Response`
+            The responses of a Mashup query, e.g. as returned by `service_request_async`.
+
+        Returns
+        -------
+        response : generator of `~astropy.table.Table`
+            One table per response (i.e. per page of results).
+        """
+
+        col_config = self._pop_col_config()
+        for result in self._iter_json(responses):
+            yield _json_to_table(result, col_config)
+
+    def _pop_col_config(self):
+        """
+        Returns the columns config of the service that was last queried, if any, and clears that service.
+        """
 
-        # loading the columns config
         col_config = None
         if self._current_service:
             col_config = self._column_configs.get(self._current_service)
             self._current_service = None  # clearing current service
+        return col_config
+
+    @staticmethod
+    def _iter_json(responses):
+        """
+        Decodes the responses one by one, raising an error for those with an error status.
+        """
 
         for resp in responses:
             result = resp.json()
@@ -290,18 +618,11 @@ class PortalAPI(BaseQuery):
             if result['status'] == "ERROR":
                 raise RemoteServiceError(result.get('msg', "There was an error with your request."))
 
-            result_table = _json_to_table(result, col_config)
-            result_list.append(result_table)
-
-        all_results = vstack(result_list)
-
-        # Check for no results
-        if not all_results:
-            warnings.warn("Query returned no results.", NoResultsWarning)
-        return all_results
+            yield result
 
     @class_or_instance
-    def service_request_async(self, service, params, pagesize=None, page=None, **kwargs):
+    def service_request_async(self, service, params, pagesize=None, page=None, max_workers=None,
+                              **kwargs):
         """
         Given a Mashup service and parameters, builds and excecutes a Mashup query.
         See documentation `here <https://mast.stsci.edu/api/v0/class_mashup_1_1_mashup_request.html>`__
@@ -321,6 +642,9 @@ class PortalAPI(BaseQuery):
             Default None.
             Can be used to override the default behavior of all results being returned to obtain
             a specific page of results.
+        max_workers : int, optional
+            Default None.
+            Number of pages fetched concurrently, overriding ``astroquery.mast.conf.paging_workers``.
         **kwargs :
             See MashupRequest properties
             `here <https://mast.stsci.edu/api/v0/class_mashup_1_1_mashup_request.html>`__
@@ -361,7 +685,7 @@ class PortalAPI(BaseQuery):
 
         req_string = _prepare_service_request_string(mashup_request)
         response = self._request("POST", self.MAST_REQUEST_URL, data=req_string, headers=headers,
-                                 retrieve_all=retrieve_all)
+                                 retrieve_all=retrieve_all, max_workers=max_workers)
 
         return response
 
@@ -8,11 +8,15 @@ This module contains various methods for querying MAST observations.
 
 
 import warnings
+import functools
 import json
+import math
 import time
 import os
 import uuid
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 from requests import HTTPError
@@ -20,14 +24,14 @@ from requests import HTTPError
 import astropy.units as u
 import astropy.coordinates as coord
 
-from astropy.table import Table, Row, vstack, MaskedColumn
+from astropy.table import Table, Row, MaskedColumn
 from astropy.logger import log
 
 from astropy.utils import deprecated
 from astropy.utils.console import ProgressBarOrSpinner
 from astropy.utils.exceptions import AstropyDeprecationWarning
 
-from six.moves.urllib.parse import quote as urlencode
+from six.moves.urllib.parse import quote as urlencode, urlparse
 
 from ..query import QueryWithLogin
 from ..utils import commons, async_to_sync
@@ -37,13 +41,20 @@ from ..exceptions import (TimeoutError, InvalidQueryError, RemoteServiceError,
                           NoResultsWarning, InputWarning, AuthenticationWarning)
 
 from . import conf, utils
-from .core import MastQueryWithLogin
+from .core import DOWNLOAD_MANIFEST, MastQueryWithLogin
 
 
 __all__ = ['Observations', 'ObservationsClass',
            'MastClass', 'Mast']
 
 
+# smallest page a planned query is divided into, to keep the paging workers busy
+PLAN_MIN_PAGESIZE = 5000
+
+# narrowest declination band (in degrees) a cone query is split into
+SPLIT_MIN_WIDTH = 1 / 3600
+
+
 @async_to_sync
 class ObservationsClass(MastQueryWithLogin):
     """
@@ -70,7 +81,26 @@ class ObservationsClass(MastQueryWithLogin):
         response : `~astropy.table.Table`
         """
 
-        return self._portal_api_connection._parse_result(responses, verbose)
+        products = self._portal_api_connection._current_service == "Mast.Caom.Products"
+        result = self._portal_api_connection._parse_result(responses, verbose)
+
+        if products and len(result):
+            result = self._unique_products(result)
+        return result
+
+    @staticmethod
+    def _unique_products(products):
+        """
+        Removes the products listed more than once (e.g. products shared by observations
+        requested in different chunks), keeping the first of each obsID/productFilename pair.
+        """
+
+        keys = np.char.add(np.char.add(np.asarray(products['obsID'], dtype=str), '/'),
+                           np.asarray(products['productFilename'], dtype=str))
+        _, first = np.unique(keys, return_index=True)
+        if len(first) == len(products):
+            return products
+        return products[np.sort(first)]
 
     def list_missions(self):
         """
@@ -196,8 +226,114 @@ class ObservationsClass(MastQueryWithLogin):
 
         return position, mashup_filters
 
+    def _plan_query(self, count, pagesize=None, plan=True):
+        """
+        Checks the number of results of a query against ``conf.max_rows`` and chooses its paging.
+
+        Unless given, the page size spreads the results evenly over enough pages to keep
+        the paging workers busy, with pages of at least ``PLAN_MIN_PAGESIZE`` and at most
+        ``conf.pagesize`` results.
+
+        Parameters
+        ----------
+        count : int
+            The number of results of the query.
+        pagesize : int, optional
+            Page size requested for the query, used as is.
+        plan : bool or 'warn'
+            Default True, queries with more than ``conf.max_rows`` results are refused.
+            If 'warn' they are run, with a warning.
+
+        Returns
+        -------
+        response : tuple
+            Tuple of the form (pagesize, max_workers).
+        """
+
+        if conf.max_rows and count > conf.max_rows:
+            message = "Query would return {} observations, more than mast.conf.max_rows ({}).".format(
+                count, conf.max_rows)
+            if plan != 'warn':
+                raise InvalidQueryError(message + " Narrow the query, or use plan='warn' to run it anyway.")
+            warnings.warn(message, MaxResultsWarning)
+
+        workers = self._portal_api_connection.PAGING_WORKERS
+        if not pagesize:
+            pages = max(math.ceil(count / self._portal_api_connection.PAGESIZE),
+                        min(workers + 1, math.ceil(count / PLAN_MIN_PAGESIZE)), 1)
+            pagesize = max(math.ceil(count / pages), 1)
+
+        pages = max(math.ceil(count / pagesize), 1)
+        return pagesize, max(min(workers, pages - 1), 1)
+
+    def _split_cone(self, coordinates, radius, count, dec_range=(-90., 90.)):
+        """
+        Splits a cone query into declination bands of at most ``conf.max_rows`` observations,
+        halving the part of the band that is within the cone until it is small enough.
+
+        The bands do not overlap, and the outer ones extend to the poles so that observations
+        which overlap the cone without having their center in it are still found.
+
+        Parameters
+        ----------
+        coordinates : `~astropy.coordinates.SkyCoord`
+            The center of the cone.
+        radius : `~astropy.coordinates.Angle`
+            The radius of the cone.
+        count : int
+            The number of observations in ``dec_range``.
+        dec_range : tuple, optional
+            The band of declinations to split, in degrees.
+
+        Returns
+        -------
+        response : list
+            List of (dec_min, dec_max, count) tuples.
+        """
+
+        dec_min, dec_max = dec_range
+        inner_min = max(dec_min, coordinates.dec.deg - radius.deg)
+        inner_max = min(dec_max, coordinates.dec.deg + radius.deg)
+        if count <= conf.max_rows or inner_max - inner_min < SPLIT_MIN_WIDTH:
+            return [(dec_min, dec_max, count)]
+
+        middle = (inner_min + inner_max) / 2
+        lower_count = self.query_criteria_count(coordinates=coordinates, radius=radius,
+                                                s_dec=[dec_min, middle])
+        # the upper band starts right after the middle, so that no observation is in both bands
+        return (self._split_cone(coordinates, radius, lower_count, (dec_min, middle))
+                + self._split_cone(coordinates, radius, count - lower_count,
+                                   (float(np.nextafter(middle, dec_max)), dec_max)))
+
+    def _query_region_split(self, coordinates, radius, count, pagesize=None):
+        """
+        Runs a cone query as one filtered query per declination band of `_split_cone`.
+
+        Returns
+        -------
+        response : list of `~requests.Response`
+            The responses of all the bands.
+        """
+
+        bands = self._split_cone(coordinates, radius, count)
+        log.info("Splitting the query of {} observations in {} declination bands.".format(count, len(bands)))
+
+        responses = []
+        for dec_min, dec_max, band_count in bands:
+            band_pagesize, max_workers = self._plan_query(band_count, pagesize, 'warn')
+            position, mashup_filters = self._parse_caom_criteria(coordinates=coordinates, radius=radius,
+                                                                 s_dec=[dec_min, dec_max])
+            params = {"columns": "*",
+                      "filters": mashup_filters,
+                      "position": position}
+            responses += self._portal_api_connection.service_request_async("Mast.Caom.Filtered.Position",
+                                                                           params, band_pagesize,
+                                                                           max_workers=max_workers)
+        return responses
+
     @class_or_instance
-    def query_region_async(self, coordinates, radius=0.2*u.deg, pagesize=None, page=None):
+    def query_region_async(self, coordinates, radius=0.2*u.deg, pagesize=None, page=None,
+                           plan=False, split=False):
         """
         Given a sky position and radius, returns a list of MAST observations.
         See column documentation `here <https://mast.stsci.edu/api/v0/_c_a_o_mfields.html>`__.
@@ -220,6 +356,16 @@ class ObservationsClass(MastQueryWithLogin):
             Default None.
             Can be used to override the default behavior of all results being returned to
             obtain a specific page of results.
+        plan : bool or 'warn', optional
+            Default False.
+            If True, the observations are counted first: queries returning more than
+            ``astroquery.mast.conf.max_rows`` observations are refused (only warned about if 'warn'),
+            and the page size and number of pages fetched concurrently are chosen from the count.
+        split : bool, optional
+            Default False.
+            If True, the observations are counted first and a query returning more than
+            ``astroquery.mast.conf.max_rows`` observations is split into declination bands,
+            queried one after another (with the columns of `query_criteria`).
 
         Returns
         -------
@@ -232,15 +378,24 @@ class ObservationsClass(MastQueryWithLogin):
         # if radius is just a number we assume degrees
         radius = coord.Angle(radius, u.deg)
 
+        max_workers = None
+        if (plan or split) and not page:
+            count = self.query_region_count(coordinates, radius)
+            if split and conf.max_rows and count > conf.max_rows:
+                return self._query_region_split(coordinates, radius, count, pagesize)
+            pagesize, max_workers = self._plan_query(count, pagesize, plan)
+
         service = 'Mast.Caom.Cone'
         params = {'ra': coordinates.ra.deg,
                   'dec': coordinates.dec.deg,
                   'radius': radius.deg}
 
-        return self._portal_api_connection.service_request_async(service, params, pagesize, page)
+        return self._portal_api_connection.service_request_async(service, params, pagesize, page,
+                                                                 max_workers=max_workers)
 
     @class_or_instance
-    def query_object_async(self, objectname, radius=0.2*u.deg, pagesize=None, page=None):
+    def query_object_async(self, objectname, radius=0.2*u.deg, pagesize=None, page=None,
+                           plan=False, split=False):
         """
         Given an object name, returns a list of MAST observations.
         See column documentation `here <https://mast.stsci.edu/api/v0/_c_a_o_mfields.html>`__.
@@ -262,6 +417,12 @@ class ObservationsClass(MastQueryWithLogin):
             Defaulte None.
             Can be used to override the default behavior of all results being returned
             to obtain a specific page of results.
+        plan : bool or 'warn', optional
+            Default False.
+            Count the observations first, see `query_region_async`.
+        split : bool, optional
+            Default False.
+            Split queries of too many observations into declination bands, see `query_region_async`.
 
         Returns
         -------
@@ -270,10 +431,10 @@ class ObservationsClass(MastQueryWithLogin):
 
         coordinates = utils.resolve_object(objectname)
 
-        return self.query_region_async(coordinates, radius, pagesize, page)
+        return self.query_region_async(coordinates, radius, pagesize, page, plan=plan, split=split)
 
     @class_or_instance
-    def query_criteria_async(self, pagesize=None, page=None, **criteria):
+    def query_criteria_async(self, pagesize=None, page=None, plan=False, **criteria):
         """
         Given an set of criteria, returns a list of MAST observations.
         Valid criteria are returned by ``get_metadata("observations")``
@@ -286,6 +447,11 @@ class ObservationsClass(MastQueryWithLogin):
         page : int, optional
             Can be used to override the default behavior of all results being returned to obtain
             one sepcific page of results.
+        plan : bool or 'warn', optional
+            Default False.
+            If True, the observations are counted first: queries returning more than
+            ``astroquery.mast.conf.max_rows`` observations are refused (only warned about if 'warn'),
+            and the page size and number of pages fetched concurrently are chosen from the count.
         **criteria
             Criteria to apply. At least one non-positional criteria must be supplied.
             Valid criteria are coordinates, objectname, radius (as in `query_region` and `query_object`),
@@ -318,7 +484,13 @@ class ObservationsClass(MastQueryWithLogin):
             params = {"columns": "*",
                       "filters": mashup_filters}
 
-        return self._portal_api_connection.service_request_async(service, params)
+        max_workers = None
+        if plan and not page:
+            count = self.query_criteria_count(**criteria)
+            pagesize, max_workers = self._plan_query(count, pagesize, plan)
+
+        return self._portal_api_connection.service_request_async(service, params, pagesize, page,
+                                                                 max_workers=max_workers)
 
     def query_region_count(self, coordinates, radius=0.2*u.deg, pagesize=None, page=None):
         """
@@ -434,17 +606,23 @@ class ObservationsClass(MastQueryWithLogin):
         return self._portal_api_connection.service_request(service, params)[0][0].astype(int)
 
     @class_or_instance
-    def get_product_list_async(self, observations):
+    def get_product_list_async(self, observations, max_workers=None):
         """
         Given a "Product Group Id" (column name obsid) returns a list of associated data products.
         See column documentation `here <https://masttest.stsci.edu/api/v0/_productsfields.html>`__.
 
+        The products are requested for ``astroquery.mast.conf.product_chunk_size`` observations at a
+        time, and the products listed for more than one observation are only returned once.
+
         Parameters
         ----------
         observations : str or `~astropy.table.Row` or list/Table of same
             Row/Table of MAST query results (e.g. output from `query_object`)
             or single/list of MAST Product Group Id(s) (obsid).
             See description `here <https://masttest.stsci.edu/api/v0/_c_a_o_mfields.html>`__.
+        max_workers : int, optional
+            Number of chunks of observations requested concurrently.
+            Defaults to ``astroquery.mast.conf.paging_workers``.
 
         Returns
         -------
@@ -459,10 +637,35 @@ class ObservationsClass(MastQueryWithLogin):
         if type(observations) == Table:
             observations = observations['obsid']
 
+        # a list may mix obsids and rows of observations
+        obsids = list(dict.fromkeys(str(obsid["obsid"] if isinstance(obsid, Row) else obsid)
+                                    for obsid in observations))
+        chunk_size = conf.product_chunk_size
+        chunks = [obsids[start:start + chunk_size] for start in range(0, len(obsids), chunk_size)] or [[]]
+
         service = 'Mast.Caom.Products'
-        params = {'obsid': ','.join(observations)}
+        portal = self._portal_api_connection
+
+        def request_chunk(chunk):
+            # the chunks are the unit of concurrency, their pages are fetched one after another
+            paging_workers = 1 if len(chunks) > 1 else None
+            return portal.service_request_async(service, {'obsid': ','.join(chunk)},
+                                                max_workers=paging_workers)
+
+        # the first chunk also fetches the columns config of the service
+        responses = request_chunk(chunks[0])
+
+        max_workers = min(max_workers or portal.PAGING_WORKERS, len(chunks) - 1)
+        if max_workers > 1:
+            portal._grow_connection_pool(max_workers)
+            with ThreadPoolExecutor(max_workers) as pool:
+                for chunk_responses in pool.map(request_chunk, chunks[1:]):
+                    responses += chunk_responses
+        else:
+            for chunk in chunks[1:]:
+                responses += request_chunk(chunk)
 
-        return self._portal_api_connection.service_request_async(service, params)
+        return responses
 
     def filter_products(self, products, mrp_only=False, extension=None, **filters):
         """
@@ -558,7 +761,7 @@ class ObservationsClass(MastQueryWithLogin):
             local_path = os.path.join(os.path.abspath('.'), filename)
 
         # recreate the data_product key for cloud connection check
-        data_product = {'dataURI': data_url}
+        data_product = {'dataURI': uri}
 
         status = "COMPLETE"
         msg = None
@@ -600,6 +803,10 @@ class ObservationsClass(MastQueryWithLogin):
         """
         Takes an `~astropy.table.Table` of data products and downloads them into the directory given by base_dir.
 
+        The products are downloaded concurrently (see `~astroquery.mast.MastQueryWithLogin._download_many`),
+        and the completed downloads recorded in a manifest file in base_dir, so that an interrupted download
+        resumes with the products that were not downloaded yet.
+
         Parameters
         ----------
         products : `~astropy.table.Table`
@@ -618,7 +825,10 @@ class ObservationsClass(MastQueryWithLogin):
         response : `~astropy.table.Table`
         """
 
-        manifest_array = []
+        base_url = self._portal_api_connection.MAST_DOWNLOAD_URL
+
+        downloads = []
+        cloud_products = dict()
         for data_product in products:
 
             # create the local file download path
@@ -627,15 +837,33 @@ class ObservationsClass(MastQueryWithLogin):
                 os.makedirs(local_path)
             local_path = os.path.join(local_path, data_product['productFilename'])
 
-            # download the files
-            status, msg, url = self.download_file(data_product["dataURI"], local_path=local_path,
-                                                  cache=cache, cloud_only=cloud_only)
+            download = functools.partial(self.download_file, data_product["dataURI"], local_path=local_path,
+                                         cache=cache, cloud_only=cloud_only)
+            downloads.append((local_path, base_url + "?uri=" + data_product["dataURI"], download))
 
-            manifest_array.append([local_path, status, msg, url])
+            if self._cloud_connection is not None and self._cloud_connection.is_supported(data_product):
+                cloud_products[local_path] = data_product
 
-        manifest = Table(rows=manifest_array, names=('Local Path', 'Status', 'Message', "URL"))
+        def lookup_cloud_products(pending):
+            # looking the products to download up in the cloud in one pass
+            pending_products = [cloud_products[local_path] for local_path, _, _ in pending
+                                if local_path in cloud_products]
+            if pending_products:
+                self._cloud_connection.lookup_products(pending_products)
 
-        return manifest
+        def download_host(local_path, url):
+            # the products found in the cloud are not downloaded from MAST
+            data_product = cloud_products.get(local_path)
+            if data_product is not None and self._cloud_connection._remembered_lookup(data_product) is not None:
+                return None
+            return urlparse(url).netloc
+
+        if not os.path.exists(base_dir):
+            os.makedirs(base_dir)
+
+        return self._download_many(downloads, os.path.join(base_dir, DOWNLOAD_MANIFEST), cache=cache,
+                                   prepare=lookup_cloud_products if cloud_products else None,
+                                   host=download_host)
 
     def _download_curl_script(self, products, out_dir):
         """
@@ -719,11 +947,7 @@ class ObservationsClass(MastQueryWithLogin):
                 products = [products]
 
             # collect list of products
-            product_lists = []
-            for oid in products:
-                product_lists.append(self.get_product_list(oid))
-
-            products = vstack(product_lists)
+            products = self.get_product_list(products)
 
         # apply filters
         products = self.filter_products(products, mrp_only, **filters)
@@ -12,6 +12,8 @@ import warnings
 
 import numpy as np
 
+from requests import HTTPError
+
 from astropy.table import Table, Column, MaskedColumn
 
 from ..query import BaseQuery
@@ -92,6 +94,19 @@ def _json_to_table(json_obj):
     return data_table
 
 
+def _raise_status(index, response):
+    """
+    Replace a response with an error status by its `~requests.HTTPError`,
+    in an ``(index, response)`` pair of `ServiceAPI.service_request_many`.
+    """
+    if not isinstance(response, Exception):
+        try:
+            response.raise_for_status()
+        except HTTPError as err:
+            return index, err
+    return index, response
+
+
 @async_to_sync
 class ServiceAPI(BaseQuery):
     """
@@ -236,6 +251,63 @@ class ServiceAPI(BaseQuery):
         -------
         response : list of `~requests.Response`
         """
+        request_url, catalogs_request, headers = self._prepare_service_request(service, params, page_size,
+                                                                               page, **kwargs)
+        response = self._request('POST', request_url, data=catalogs_request, headers=headers)
+        return response
+
+    def service_request_many(self, service, params_list, max_workers=None, as_completed=False):
+        """
+        Builds and excecutes many requests to a MAST fabric service concurrently.
+
+        Identical requests are only sent once.
+
+        Parameters
+        ----------
+        service : str
+           The MAST service to query. Should be present in self.SERVICES
+        params_list : list of dict
+           The service parameters of each request (see `service_request_async`).
+        max_workers : int, optional
+           Number of requests sent concurrently. Defaults to ``astroquery.request_conf.max_workers``.
+        as_completed : bool, optional
+           If True, return an iterator of ``(index, response)`` pairs in the order the responses
+           arrive, so that each response can be processed and released in turn.
+
+        Returns
+        -------
+        response : list
+            The `~requests.Response` of each request, or the exception it raised (including
+            `~requests.HTTPError` for an error status), in the order of ``params_list``, or an
+            iterator of ``(index, response)`` if ``as_completed`` is True.
+        """
+        queries = []
+        for params in params_list:
+            request_url, catalogs_request, headers = self._prepare_service_request(service, dict(params))
+            queries.append(dict(method='POST', url=request_url, data=catalogs_request, headers=headers,
+                                timeout=self.TIMEOUT))
+
+        responses = self._request_many(queries, cache=False, max_workers=max_workers,
+                                       as_completed=True, return_exceptions=True)
+        responses = (_raise_status(index, response) for index, response in responses)
+        if as_completed:
+            return responses
+
+        ordered = [None] * len(queries)
+        for index, response in responses:
+            ordered[index] = response
+        return ordered
+
+    def _prepare_service_request(self, service, params, page_size=None, page=None, **kwargs):
+        """
+        Builds the URL, data and headers of a MAST fabric service request
+        (see `service_request_async` for the parameters).
+
+        Returns
+        -------
+        response : tuple
+            The request URL, the request data as a list of tuples and the request headers.
+        """
         service_config = self.SERVICES.get(service.lower())
         service_url = service_config.get('path')
         compiled_service_args = {}
@@ -269,8 +341,7 @@ class ServiceAPI(BaseQuery):
         for prop, value in kwargs.items():
             params[prop] = value
         catalogs_request.extend(self._build_catalogs_params(params))
-        response = self._request('POST', request_url, data=catalogs_request, headers=headers)
-        return response
+        return request_url, catalogs_request, headers
 
     def _build_catalogs_params(self, params):
         """
@@ -1,24 +1,33 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 from __future__ import print_function
 
+import functools
+import json
 import os
 import re
+import threading
+import time
+import zipfile
 
+from io import BytesIO
 from shutil import copyfile
+from urllib.parse import urlparse
 
-from astropy.table import Table
+from astropy.table import Table, vstack
 from astropy.tests.helper import pytest
-from astropy.coordinates import SkyCoord
+from astropy.coordinates import Angle, SkyCoord
 from astropy.io import fits
 from astropy.tests.helper import catch_warnings
 from astropy.utils.exceptions import AstropyDeprecationWarning
 
 import astropy.units as u
+import numpy as np
 
 from ...utils.testing_tools import MockResponse
-from ...exceptions import (InvalidQueryError, InputWarning)
+from ...exceptions import (InvalidQueryError, InputWarning, MaxResultsWarning, NoResultsWarning,
+                           ResolverError)
 
-from ... import mast
+from ... import mast, query
 
 DATA_FILES = {'Mast.Caom.Cone': 'caom.json',
               'Mast.Name.Lookup': 'resolver.json',
@@ -64,6 +73,8 @@ def patch_post(request):
 
     mp.setattr(mast.utils, '_simple_request', resolver_mockreturn)
     mp.setattr(mast.discovery_portal.PortalAPI, '_request', post_mockreturn)
+    # not reading or saving column configs in the user's cache
+    mp.setattr(mast.discovery_portal.PortalAPI, 'cache_backend', None)
     mp.setattr(mast.services.ServiceAPI, '_request', service_mockreturn)
     mp.setattr(mast.auth.MastAuth, 'session_info', session_info_mockreturn)
 
@@ -192,6 +203,162 @@ def test_mast_service_request(patch_post):
     assert isinstance(result, Table)
 
 
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_portal_paging(monkeypatch, max_workers):
+    lock = threading.Lock()
+    requests = []
+    active = [0, 0]  # current, peak
+
+    def page_mockreturn(self, method, url, data=None, **kwargs):
+        page = int(re.search(r"page%22%3A%20(\d+)%2C", data).group(1))
+        with lock:
+            requests.append(page)
+            active[0] += 1
+            active[1] = max(active)
+            # page 3 is still executing at the first request
+            status = "EXECUTING" if requests.count(page) == 1 and page == 3 else "COMPLETE"
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        result = {'status': status, 'paging': {'page': page, 'pagesFiltered': 6},
+                  'fields': [{'name': 'page', 'type': 'int'}], 'data': [{'page': page}]}
+        return MockResponse(json.dumps(result).encode('utf-8'))
+
+    monkeypatch.setattr(mast.discovery_portal.BaseQuery, '_request', page_mockreturn)
+    portal = mast.discovery_portal.PortalAPI()
+    data = mast.discovery_portal._prepare_service_request_string(
+        {'service': 'Mast.Caom.Cone', 'params': {}, 'format': 'json', 'pagesize': 1, 'page': 1})
+    responses = portal._request("POST", portal.MAST_REQUEST_URL, data=data, max_workers=max_workers)
+
+    assert [response.json()['paging']['page'] for response in responses] == [1, 2, 3, 4, 5, 6]
+    assert sorted(requests) == [1, 2, 3, 3, 4, 5, 6]
+    assert requests[0] == 1
+    assert (active[1] > 1) == (max_workers > 1)
+    assert list(portal._parse_result(responses)['page']) == [1, 2, 3, 4, 5, 6]
+
+    # a single page
+    requests[:] = []
+    responses = portal._request("POST", portal.MAST_REQUEST_URL, data=data, retrieve_all=False)
+    assert len(responses) == 1
+    assert requests == [1]
+
+
+@pytest.mark.parametrize('datafile', ['caom.json', 'tic.json', 'hsc.json'])
+def test_portal_parse_pages(datafile):
+    with open(data_path(datafile), 'rb') as f:
+        result = json.loads(f.read().decode('utf-8'))
+
+    # splitting the rows into pages, the last ones with longer strings
+    pagesize = 3
+    data = result['data']
+    for row in data[2 * pagesize:]:
+        for key, value in row.items():
+            if isinstance(value, str):
+                row[key] = value + " (longer)"
+    pages = []
+    for start in range(0, len(data), pagesize):
+        page = dict(result, data=data[start:start + pagesize],
+                    paging={'page': start // pagesize + 1, 'rowsFiltered': len(data),
+                            'pagesFiltered': (len(data) + pagesize - 1) // pagesize})
+        pages.append(MockResponse(json.dumps(page).encode('utf-8')))
+
+    portal = mast.discovery_portal.PortalAPI()
+    expected = vstack([mast.discovery_portal._json_to_table(response.json()) for response in pages])
+    parsed = portal._parse_result(pages)
+    assert parsed.colnames == expected.colnames
+    assert len(parsed) == len(expected) == len(data)
+    for col in expected.colnames:
+        assert parsed[col].dtype == expected[col].dtype
+        np.testing.assert_array_equal(parsed[col].mask, expected[col].mask)
+        np.testing.assert_array_equal(parsed[col].filled(), expected[col].filled())
+
+    assert len(portal._parse_result(iter(pages))) == len(data)
+
+    tables = list(portal.iter_tables(iter(pages)))
+    assert [len(table) for table in tables] == [len(page.json()['data']) for page in pages]
+
+
+def test_json_to_table():
+    fields = [{'name': 'name', 'type': 'string'}, {'name': 'ra', 'type': 'float'},
+              {'name': 'objid', 'type': 'long'}, {'name': 'flag', 'type': 'boolean'},
+              {'name': '_selected_', 'type': 'boolean'}]
+    data = [{'name': 'a', 'ra': 1.5, 'objid': 1, 'flag': True, '_selected_': None},
+            {'name': None, 'ra': None, 'objid': None, 'flag': None, '_selected_': None},
+            {'name': 'None', 'ra': 2, 'objid': 3, 'flag': False, '_selected_': None}]
+    table = mast.discovery_portal._json_to_table({'fields': fields, 'data': data})
+
+    assert table.colnames == ['name', 'ra', 'objid', 'flag']
+    assert table['name'].dtype == np.dtype('<U4')
+    assert list(table['name'].data.data) == ['a', '', 'None']
+    assert list(table['name'].mask) == [False, True, False]
+    assert table['ra'].dtype == np.float64
+    assert np.isnan(table['ra'][1])
+    assert table['ra'][2] == 2.0
+    assert table['objid'].dtype == np.int64
+    assert list(table['objid'].data.data) == [1, -999, 3]
+    assert list(table['objid'].mask) == [False, True, False]
+    assert table['flag'].dtype == bool
+
+    # rows lacking some of the columns, and the ignore values of the column config
+    del data[0]['objid']
+    table = mast.discovery_portal._json_to_table({'fields': fields, 'data': data},
+                                                 {'name': {'ignoreValue': 'None'}})
+    assert list(table['name'].mask) == [False, True, True]
+    assert list(table['objid'].data.data) == [-999, -999, 3]
+
+    table = mast.discovery_portal._json_to_table({'fields': fields, 'data': []})
+    assert table.colnames == ['name', 'ra', 'objid', 'flag']
+    assert len(table) == 0
+
+
+class FakeTime(object):
+    """A time module running ``offset`` seconds ahead."""
+
+    def __init__(self, offset):
+        self.offset = offset
+
+    def time(self):
+        return time.time() + self.offset
+
+
+def test_portal_col_config_cache(monkeypatch, tmpdir):
+    requests = []
+
+    def counting_mockreturn(self, method="POST", url=None, data=None, timeout=10, **kwargs):
+        requests.append(url)
+        return post_mockreturn(self, method, url, data, timeout, **kwargs)
+
+    monkeypatch.setattr(mast.discovery_portal.PortalAPI, '_request', counting_mockreturn)
+
+    def get_col_config():
+        portal = mast.discovery_portal.PortalAPI()
+        portal.cache_location = str(tmpdir)
+        portal._get_col_config("Mast.Catalogs.Tess.Cone", "Mast.Catalogs.Tess.Cone")
+        return portal._column_configs["Mast.Catalogs.Tess.Cone"]
+
+    # the columnsconfig and histogram requests are only made by the first session
+    col_config = get_col_config()
+    assert len(requests) == 2
+    assert 'min' in col_config['Bmag'] and 'hist' not in col_config['Bmag']
+    assert get_col_config() == col_config
+    assert len(requests) == 2
+
+    # expired entries and those of other versions are fetched again
+    with mast.conf.set_temp('col_config_timeout', 60):
+        monkeypatch.setattr(mast.discovery_portal, 'time', FakeTime(61))
+        get_col_config()
+        assert len(requests) == 4
+        monkeypatch.setattr(mast.discovery_portal, 'time', FakeTime(59))
+        get_col_config()
+        assert len(requests) == 4
+    monkeypatch.setattr(mast.discovery_portal, 'time', time)
+    monkeypatch.setattr(mast.discovery_portal.version, 'version', 'other')
+    get_col_config()
+    assert len(requests) == 6
+    get_col_config()
+    assert len(requests) == 6
+
+
 def test_resolve_object(patch_post):
     m103_loc = mast.Mast.resolve_object("M103")
     print(m103_loc)
@@ -316,6 +483,73 @@ def test_observations_query_criteria_count(patch_post):
     assert "one of objectname and coordinates" in str(invalid_query.value)
 
 
+def test_observations_query_plan(patch_post):
+    portal = mast.Observations._portal_api_connection
+    request_async = portal.service_request_async
+    calls = []
+
+    def service_request_async(service, params, pagesize=None, page=None, max_workers=None, **kwargs):
+        if params.get('columns') != "COUNT_BIG(*)":
+            calls.append((service, pagesize, max_workers))
+        return request_async(service, params, pagesize, page, max_workers=max_workers, **kwargs)
+
+    patch_post.setattr(portal, 'service_request_async', service_request_async)
+    patch_post.setattr(portal, 'PAGESIZE', 50000)
+    patch_post.setattr(portal, 'PAGING_WORKERS', 4)
+
+    # the 599 observations fit in one page
+    mast.Observations.query_region_async(regionCoords, radius=0.2, plan=True)
+    assert calls[-1][1:] == (599, 1)
+
+    # larger queries are spread over enough pages for the paging workers
+    assert mast.Observations._plan_query(60000) == (12000, 4)
+    assert mast.Observations._plan_query(240000) == (48000, 4)
+    assert mast.Observations._plan_query(7000) == (3500, 1)
+    assert mast.Observations._plan_query(0) == (1, 1)
+    assert mast.Observations._plan_query(60000, pagesize=25000) == (25000, 2)
+
+    with mast.conf.set_temp('max_rows', 500):
+        with pytest.raises(InvalidQueryError) as invalid_query:
+            mast.Observations.query_criteria_async(proposal_pi="Ost*", plan=True)
+        assert "more than mast.conf.max_rows" in str(invalid_query.value)
+
+        with pytest.warns(MaxResultsWarning):
+            mast.Observations.query_criteria_async(proposal_pi="Ost*", plan='warn')
+        assert calls[-1] == ("Mast.Caom.Filtered", 599, 1)
+
+    # without planning nothing is counted
+    mast.Observations.query_region_async(regionCoords, radius=0.2)
+    assert calls[-1][1:] == (None, None)
+
+
+def test_observations_query_split(patch_post):
+    # observations spread evenly in declination over the cone
+    decs = np.linspace(regionCoords.dec.deg - 0.2, regionCoords.dec.deg + 0.2, 1000)
+    counts = []
+
+    def query_criteria_count(coordinates, radius, s_dec):
+        counts.append(s_dec)
+        return int(((decs >= s_dec[0]) & (decs <= s_dec[1])).sum())
+
+    patch_post.setattr(mast.Observations, 'query_region_count', lambda *args: len(decs))
+    patch_post.setattr(mast.Observations, 'query_criteria_count', query_criteria_count)
+
+    with mast.conf.set_temp('max_rows', 300):
+        bands = mast.Observations._split_cone(regionCoords, Angle(0.2, u.deg), len(decs))
+        assert len(bands) == 4
+        assert all(count <= 300 for _, _, count in bands)
+        assert sum(count for _, _, count in bands) == len(decs)
+        assert bands[0][0] == -90 and bands[-1][1] == 90
+        # the bands do not overlap
+        assert all(low[1] < high[0] for low, high in zip(bands[:-1], bands[1:]))
+
+        responses = mast.Observations.query_region_async(regionCoords, radius=0.2, split=True)
+        assert len(responses) == 4
+
+    result = mast.Observations._parse_result(responses)
+    assert isinstance(result, Table)
+
+
 # product functions
 def test_observations_get_product_list_async(patch_post):
     responses = mast.Observations.get_product_list_async('2003738726')
@@ -347,6 +581,37 @@ def test_observations_get_product_list(patch_post):
     assert isinstance(result, Table)
 
 
+def test_observations_get_product_list_chunks(patch_post):
+    requested = []
+
+    def products_mockreturn(self, method="POST", url=None, data=None, **kwargs):
+        match = re.search(r"obsid%22%3A%20%22([\d%C]*)%22", data)
+        if "Mast.Caom.Products" in data and match:
+            requested.append(match.group(1).split('%2C'))
+        return post_mockreturn(self, method, url, data, **kwargs)
+
+    patch_post.setattr(mast.discovery_portal.PortalAPI, '_request', products_mockreturn)
+
+    single = mast.Observations.get_product_list('2003738726')
+    assert len(requested) == 1
+
+    # the unique obsids are requested in chunks, every chunk listing the same products
+    del requested[:]
+    obsids = ['1', '2', '3', '1', '4', '5']
+    with mast.conf.set_temp('product_chunk_size', 2):
+        result = mast.Observations.get_product_list(obsids)
+    assert sorted(requested) == [['1', '2'], ['3', '4'], ['5']]
+    assert len(result) == len(single)
+    assert list(result['productFilename']) == list(single['productFilename'])
+
+    # rows of observations, possibly mixed with obsids, are requested by obsid
+    del requested[:]
+    observations = Table({'obsid': ['6', '7']})
+    result = mast.Observations.get_product_list([observations[0], '8', observations[1]])
+    assert requested == [['6', '8', '7']]
+    assert len(result) == len(single)
+
+
 def test_observations_filter_products(patch_post):
     products = mast.Observations.get_product_list('2003738726')
     result = mast.Observations.filter_products(products,
@@ -373,6 +638,26 @@ def test_observations_download_products(patch_post, tmpdir):
     assert isinstance(result, Table)
 
 
+def test_observations_download_products_rows(patch_post, tmpdir):
+    requested = []
+
+    def products_mockreturn(self, method="POST", url=None, data=None, **kwargs):
+        match = re.search(r"obsid%22%3A%20%22([\d%C]*)%22", data)
+        if "Mast.Caom.Products" in data and match:
+            requested.append(match.group(1).split('%2C'))
+        return post_mockreturn(self, method, url, data, **kwargs)
+
+    patch_post.setattr(mast.discovery_portal.PortalAPI, '_request', products_mockreturn)
+
+    observations = mast.Observations.query_object("M8", radius=".04 deg")
+    result = mast.Observations.download_products([observations[0], observations[1]],
+                                                 download_dir=str(tmpdir),
+                                                 productType=["SCIENCE"])
+    assert isinstance(result, Table)
+    assert len(result) == 7
+    assert requested == [[str(observations[0]['obsid']), str(observations[1]['obsid'])]]
+
+
 def test_observations_download_file(patch_post, tmpdir):
     # pull a single data product
     products = mast.Observations.get_product_list('2003738726')
@@ -383,6 +668,177 @@ def test_observations_download_file(patch_post, tmpdir):
     assert result == ('COMPLETE', None, None)
 
 
+def test_mast_relative_paths(monkeypatch):
+    lookups = []
+
+    def path_lookup(url, params):
+        lookups.append(list(params['uri']))
+        paths = {uri: {'path': '/hst/public/' + uri.split('/')[-1]}
+                 for uri in params['uri'] if 'missing' not in uri}
+        return MockResponse(json.dumps(paths).encode())
+
+    monkeypatch.setattr(mast.utils, '_simple_request', path_lookup)
+
+    uris = ['mast:HST/product/f{}.fits'.format(i) for i in range(5)]
+    paths = mast.utils.mast_relative_paths(uris + uris[:2] + ['mast:HST/product/missing.fits'],
+                                           chunk_size=2)
+
+    # each unique uri is looked up once, in chunks
+    assert lookups == [uris[:2], uris[2:4], [uris[4], 'mast:HST/product/missing.fits']]
+    assert paths[0] == paths[5] == '/hst/public/f0.fits'
+    assert paths[-1] is None
+    assert mast.utils.mast_relative_path(uris[3]) == '/hst/public/f3.fits'
+
+
+def test_observations_download_resume(patch_post, tmpdir):
+    lock = threading.Lock()
+    downloaded = []
+    active = [0, 0]  # current, peak
+
+    def download_file_mockreturn(uri, local_path=None, cache=True, cloud_only=False):
+        with lock:
+            downloaded.append(uri)
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.01)
+        with open(local_path, 'w') as f:
+            f.write(uri)
+        with lock:
+            active[0] -= 1
+        if uri.endswith('failed'):
+            return 'ERROR', 'HTTPError', uri
+        return 'COMPLETE', None, None
+
+    patch_post.setattr(mast.Observations, 'download_file', download_file_mockreturn)
+
+    products = Table({'obs_collection': ['HST'] * 8,
+                      'obs_id': ['obs{}'.format(i % 3) for i in range(8)],
+                      'productFilename': ['file{}.fits'.format(i) for i in range(8)],
+                      'dataURI': ['mast:HST/product/file{}'.format(i) for i in range(7)]
+                      + ['mast:HST/product/failed']})
+    base_dir = str(tmpdir.join('mastDownload'))
+
+    with mast.conf.set_temp('download_workers', 3):
+        manifest = mast.Observations._download_files(products, base_dir)
+    assert list(manifest['Local Path']) == [os.path.join(base_dir, 'HST', obs_id, filename) for obs_id, filename
+                                            in zip(products['obs_id'], products['productFilename'])]
+    assert list(manifest['Status']) == ['COMPLETE'] * 7 + ['ERROR']
+    assert sorted(downloaded) == sorted(products['dataURI'])
+    assert 1 < active[1] <= 3
+
+    # resuming downloads only the failed and modified products
+    del downloaded[:]
+    with open(manifest['Local Path'][2], 'a') as f:
+        f.write('truncated')
+    manifest = mast.Observations._download_files(products, base_dir)
+    assert list(manifest['Status']) == ['COMPLETE'] * 7 + ['ERROR']
+    assert sorted(downloaded) == ['mast:HST/product/failed', 'mast:HST/product/file2']
+
+    del downloaded[:]
+    mast.Observations._download_files(products, base_dir, cache=False)
+    assert len(downloaded) == 8
+
+
+def test_download_many_hosts(tmpdir):
+    lock = threading.Lock()
+    active = {'mast': [0, 0], 'cloud': [0, 0]}  # current, peak
+    progress_hidden = []
+
+    def download(local_path, source):
+        with lock:
+            active[source][0] += 1
+            active[source][1] = max(active[source])
+            progress_hidden.append(query.suspend_progress.active())
+        time.sleep(0.02)
+        with open(local_path, 'w') as f:
+            f.write(source)
+        with lock:
+            active[source][0] -= 1
+        return 'COMPLETE', None, None
+
+    downloads = []
+    for i in range(8):
+        local_path = str(tmpdir.join('file{}'.format(i)))
+        source = 'cloud' if i % 2 else 'mast'
+        downloads.append((local_path, 'https://mast.stsci.edu/api/v0.1/Download/file?uri=' + source,
+                          functools.partial(download, local_path, source)))
+
+    def download_host(local_path, url):
+        # the products found in the cloud are not downloaded from MAST
+        return None if url.endswith('cloud') else urlparse(url).netloc
+
+    manifest = mast.Observations._download_many(downloads, str(tmpdir.join('manifest.json')), max_workers=4,
+                                                max_per_host=1, host=download_host)
+    assert list(manifest['Status']) == ['COMPLETE'] * 8
+    assert active['mast'][1] == 1
+    assert active['cloud'][1] > 1
+    # the progress bars of concurrent downloads are hidden
+    assert progress_hidden == [True] * 8
+    assert not query.suspend_progress.active()
+
+
+class MockClientError(Exception):
+
+    def __init__(self, code):
+        super(MockClientError, self).__init__(code)
+        self.response = {'Error': {'Code': code}}
+
+
+class MockS3Client(object):
+
+    def __init__(self):
+        self.downloaded = []
+
+    def head_object(self, Bucket, Key, RequestPayer):
+        if 'forbidden' in Key:
+            raise MockClientError('403')
+        return {'ContentLength': 5}
+
+    def download_file(self, bucket, path, local_path, ExtraArgs, Callback, Config):
+        self.downloaded.append(path)
+        with open(local_path, 'w') as f:
+            f.write('cloud')
+        Callback(5)
+
+
+def test_observations_download_cloud_errors(patch_post, tmpdir):
+    # a cloud connection to a mock S3 bucket, without boto3
+    cloud = mast.cloud.CloudAccess.__new__(mast.cloud.CloudAccess)
+    cloud.supported_missions = ["mast:hst/product"]
+    cloud.pubdata_bucket = "stpubdata"
+    cloud.botocore = type('botocore', (), {'exceptions': type('exceptions', (), {'ClientError': MockClientError})})
+    cloud._s3_client = MockS3Client()
+    cloud._client_lock = threading.Lock()
+    cloud.transfer_config = None
+    cloud._lookups = dict()
+
+    def relative_paths(uris):
+        return [None if 'malformed' in uri else '/hst/public/' + uri.split('/')[-1] for uri in uris]
+
+    fallback = []
+
+    def download_mast(url, local_path, **kwargs):
+        fallback.append(url.split('=')[-1])
+        with open(local_path, 'w') as f:
+            f.write('mast')
+
+    patch_post.setattr(mast.utils, 'mast_relative_paths', relative_paths)
+    patch_post.delattr(mast.Observations, 'download_file')
+    patch_post.setattr(mast.Observations, '_download_file', download_mast)
+    patch_post.setattr(mast.Observations, '_cloud_connection', cloud)
+
+    uris = ['mast:HST/product/{}.fits'.format(name) for name in ('good', 'malformed', 'forbidden', 'other')]
+    products = Table({'obs_collection': ['HST'] * 4,
+                      'obs_id': ['obs'] * 4,
+                      'productFilename': [uri.split('/')[-1] for uri in uris],
+                      'dataURI': uris})
+    manifest = mast.Observations.download_products(products, download_dir=str(tmpdir))
+
+    # the products that cannot be looked up in the cloud are downloaded from MAST
+    assert list(manifest['Status']) == ['COMPLETE'] * 4
+    assert sorted(cloud._s3_client.downloaded) == ['hst/public/good.fits', 'hst/public/other.fits']
+    assert sorted(fallback) == [uris[2], uris[1]]
+
 ######################
 # CatalogClass tests #
 ######################
@@ -592,6 +1048,8 @@ def test_tesscut_download_cutouts(patch_post, tmpdir):
     assert len(manifest) == 1
     assert manifest["Local Path"][0][-4:] == "fits"
     assert os.path.isfile(manifest[0]['Local Path'])
+    # the zip is inflated without being saved
+    assert not tmpdir.listdir('*.zip')
 
     # Testing without inflate
     manifest = mast.Tesscut.download_cutouts(coordinates=coord, size=5,
@@ -622,3 +1080,75 @@ def test_tesscut_get_cutouts(patch_post, tmpdir):
     assert isinstance(cutout_hdus_list, list)
     assert len(cutout_hdus_list) == 1
     assert isinstance(cutout_hdus_list[0], fits.HDUList)
+
+
+def test_tesscut_parse_cutout_zip():
+    with open(data_path(DATA_FILES['tess_cutout']), 'rb') as f:
+        deflated = f.read()
+    with zipfile.ZipFile(BytesIO(deflated)) as zip_ref:
+        name = zip_ref.namelist()[0]
+        stored = BytesIO()
+        with zipfile.ZipFile(stored, 'w', zipfile.ZIP_STORED) as stored_ref:
+            stored_ref.writestr(name, zip_ref.read(name))
+
+    # stored and compressed target pixel files are opened alike
+    expected, cutout = [mast.cutouts._parse_cutout_zip(MockResponse(content))[0]
+                        for content in (deflated, stored.getvalue())]
+    assert cutout.filename == expected.filename == name
+    assert len(cutout) == len(expected)
+    np.testing.assert_array_equal(cutout[1].data['FLUX'], expected[1].data['FLUX'])
+
+
+def test_tesscut_get_cutouts_batch(patch_post):
+    requests_sent = []
+
+    def request_mockreturn(method, url, data=None, **kwargs):
+        params = dict(data)
+        requests_sent.append(params)
+        if params['ra'] == 0:
+            raise ConnectionError("unreachable")
+        if params['dec'] > 80:
+            return MockResponse(b'{"msg": "No results"}')
+        if params['dec'] == 5:
+            return MockResponse(b'not a zip')
+        return tesscut_get_mockreturn(method, url, data)
+
+    patch_post.setattr(mast.Tesscut._service_api_connection._session, 'request', request_mockreturn)
+
+    coords = SkyCoord([107.27, 0, 107.27, 10], [-70.0, 0, -70.0, 85], unit="deg")
+    with pytest.warns(NoResultsWarning):
+        cutouts = mast.Tesscut.get_cutouts_batch(coordinates=coords, size=5, sector=1)
+    assert [len(hdus) for hdus in cutouts] == [1, 0, 1, 0]
+    assert isinstance(cutouts[2][0], fits.HDUList)
+    assert cutouts[0][0].filename == cutouts[2][0].filename
+
+    # the repeated target is requested once
+    # the requests are sent concurrently, in any order
+    assert len(requests_sent) == 3
+    assert {'x': 5, 'y': 5, 'units': 'px', 'ra': 107.27, 'dec': -70.0, 'sector': 1} in requests_sent
+    assert sorted(params['ra'] for params in requests_sent) == [0, 10, 107.27]
+
+    # tables of targets and object names
+    cutouts = mast.Tesscut.get_cutouts_batch(coordinates=Table({'ra': [107.27], 'dec': [-70.0]}))
+    assert len(cutouts) == 1 and len(cutouts[0]) == 1
+    cutouts = mast.Tesscut.get_cutouts_batch(objectnames=["M103", "M103"])
+    assert [len(hdus) for hdus in cutouts] == [1, 1]
+
+    # a target that cannot be resolved or parsed only fails on its own
+    def resolve_mockreturn(objectname):
+        if objectname == "nothing":
+            raise ResolverError("Could not resolve nothing to a sky position.")
+        return resolve_object(objectname)
+
+    resolve_object = mast.cutouts.resolve_object
+    patch_post.setattr(mast.cutouts, 'resolve_object', resolve_mockreturn)
+    with pytest.warns(NoResultsWarning, match=r'Could not resolve target 0 \(nothing\)'):
+        cutouts = mast.Tesscut.get_cutouts_batch(objectnames=["nothing", "M103"])
+    assert [len(hdus) for hdus in cutouts] == [0, 1]
+    with pytest.warns(NoResultsWarning, match='Cutout request of target 1 failed'):
+        cutouts = mast.Tesscut.get_cutouts_batch(coordinates=SkyCoord([107.27, 10], [-70.0, 5], unit="deg"))
+    assert [len(hdus) for hdus in cutouts] == [1, 0]
+    assert mast.Tesscut.get_cutouts_batch(coordinates=[]) == []
+
+    with pytest.raises(InvalidQueryError):
+        mast.Tesscut.get_cutouts_batch()
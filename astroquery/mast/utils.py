@@ -168,9 +168,39 @@ def mast_relative_path(mast_uri):
         The associated relative path.
     """
 
-    response = _simple_request("https://mast.stsci.edu/api/v0.1/path_lookup/",
-                               {"uri": mast_uri})
-    result = response.json()
-    uri_result = result.get(mast_uri)
+    return mast_relative_paths([mast_uri])[0]
+
+
+def mast_relative_paths(mast_uris, chunk_size=50):
+    """
+    Given MAST dataURIs, return the associated relative paths.
+
+    The paths are looked up ``chunk_size`` dataURIs at a time (keeping the request URLs short enough).
+
+    Parameters
+    ----------
+    mast_uris : list of str
+        The MAST uris.
+    chunk_size : int
+        Number of uris looked up per request.
+
+    Returns
+    -------
+    response : list
+        The associated relative paths, or None for unknown uris.
+    """
+
+    mast_uris = list(mast_uris)
+    unique_uris = list(dict.fromkeys(mast_uris))
+
+    paths = dict()
+    for start in range(0, len(unique_uris), chunk_size):
+        chunk = unique_uris[start:start + chunk_size]
+        response = _simple_request("https://mast.stsci.edu/api/v0.1/path_lookup/",
+                                   {"uri": chunk})
+        result = response.json()
+        for mast_uri in chunk:
+            uri_result = result.get(mast_uri)
+            paths[mast_uri] = uri_result["path"] if uri_result else None
 
-    return uri_result["path"]
+    return [paths[mast_uri] for mast_uri in mast_uris]
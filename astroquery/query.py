@@ -2,8 +2,15 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 import abc
+import asyncio
+import collections
+import collections.abc
+import concurrent.futures
+import functools
 import inspect
-import pickle
+import itertools
+import threading
+import weakref
 import getpass
 import hashlib
 import keyring
@@ -11,29 +18,224 @@ import io
 import os
 import requests
 
+try:
+    import contextvars
+except ImportError:  # Python 3.6
+    contextvars = None
+
 import six
+from six.moves.urllib.parse import urlparse
 from astropy.config import paths
 from astropy.logger import log
 import astropy.units as u
 from astropy.utils.console import ProgressBarOrSpinner
 import astropy.utils.data
 
-from . import version
+from . import version, request_conf
 from .utils import system_tools
+from .utils.cache import FileCache
 
-__all__ = ['BaseQuery', 'QueryWithLogin']
-
-
-def to_cache(response, cache_file):
-    log.debug("Caching data to {0}".format(cache_file))
-    with open(cache_file, "wb") as f:
-        pickle.dump(response, f)
+__all__ = ['AstroQuery', 'BaseQuery', 'QueryWithLogin']
 
 
 def _replace_none_iterable(iterable):
     return tuple('' if i is None else i for i in iterable)
 
 
+# Version of the request key schema described in `AstroQuery.hash`; bump it
+# whenever the encoding changes so that old cache entries are not reused.
+REQUEST_KEY_VERSION = 1
+_HASH_BLOCK_SIZE = 2 ** 20
+
+
+def _sorted_pairs(items):
+    try:
+        return sorted(items, key=_replace_none_iterable)
+    except TypeError:
+        # e.g. file objects, which have no ordering
+        return list(items)
+
+
+def _feed_request_key(hasher, value):
+    """
+    Feed the request key encoding of ``value`` to ``hasher``.  See
+    `AstroQuery.hash` for the encoding.
+    """
+    if value is None:
+        hasher.update(b'N')
+    elif isinstance(value, bool):
+        hasher.update(b'T' if value else b'F')
+    elif isinstance(value, six.string_types):
+        encoded = value.encode('utf-8')
+        hasher.update('S{0}:'.format(len(encoded)).encode('ascii'))
+        hasher.update(encoded)
+    elif isinstance(value, (bytes, bytearray)):
+        hasher.update('B{0}:'.format(len(value)).encode('ascii'))
+        hasher.update(value)
+    elif isinstance(value, collections.abc.Mapping):
+        items = sorted(value.items(),
+                       key=lambda item: '' if item[0] is None else str(item[0]))
+        hasher.update('D{0}:'.format(len(items)).encode('ascii'))
+        for key, item in items:
+            _feed_request_key(hasher, key)
+            _feed_request_key(hasher, item)
+    elif isinstance(value, (list, tuple)):
+        hasher.update('L{0}:'.format(len(value)).encode('ascii'))
+        for item in value:
+            _feed_request_key(hasher, item)
+    elif hasattr(value, 'read'):
+        start = value.tell() if hasattr(value, 'tell') else None
+        hasher.update(b'R')
+        while True:
+            chunk = value.read(_HASH_BLOCK_SIZE)
+            if not chunk:
+                break
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode('utf-8')
+            hasher.update('C{0}:'.format(len(chunk)).encode('ascii'))
+            hasher.update(chunk)
+        hasher.update(b'E')
+        if start is not None and hasattr(value, 'seek'):
+            value.seek(start)
+    else:
+        # numbers and other scalars
+        text = '{0}:{1!r}'.format(type(value).__name__, value).encode('utf-8')
+        hasher.update('O{0}:'.format(len(text)).encode('ascii'))
+        hasher.update(text)
+
+
+class _DeferredRequest(BaseException):
+    """
+    Raised by `BaseQuery._request` and `BaseQuery._request_many` for requests
+    that a query method run by `BaseQuery._arun` has to await.  It derives
+    from `BaseException` so that the error handling of the query method lets
+    it through.
+
+    ``key`` identifies the requests, and ``fetch`` returns an awaitable of
+    their result.
+    """
+
+    def __init__(self, key, fetch):
+        super(_DeferredRequest, self).__init__(key)
+        self.key = key
+        self.fetch = fetch
+
+
+class _RequestReplay(object):
+    """
+    The results received so far by a query method run by `BaseQuery._arun`,
+    in the order of its requests, as ``(key, result)`` pairs.
+    """
+
+    def __init__(self):
+        self.results = []
+        self.position = 0
+
+    def _replay(self, key, fetch):
+        if self.position == len(self.results):
+            raise _DeferredRequest(key, fetch)
+        recorded_key, result = self.results[self.position]
+        if recorded_key != key:
+            raise RuntimeError("The query method made a different request "
+                               "when it was run again, so its responses "
+                               "cannot be replayed.  Coroutine queries "
+                               "require the requests of a query method to "
+                               "only depend on its arguments and on the "
+                               "previous responses.")
+        self.position += 1
+        return result
+
+    def request(self, query_obj, query, kwargs):
+        def fetch():
+            return query_obj._arequest(query.method, query.url, **kwargs)
+
+        result = self._replay(('request', query.hash()), fetch)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def request_many(self, query_obj, queries, kwargs, as_completed,
+                     return_exceptions):
+        keys = [query.hash() for query in queries]
+
+        async def fetch():
+            distinct = collections.OrderedDict(zip(keys, queries))
+            results = await asyncio.gather(*[
+                query_obj._arequest(
+                    query.method, query.url, params=query.params,
+                    data=query.data, headers=query.headers,
+                    files=query.files, timeout=query.timeout,
+                    json=query.json, **kwargs)
+                for query in distinct.values()], return_exceptions=True)
+            results = dict(zip(distinct, results))
+            return [results[key] for key in keys]
+
+        results = self._replay(('request_many',) + tuple(keys), fetch)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        if as_completed:
+            return iter(list(enumerate(results)))
+        return list(results)
+
+
+class _ThreadLocalVar(threading.local):
+    """
+    Thread-local stand-in for `contextvars.ContextVar` on Python 3.6.
+    """
+
+    def __init__(self, name, default=None):
+        self.value = default
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        token, self.value = self.value, value
+        return token
+
+    def reset(self, token):
+        self.value = token
+
+
+if contextvars is not None:
+    _request_replay = contextvars.ContextVar('astroquery_request_replay',
+                                             default=None)
+    _cache_suspended = contextvars.ContextVar('astroquery_cache_suspended',
+                                              default=frozenset())
+    _progress_suspended = contextvars.ContextVar(
+        'astroquery_progress_suspended', default=False)
+else:
+    _request_replay = None
+    _cache_suspended = _ThreadLocalVar('astroquery_cache_suspended',
+                                       default=frozenset())
+    _progress_suspended = _ThreadLocalVar('astroquery_progress_suspended',
+                                          default=False)
+
+
+def _httpx_to_requests(response, prepared):
+    """
+    Convert an ``httpx.Response`` to the `requests.Response` expected by the
+    parsers of the services.
+    """
+    result = requests.Response()
+    result._content = response.content
+    result.status_code = response.status_code
+    result.reason = response.reason_phrase
+    result.url = str(response.url)
+    result.headers = requests.structures.CaseInsensitiveDict(
+        dict(response.headers))
+    result.encoding = requests.utils.get_encoding_from_headers(result.headers)
+    try:
+        result.elapsed = response.elapsed
+    except RuntimeError:
+        # not recorded by every transport
+        pass
+    result.request = prepared
+    return result
+
+
 class AstroQuery(object):
 
     def __init__(self, method, url,
@@ -71,50 +273,50 @@ class AstroQuery(object):
                                json=json)
 
     def hash(self):
+        """
+        The key of this request in the response cache: the SHA-224 hex
+        digest of a canonical encoding of the request.
+
+        The encoding (version `REQUEST_KEY_VERSION`) is the version number,
+        followed by the encoding of the method, url, params, data, json,
+        headers and files of the request, in that order:
+
+        * `None` is ``N``, booleans are ``T`` and ``F``;
+        * a string is ``S<n>:`` followed by its ``n`` UTF-8 bytes, and
+          bytes are ``B<n>:`` followed by the ``n`` bytes;
+        * a mapping is ``D<n>:`` followed by its ``n`` keys and values,
+          sorted by key;
+        * a list or tuple is ``L<n>:`` followed by its ``n`` items.  At the
+          top level (e.g. params given as a list of pairs) the items are
+          sorted first;
+        * a file-like object is ``R``, then ``C<n>:`` followed by each chunk
+          of ``n`` bytes read from it, then ``E``.  The file is read in
+          chunks, never as a whole, and rewound to its initial position;
+        * any other value is ``O<n>:`` followed by the ``n`` UTF-8 bytes of
+          ``<type name>:<repr>``.
+
+        The key therefore does not depend on the pickle protocol or the
+        Python version.
+        """
         if self._hash is None:
-            request_key = (self.method, self.url)
+            hasher = hashlib.sha224()
+            hasher.update('astroquery-request-key-v{0}:'
+                          .format(REQUEST_KEY_VERSION).encode('ascii'))
+            _feed_request_key(hasher, self.method)
+            _feed_request_key(hasher, self.url)
             for k in (self.params, self.data, self.json,
                       self.headers, self.files):
-                if isinstance(k, dict):
-                    entry = (tuple(sorted(k.items(),
-                                          key=_replace_none_iterable)))
-                    entry = tuple((k_, v_.read()) if hasattr(v_, 'read')
-                                  else (k_, v_) for k_, v_ in entry)
-                    for k_, v_ in entry:
-                        if hasattr(v_, 'read') and hasattr(v_, 'seek'):
-                            v_.seek(0)
-
-                    request_key += entry
-                elif isinstance(k, tuple) or isinstance(k, list):
-                    request_key += (tuple(sorted(k,
-                                                 key=_replace_none_iterable)),)
-                elif k is None:
-                    request_key += (None,)
-                elif isinstance(k, six.string_types):
-                    request_key += (k,)
-                else:
-                    raise TypeError("{0} must be a dict, tuple, str, or "
-                                    "list".format(k))
-            self._hash = hashlib.sha224(pickle.dumps(request_key)).hexdigest()
+                if isinstance(k, (tuple, list)):
+                    k = _sorted_pairs(k)
+                elif not (k is None or hasattr(k, 'read')
+                          or isinstance(k, (six.string_types, bytes,
+                                            collections.abc.Mapping))):
+                    raise TypeError("{0} must be a dict, tuple, str, bytes, "
+                                    "file or list".format(k))
+                _feed_request_key(hasher, k)
+            self._hash = hasher.hexdigest()
         return self._hash
 
-    def request_file(self, cache_location):
-        fn = os.path.join(cache_location, self.hash() + ".pickle")
-        return fn
-
-    def from_cache(self, cache_location):
-        request_file = self.request_file(cache_location)
-        try:
-            with open(request_file, "rb") as f:
-                response = pickle.load(f)
-            if not isinstance(response, requests.Response):
-                response = None
-        except IOError:  # TODO: change to FileNotFoundError once drop py2 support
-            response = None
-        if response:
-            log.debug("Retrieving data from {0}".format(request_file))
-        return response
-
 
 class LoginABCMeta(abc.ABCMeta):
     """
@@ -163,12 +365,48 @@ class BaseQuery(object):
             self.__class__.__name__.split("Class")[0])
         if not os.path.exists(self.cache_location):
             os.makedirs(self.cache_location)
-        self._cache_active = True
+        self._cache_backend = None
+        self._default_cache_backend = None
+        # httpx clients and per-host limits of each event loop
+        self._async_state = weakref.WeakKeyDictionary()
 
     def __call__(self, *args, **kwargs):
         """ init a fresh copy of self """
         return self.__class__(*args, **kwargs)
 
+    @property
+    def _cache_active(self):
+        # suspend_cache only applies to the thread or task that entered it
+        return id(self) not in _cache_suspended.get()
+
+    @property
+    def cache_backend(self):
+        """
+        The `~astroquery.utils.cache.ResponseCache` storing the responses of
+        `_request`.  Unless another backend is assigned, this is a
+        `~astroquery.utils.cache.FileCache` in ``cache_location``, or `None`
+        when ``cache_location`` is `None`.
+        """
+        if self._cache_backend is not None:
+            return self._cache_backend
+        if self.cache_location is None:
+            return None
+        default = self._default_cache_backend
+        if default is None or default.location != self.cache_location:
+            default = self._default_cache_backend = FileCache(
+                self.cache_location)
+        return default
+
+    @cache_backend.setter
+    def cache_backend(self, value):
+        self._cache_backend = value
+
+    def clear_cache(self):
+        """Removes all cached responses of this service."""
+        cache_backend = self.cache_backend
+        if cache_backend is not None:
+            cache_backend.clear()
+
     def _request(self, method, url,
                  params=None, data=None, headers=None,
                  files=None, save=False, savedir='', timeout=None, cache=True,
@@ -198,7 +436,7 @@ class BaseQuery(object):
             See `requests.request`
         save : bool
             Whether to save the file to a local directory.  Caching will happen
-            independent of this parameter if `BaseQuery.cache_location` is set,
+            independent of this parameter if `BaseQuery.cache_backend` is set,
             but the save location can be overridden if ``save==True``
         savedir : str
             The location to save the local file if you want to save it
@@ -230,6 +468,14 @@ class BaseQuery(object):
             timeout=timeout,
             json=json
         )
+        replay = _request_replay.get() if _request_replay else None
+        if replay is not None:
+            return replay.request(
+                self, AstroQuery(method, url, **req_kwargs), dict(
+                    req_kwargs, save=save, savedir=savedir, cache=cache,
+                    stream=stream, auth=auth, continuation=continuation,
+                    verify=verify, allow_redirects=allow_redirects))
+
         if save:
             local_filename = url.split('/')[-1]
             if os.name == 'nt':
@@ -245,14 +491,15 @@ class BaseQuery(object):
             return local_filepath
         else:
             query = AstroQuery(method, url, **req_kwargs)
-            if ((self.cache_location is None) or (not self._cache_active) or (not cache)):
+            cache_backend = self.cache_backend
+            if ((cache_backend is None) or (not self._cache_active) or (not cache)):
                 with suspend_cache(self):
                     response = query.request(self._session, stream=stream,
                                              auth=auth, verify=verify,
                                              allow_redirects=allow_redirects,
                                              json=json)
             else:
-                response = query.from_cache(self.cache_location)
+                response = cache_backend.get(query.hash())
                 if not response:
                     response = query.request(self._session,
                                              self.cache_location,
@@ -261,17 +508,305 @@ class BaseQuery(object):
                                              allow_redirects=allow_redirects,
                                              verify=verify,
                                              json=json)
-                    to_cache(response, query.request_file(self.cache_location))
+                    cache_backend.put(query.hash(), response)
             self._last_query = query
             return response
 
+    async def _arequest(self, method, url, params=None, data=None,
+                        headers=None, files=None, save=False, savedir='',
+                        timeout=None, cache=True, stream=False, auth=None,
+                        continuation=True, verify=True, allow_redirects=True,
+                        json=None):
+        """
+        Coroutine version of `_request`, with the same parameters and return
+        values.
+
+        Requests are prepared by ``_session``, so they carry the same headers,
+        cookies and authentication as with `_request`, and are sent with
+        `httpx <https://www.python-httpx.org>`_ when it is installed, with at
+        most ``astroquery.request_conf.max_per_host`` requests in flight to
+        any one host per event loop.  Without httpx, and for downloads
+        (``save=True``), `_request` runs in the default executor of the
+        event loop.
+        """
+        kwargs = dict(params=params, data=data, headers=headers, files=files,
+                      save=save, savedir=savedir, timeout=timeout,
+                      cache=cache, stream=stream, auth=auth,
+                      continuation=continuation, verify=verify,
+                      allow_redirects=allow_redirects, json=json)
+        loop = asyncio.get_event_loop()
+        try:
+            import httpx
+        except ImportError:
+            httpx = None
+        if httpx is None or save:
+            return await loop.run_in_executor(
+                None, functools.partial(self._request, method, url, **kwargs))
+
+        query = AstroQuery(method, url, params=params, data=data,
+                           headers=headers, files=files, timeout=timeout,
+                           json=json)
+        cache_backend = self.cache_backend
+        use_cache = (cache_backend is not None and self._cache_active
+                     and cache)
+        if use_cache:
+            response = cache_backend.get(query.hash())
+            if response:
+                self._last_query = query
+                return response
+
+        prepared = self._session.prepare_request(requests.Request(
+            method, url, params=params, data=data, headers=headers,
+            files=files, json=json, auth=auth))
+        state = self._hold_async_state(loop)
+        try:
+            client = state['clients'].get(verify)
+            if client is None:
+                client = state['clients'][verify] = httpx.AsyncClient(
+                    verify=verify, limits=httpx.Limits(max_connections=None))
+
+            async with state['hosts'][urlparse(prepared.url).netloc]:
+                response = await client.request(
+                    prepared.method, prepared.url,
+                    headers=dict(prepared.headers), content=prepared.body,
+                    timeout=query.timeout, follow_redirects=allow_redirects)
+        finally:
+            await self._release_async_state(loop)
+        response = _httpx_to_requests(response, prepared)
+        if use_cache:
+            cache_backend.put(query.hash(), response)
+        self._last_query = query
+        return response
+
+    def _hold_async_state(self, loop):
+        """
+        Return the httpx clients and per-host limits of ``loop``, creating
+        them if needed.  They are kept until each call is matched by a call
+        to `_release_async_state`.
+        """
+        state = self._async_state.get(loop)
+        if state is None:
+            state = self._async_state[loop] = {
+                'clients': {},
+                'hosts': collections.defaultdict(
+                    lambda: asyncio.Semaphore(request_conf.max_per_host)),
+                'holders': 0}
+        state['holders'] += 1
+        return state
+
+    async def _release_async_state(self, loop):
+        """
+        Release the state held by `_hold_async_state`, closing the httpx
+        clients of ``loop`` once it is no longer held.
+        """
+        state = self._async_state[loop]
+        state['holders'] -= 1
+        if state['holders'] == 0:
+            del self._async_state[loop]
+            for client in state['clients'].values():
+                await client.aclose()
+
+    async def _arun(self, func, *args, **kwargs):
+        """
+        Run a query method on the running event loop.
+
+        Each time ``func`` makes requests through `_request` or
+        `_request_many` that have not been answered yet, the call is
+        abandoned, the requests are awaited with `_arequest`, and ``func`` is
+        called again with the responses received so far returned in order.
+        This requires ``func`` to have no side effects besides its requests,
+        and its requests to only depend on its arguments and the previous
+        responses, which is checked: a `RuntimeError` is raised if ``func``
+        makes a different request than the one recorded.  Requests made
+        otherwise, e.g. from threads started by ``func``, are sent as usual
+        and block the event loop.
+
+        Returns
+        -------
+        The return value of ``func(*args, **kwargs)``.
+        """
+        if _request_replay is None:
+            raise NotImplementedError("Coroutine queries require Python 3.7 "
+                                      "or later.")
+        loop = asyncio.get_event_loop()
+        # keep the connections open between the requests of ``func``
+        self._hold_async_state(loop)
+        try:
+            replay = _RequestReplay()
+            while True:
+                replay.position = 0
+                token = _request_replay.set(replay)
+                try:
+                    return func(*args, **kwargs)
+                except _DeferredRequest as deferred:
+                    pending = deferred
+                finally:
+                    _request_replay.reset(token)
+                try:
+                    result = await pending.fetch()
+                except Exception as ex:
+                    # raised by the request when ``func`` is run again
+                    result = ex
+                replay.results.append((pending.key, result))
+        finally:
+            await self._release_async_state(loop)
+
+    def _request_many(self, queries, cache=True, max_workers=None,
+                      max_per_host=None, as_completed=False,
+                      return_exceptions=False, stream=False, auth=None,
+                      verify=True, allow_redirects=True):
+        """
+        Issue many HTTP requests concurrently.
+
+        Cached responses are returned without dispatching their request, and
+        identical requests are only sent once.  The remaining requests run on
+        a thread pool sharing the connection pool of ``_session``, with at
+        most ``max_per_host`` requests in flight to any one host.
+
+        Like `_request`, this is a low-level method intended for astroquery
+        developers.
+
+        Parameters
+        ----------
+        queries : iterable of `AstroQuery` or dict
+            The requests to issue.  Dictionaries are passed as keyword
+            arguments to `AstroQuery`.
+        cache : bool
+        max_workers : int
+            Size of the thread pool.  Defaults to
+            ``astroquery.request_conf.max_workers``.
+        max_per_host : int
+            Maximum number of concurrent requests to a single host.  Defaults
+            to ``astroquery.request_conf.max_per_host``.
+        as_completed : bool
+            If True, return an iterator of ``(index, response)`` pairs in the
+            order the responses arrive instead of a list.  At most
+            ``2 * max_workers`` requests are then sent ahead of the responses
+            consumed, so that each response can be released once processed.
+        return_exceptions : bool
+            If True, an exception raised by a request is returned in place of
+            its response instead of being raised.
+        stream, auth, verify, allow_redirects
+            See `_request`; they apply to all requests.
+
+        Returns
+        -------
+        responses : list of `requests.Response`
+            The responses in the order of ``queries``, or an iterator of
+            ``(index, response)`` if ``as_completed`` is True.
+        """
+        queries = [AstroQuery(**query) if isinstance(query, dict) else query
+                   for query in queries]
+        replay = _request_replay.get() if _request_replay else None
+        if replay is not None:
+            return replay.request_many(
+                self, queries, dict(cache=cache, stream=stream, auth=auth,
+                                    verify=verify,
+                                    allow_redirects=allow_redirects),
+                as_completed, return_exceptions)
+
+        max_workers = max_workers or request_conf.max_workers
+        max_per_host = max_per_host or request_conf.max_per_host
+
+        cache_backend = self.cache_backend
+        use_cache = (cache_backend is not None and self._cache_active
+                     and cache)
+
+        # indices of each distinct request still to be sent
+        pending = collections.OrderedDict()
+        cached = {}
+        for index, query in enumerate(queries):
+            key = query.hash()
+            if key in pending:
+                pending[key].append(index)
+                continue
+            response = cache_backend.get(key) if use_cache else None
+            if response:
+                cached[index] = response
+            else:
+                pending[key] = [index]
+
+        hosts = {urlparse(queries[indices[0]].url).netloc:
+                 threading.BoundedSemaphore(max_per_host)
+                 for indices in pending.values()}
+        self._grow_connection_pool(min(max_workers, max_per_host))
+
+        def fetch(query):
+            with hosts[urlparse(query.url).netloc]:
+                response = query.request(self._session, stream=stream,
+                                         auth=auth, verify=verify,
+                                         allow_redirects=allow_redirects,
+                                         json=query.json)
+            if use_cache:
+                cache_backend.put(query.hash(), response)
+            return response
+
+        def iter_responses():
+            for index, response in cached.items():
+                yield index, response
+            if not pending:
+                return
+            unsent = iter(pending.values())
+            window = 2 * max_workers if as_completed else len(pending)
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+                futures = {}
+                try:
+                    while True:
+                        for indices in itertools.islice(
+                                unsent, window - len(futures)):
+                            futures[pool.submit(
+                                fetch, queries[indices[0]])] = indices
+                        if not futures:
+                            break
+                        done, _ = concurrent.futures.wait(
+                            futures,
+                            return_when=concurrent.futures.FIRST_COMPLETED)
+                        for future in done:
+                            indices = futures.pop(future)
+                            try:
+                                response = future.result()
+                            except Exception as ex:
+                                if not return_exceptions:
+                                    raise
+                                response = ex
+                            for index in indices:
+                                yield index, response
+                finally:
+                    for future in futures:
+                        future.cancel()
+
+        if as_completed:
+            return iter_responses()
+
+        responses = [None] * len(queries)
+        for index, response in iter_responses():
+            responses[index] = response
+        return responses
+
+    def _grow_connection_pool(self, size):
+        """
+        Make sure the connection pools of ``_session`` keep at least ``size``
+        connections per host, so that concurrent requests reuse them.
+        """
+        for prefix, adapter in list(self._session.adapters.items()):
+            if ((isinstance(adapter, requests.adapters.HTTPAdapter)
+                 and adapter._pool_maxsize < size)):
+                self._session.mount(prefix, requests.adapters.HTTPAdapter(
+                    pool_connections=adapter._pool_connections,
+                    pool_maxsize=size, max_retries=adapter.max_retries,
+                    pool_block=adapter._pool_block))
+
     def _download_file(self, url, local_filepath, timeout=None, auth=None,
                        continuation=True, cache=False, method="GET",
-                       head_safe=False, **kwargs):
+                       head_safe=False, segments=None, **kwargs):
         """
         Download a file.  Resembles `astropy.utils.data.download_file` but uses
         the local ``_session``
 
+        Request headers such as the resume range are passed with each request
+        rather than set on ``_session``, so several files can be downloaded
+        concurrently with the same instance.
+
         Parameters
         ----------
         url : string
@@ -285,8 +820,16 @@ class BaseQuery(object):
         cache : bool
         method : "GET" or "POST"
         head_safe : bool
+        segments : int or None
+            Maximum number of byte ranges of a new download to fetch
+            concurrently, if the server supports HTTP "range" requests.
+            Segments are at least ``astroquery.request_conf.min_segment_size``
+            bytes long.  Defaults to
+            ``astroquery.request_conf.download_segments``.
         """
 
+        bytes_read = 0
+
         if head_safe:
             response = self._session.request("HEAD", url,
                                              timeout=timeout, stream=True,
@@ -318,21 +861,36 @@ class BaseQuery(object):
             elif existing_file_length == 0:
                 open_mode = 'wb'
             else:
-                log.info("Continuing download of file {0}, with {1} bytes to "
-                         "go ({2}%)".format(local_filepath,
-                                            length - existing_file_length,
-                                            (length-existing_file_length)/length*100))
+                if length is not None:
+                    log.info("Continuing download of file {0}, with {1} bytes "
+                             "to go ({2}%)".format(
+                                 local_filepath, length - existing_file_length,
+                                 (length-existing_file_length)/length*100))
+                else:
+                    log.info("Continuing download of file {0}"
+                             .format(local_filepath))
 
                 # bytes are indexed from 0:
                 # https://en.wikipedia.org/wiki/List_of_HTTP_header_fields#range-request-header
                 end = "{0}".format(length-1) if length is not None else ""
-                self._session.headers['Range'] = "bytes={0}-{1}".format(existing_file_length,
-                                                                        end)
-
+                # The range only applies to this request; the session headers
+                # are shared by all the requests of the instance.
+                headers = dict(kwargs.get('headers') or {})
+                headers['Range'] = "bytes={0}-{1}".format(existing_file_length,
+                                                          end)
+                response.close()
                 response = self._session.request(method, url,
                                                  timeout=timeout, stream=True,
-                                                 auth=auth, **kwargs)
+                                                 auth=auth,
+                                                 **dict(kwargs,
+                                                        headers=headers))
                 response.raise_for_status()
+                if response.status_code != 206:
+                    log.info("Server did not honour the range request for "
+                             "{0}, downloading the whole file.".format(url))
+                    open_mode = 'wb'
+                else:
+                    bytes_read = existing_file_length
 
         elif cache and os.path.exists(local_filepath):
             if length is not None:
@@ -355,22 +913,41 @@ class BaseQuery(object):
                 return
         else:
             open_mode = 'wb'
-            if head_safe:
-                response = self._session.request(method, url,
-                                                 timeout=timeout, stream=True,
-                                                 auth=auth, **kwargs)
-                response.raise_for_status()
 
         blocksize = astropy.utils.data.conf.download_block_size
 
-        bytes_read = 0
-
         # Only show progress bar if logging level is INFO or lower.
-        if log.getEffectiveLevel() <= 20:
+        if log.getEffectiveLevel() <= 20 and not _progress_suspended.get():
             progress_stream = None  # Astropy default
         else:
             progress_stream = io.StringIO()
 
+        if segments is None:
+            segments = request_conf.download_segments
+        if length and request_conf.min_segment_size:
+            segments = min(segments, length // request_conf.min_segment_size)
+        if ((open_mode == 'wb' and length and segments > 1 and method == "GET"
+             and response.headers.get('Accept-Ranges') == 'bytes'
+             and 'Content-Encoding' not in response.headers)):
+            response.close()
+            with ProgressBarOrSpinner(
+                    length, ('Downloading URL {0} to {1} in {2} segments ...'
+                             .format(url, local_filepath, segments)),
+                    file=progress_stream) as pb:
+                if self._download_segments(url, local_filepath, length,
+                                           segments, pb, timeout=timeout,
+                                           auth=auth, **kwargs):
+                    return response
+            log.info("Server did not honour the range requests for {0}, "
+                     "downloading in a single stream.".format(url))
+            head_safe = True
+
+        if open_mode == 'wb' and head_safe:
+            response = self._session.request(method, url,
+                                             timeout=timeout, stream=True,
+                                             auth=auth, **kwargs)
+            response.raise_for_status()
+
         with ProgressBarOrSpinner(
                 length, ('Downloading URL {0} to {1} ...'
                          .format(url, local_filepath)),
@@ -378,7 +955,7 @@ class BaseQuery(object):
             with open(local_filepath, open_mode) as f:
                 for block in response.iter_content(blocksize):
                     f.write(block)
-                    bytes_read += blocksize
+                    bytes_read += len(block)
                     if length is not None:
                         pb.update(bytes_read if bytes_read <= length else
                                   length)
@@ -388,22 +965,131 @@ class BaseQuery(object):
         response.close()
         return response
 
+    def _download_segments(self, url, local_filepath, length, segments,
+                           progressbar, timeout=None, auth=None, **kwargs):
+        """
+        Download ``url`` to ``local_filepath`` as ``segments`` byte ranges
+        fetched concurrently with GET requests.
+
+        The ranges are written into a preallocated ``<local_filepath>.part``
+        file, which replaces ``local_filepath`` once every range has been
+        received in full.
+
+        Returns
+        -------
+        success : bool
+            False if the server answered a range request with the whole file,
+            in which case ``local_filepath`` is left untouched.
+        """
+        blocksize = astropy.utils.data.conf.download_block_size
+        partial_filepath = local_filepath + '.part'
+        bounds = [length * i // segments for i in range(segments + 1)]
+        lock = threading.Lock()
+        bytes_read = [0]
+
+        def fetch(start, stop):
+            headers = dict(kwargs.get('headers') or {})
+            headers['Range'] = 'bytes={0}-{1}'.format(start, stop - 1)
+            response = self._session.request(
+                "GET", url, timeout=timeout, stream=True, auth=auth,
+                **dict(kwargs, headers=headers))
+            try:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    return False
+                position = start
+                with open(partial_filepath, 'r+b') as f:
+                    f.seek(start)
+                    for block in response.iter_content(blocksize):
+                        if position + len(block) > stop:
+                            raise IOError("Received more than the requested "
+                                          "range {0} of {1}"
+                                          .format(headers['Range'], url))
+                        f.write(block)
+                        position += len(block)
+                        with lock:
+                            bytes_read[0] += len(block)
+                            progressbar.update(bytes_read[0])
+                if position != stop:
+                    raise IOError("Received {0} bytes instead of {1} for the "
+                                  "range {2} of {3}"
+                                  .format(position - start, stop - start,
+                                          headers['Range'], url))
+                return True
+            finally:
+                response.close()
+
+        with open(partial_filepath, 'wb') as f:
+            f.truncate(length)
+        self._grow_connection_pool(segments)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(segments) as pool:
+                futures = [pool.submit(fetch, start, stop)
+                           for start, stop in zip(bounds[:-1], bounds[1:])]
+                try:
+                    success = all(future.result() for future in futures)
+                finally:
+                    for future in futures:
+                        future.cancel()
+            if success:
+                if os.path.getsize(partial_filepath) != length:
+                    raise IOError("Downloaded file {0} does not have the "
+                                  "expected size {1}"
+                                  .format(partial_filepath, length))
+                os.replace(partial_filepath, local_filepath)
+        finally:
+            if os.path.exists(partial_filepath):
+                os.remove(partial_filepath)
+        return success
+
 
 class suspend_cache:
     """
     A context manager that suspends caching.
+
+    Caching is only suspended for the thread, or the asyncio task, that
+    entered the context; other threads using the same object keep caching.
     """
 
     def __init__(self, obj):
         self.obj = obj
+        self._tokens = []
+
+    def __enter__(self):
+        suspended = _cache_suspended.get() | {id(self.obj)}
+        self._tokens.append(_cache_suspended.set(suspended))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _cache_suspended.reset(self._tokens.pop())
+        return False
+
+
+class suspend_progress:
+    """
+    A context manager that hides the progress bars of downloads, e.g. of
+    files downloaded concurrently, whose progress bars would be mixed up.
+
+    The progress bars are only hidden for the thread, or the asyncio task,
+    that entered the context.
+    """
+
+    def __init__(self):
+        self._tokens = []
 
     def __enter__(self):
-        self.obj._cache_active = False
+        self._tokens.append(_progress_suspended.set(True))
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.obj._cache_active = True
+        _progress_suspended.reset(self._tokens.pop())
         return False
 
+    @staticmethod
+    def active():
+        """
+        Whether progress bars are hidden in the current thread or task.
+        """
+        return _progress_suspended.get()
+
 
 class QueryWithLogin(BaseQuery):
     """
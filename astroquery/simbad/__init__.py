@@ -28,6 +28,11 @@ class Conf(_config.ConfigNamespace):
         0,
         'Maximum number of rows that will be fetched from the result.')
 
+    objects_batch_size = _config.ConfigItem(
+        500,
+        'Maximum number of names resolved by a single script in '
+        'SimbadClass.query_objects_bulk.')
+
 
 conf = Conf()
 
@@ -8,16 +8,18 @@ import re
 import requests
 import json
 import os
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 import warnings
+import numpy as np
 import astropy.units as u
 from astropy.utils.data import get_pkg_data_filename
 import astropy.coordinates as coord
-from astropy.table import Table
+from astropy.table import Table, vstack
 import astropy.io.votable as votable
 from six import BytesIO
 
-from ..query import BaseQuery
+from .. import version
+from ..query import AstroQuery, BaseQuery
 from ..utils import commons
 from ..exceptions import TableParseError, LargeQueryWarning
 from . import conf
@@ -94,6 +96,14 @@ error_regex = re.compile(r'(?ms)\[(?P<line>\d+)\]\s?(?P<msg>.+?)(\[|\Z)')
 SimbadError = namedtuple('SimbadError', ('line', 'msg'))
 VersionInfo = namedtuple('VersionInfo', ('major', 'minor', 'micro', 'patch'))
 
+# VOTable fields added to the scripts of the multi-position queries sent in
+# batches, to find the positions of the rows
+REGION_BATCH_FIELDS = ('ra(d)', 'dec(d)')
+
+# Version of the resolved names saved in the cache by
+# SimbadClass.query_objects_bulk, to be increased whenever what is saved changes
+RESOLVED_CACHE_VERSION = 1
+
 
 class SimbadResult(object):
     __sections = ('script', 'console', 'error', 'data')
@@ -223,6 +233,21 @@ class SimbadObjectIDsResult(SimbadResult):
         return table
 
 
+class SimbadRegionBatches(list):
+    """
+    The responses of the scripts of a multi-position region query sent in
+    batches, with the positions they queried: the positions
+    ``positions[bounds[i]:bounds[i + 1]]``, of radii ``radii`` (in degrees),
+    for the response ``i``.
+    """
+
+    def __init__(self, responses, bounds, positions, radii):
+        super(SimbadRegionBatches, self).__init__(responses)
+        self.bounds = bounds
+        self.positions = positions
+        self.radii = radii
+
+
 class SimbadBaseQuery(BaseQuery):
     """
     SimbadBaseQuery overloads the base query because we know that SIMBAD will
@@ -273,6 +298,8 @@ class SimbadClass(SimbadBaseQuery):
     """
     SIMBAD_URL = 'http://' + conf.server + '/simbad/sim-script'
     TIMEOUT = conf.timeout
+    # the *_async methods also available as aquery_* coroutines
+    _coroutine_methods = ('query_region_async',)
     WILDCARDS = {
         '*': 'Any string of characters (including an empty one)',
         '?': 'Any character (exactly one character)',
@@ -633,9 +660,189 @@ class SimbadClass(SimbadBaseQuery):
                                        wildcard=wildcard, cache=cache,
                                        get_query_payload=get_query_payload)
 
+    def query_objects_bulk(self, object_names, batch_size=None,
+                           max_workers=None, cache=True, verbose=False):
+        """
+        Resolves a long list of object names with several scripts sent
+        concurrently, and returns one row per name.
+
+        Repeated names are resolved once, and the other names are split into
+        scripts of at most ``batch_size`` names.  A script that fails, e.g.
+        on a server error, only affects the names it contains.  Unlike
+        `query_objects`, the rows follow the order of ``object_names`` and
+        the names that were not resolved are kept, with masked values.  The
+        ``TYPED_ID`` column holds the names, the ``STATUS`` column the
+        outcome of their resolution (``'ok'``, ``'not found'`` or
+        ``'failed'``) and the ``MESSAGE`` column the error reported by
+        SIMBAD or raised by the script.
+
+        With ``cache=True``, the outcome of each name is saved in the cache,
+        for the current VOTable fields, so that later calls only send the
+        names they have not resolved yet.  Failed names are not saved.
+
+        Parameters
+        ----------
+        object_names : sequence of strs
+            names of objects to be queried
+        batch_size : int, optional
+            Maximum number of names per script.  Defaults to
+            ``astroquery.simbad.conf.objects_batch_size``.
+        max_workers : int, optional
+            Maximum number of scripts sent concurrently.  Defaults to
+            ``astroquery.request_conf.max_workers``.
+        cache : bool, optional
+            Defaults to `True`.
+        verbose : bool, optional
+            Defaults to `False`.
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+            Query results table, with a row per name of ``object_names``
+        """
+        names = [str(name).strip() for name in object_names]
+        fields = self.get_votable_fields()
+
+        # name -> (status, message, table of the rows, index of the row)
+        results = OrderedDict((name, None) for name in names)
+        if cache:
+            results.update(self._load_resolved(results, fields, verbose))
+
+        pending = [name for name, result in results.items() if result is None]
+        if pending:
+            batch_size = batch_size or conf.objects_batch_size
+            nbatches = -(-len(pending) // batch_size)
+            # evenly sized batches rather than a small last one
+            batches = [pending[i * len(pending) // nbatches:
+                               (i + 1) * len(pending) // nbatches]
+                       for i in range(nbatches)]
+            header = self._get_query_header()
+            queries = [AstroQuery("POST", self.SIMBAD_URL, timeout=self.TIMEOUT,
+                                  data={'script': "\n".join(
+                                      [header] + ["query id " + name
+                                                  for name in batch]
+                                      + [self._get_query_footer()])})
+                       for batch in batches]
+            responses = self._request_many(queries, cache=cache,
+                                           max_workers=max_workers,
+                                           return_exceptions=True)
+            # line of the first name in the scripts, from 1
+            first_line = header.count("\n") + 2
+            for query, batch, response in zip(queries, batches, responses):
+                batch_results = _parse_objects_batch(response, batch,
+                                                     first_line, verbose)
+                for name, result in zip(batch, batch_results):
+                    results[name] = result
+                if cache:
+                    self._save_resolved(batch, batch_results, fields,
+                                        query.hash())
+
+        table = _align_objects(names, results)
+        unresolved = np.count_nonzero(table['STATUS'] != 'ok')
+        if unresolved:
+            warnings.warn("{0} of the {1} names were not resolved, see the "
+                          "STATUS and MESSAGE columns of the result."
+                          .format(unresolved, len(names)))
+        return table
+
+    def _resolved_cache_key(self, name, fields):
+        """
+        The cache key of the outcome of resolving ``name`` with the VOTable
+        fields ``fields`` in `query_objects_bulk`.
+        """
+        return AstroQuery("POST", self.SIMBAD_URL,
+                          data={'query id': name,
+                                'votable': ','.join(fields)}).hash()
+
+    def _load_resolved(self, names, fields, verbose=False):
+        """
+        Reads the names resolved by earlier calls of `query_objects_bulk`
+        from the cache.
+
+        The cache holds, for each name, its status and the key and row of
+        the cached response of the script that resolved it.  Names whose
+        script response is no longer in the cache are left out.
+
+        Returns
+        -------
+        results : dict
+            The ``(status, message, table, row)`` of the names found in the
+            cache.
+        """
+        cache_backend = self.cache_backend
+        if cache_backend is None or not self._cache_active:
+            return {}
+
+        entries = {}
+        for name in names:
+            response = cache_backend.get(self._resolved_cache_key(name, fields))
+            if response is None:
+                continue
+            try:
+                entry = json.loads(response.content.decode('utf-8'))
+            except ValueError:
+                entry = None
+            finally:
+                response.close()
+            if ((isinstance(entry, dict)
+                 and entry.get("version") == RESOLVED_CACHE_VERSION
+                 and entry.get("astroquery") == version.version)):
+                entries[name] = entry
+
+        tables = {}
+        for key in set(entry["batch"] for entry in entries.values()
+                       if entry["status"] == 'ok'):
+            response = cache_backend.get(key)
+            if response is None:
+                continue
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    tables[key] = SimbadVOTableResult(response.text,
+                                                      verbose=verbose).table
+            except Exception:
+                pass
+            finally:
+                response.close()
+
+        results = {}
+        for name, entry in entries.items():
+            if entry["status"] != 'ok':
+                results[name] = (entry["status"], entry["message"], None, None)
+            elif entry["batch"] in tables:
+                results[name] = ('ok', '', tables[entry["batch"]],
+                                 entry["row"])
+        return results
+
+    def _save_resolved(self, names, results, fields, batch_key):
+        """
+        Saves the outcome of resolving the names of a script of
+        `query_objects_bulk` in the cache, except for failed names, whose
+        script response is removed from the cache.
+        """
+        cache_backend = self.cache_backend
+        if cache_backend is None or not self._cache_active:
+            return
+
+        for name, (status, message, table, row) in zip(names, results):
+            if status == 'failed':
+                # sent again next time, rather than read from the cache
+                cache_backend.delete(batch_key)
+                continue
+            entry = {"version": RESOLVED_CACHE_VERSION,
+                     "astroquery": version.version,
+                     "status": status, "message": message,
+                     "batch": batch_key, "row": row}
+            response = requests.Response()
+            response._content = json.dumps(entry).encode('utf-8')
+            response.status_code = 200
+            response.url = self.SIMBAD_URL
+            cache_backend.put(self._resolved_cache_key(name, fields), response)
+
     def query_region_async(self, coordinates, radius=2*u.arcmin,
                            equinox=2000.0, epoch='J2000', cache=True,
-                           get_query_payload=False):
+                           get_query_payload=False, batch_size=None,
+                           max_workers=None):
         """
         Serves the same function as `query_region`, but
         only collects the response from the Simbad server and returns.
@@ -656,11 +863,21 @@ class SimbadClass(SimbadBaseQuery):
         get_query_payload : bool, optional
             When set to `True` the method returns the HTTP request parameters.
             Defaults to `False`.
+        batch_size : int, optional
+            For an array of coordinates, send the positions in scripts of at
+            most ``batch_size`` positions, concurrently.  The rows of the
+            result then have the index in ``coordinates`` of the position
+            they were found around in an ``INPUT_INDEX`` column, with a row
+            for each position whose region contains the object.
+        max_workers : int, optional
+            Maximum number of scripts sent concurrently.  Defaults to
+            ``astroquery.request_conf.max_workers``.
 
         Returns
         -------
         response : `requests.Response`
-             Response of the query from the server.
+             Response of the query from the server, or, with ``batch_size``,
+             ``SimbadRegionBatches`` list of the responses of the scripts.
         """
 
         equinox = validate_equinox(equinox)
@@ -680,17 +897,21 @@ class SimbadClass(SimbadBaseQuery):
         if isinstance(ra, list):
             vector = True
 
-            if len(ra) > 10000:
+            if len(ra) > 10000 and not batch_size:
                 warnings.warn("For very large queries, you may receive a "
                               "timeout error.  SIMBAD suggests splitting "
                               "queries with >10000 entries into multiple "
-                              "threads", LargeQueryWarning)
+                              "threads, see the batch_size argument",
+                              LargeQueryWarning)
 
             if len(set(frame)) > 1:
                 raise ValueError("Coordinates have different frames")
             else:
                 frame = set(frame).pop()
 
+            # the radii as given, for matching the rows to the positions
+            radii = radius
+
             if vector and _has_length(radius) and len(radius) == len(ra):
                 # all good, continue
                 pass
@@ -700,10 +921,16 @@ class SimbadClass(SimbadBaseQuery):
                 radius = [_parse_radius(radius)] * len(ra)
 
             if vector:
-                query_str = "\n".join([base_query_str
-                                      .format(ra=ra_, dec=dec_, rad=rad_,
-                                              frame=frame, equinox=equinox)
-                                      for ra_, dec_, rad_ in zip(ra, dec, radius)])
+                query_lines = [base_query_str.format(ra=ra_, dec=dec_,
+                                                     rad=rad_, frame=frame,
+                                                     equinox=equinox)
+                               for ra_, dec_, rad_ in zip(ra, dec, radius)]
+                if batch_size:
+                    return self._query_region_batches(
+                        coordinates, radii, query_lines, batch_size,
+                        max_workers=max_workers, cache=cache,
+                        get_query_payload=get_query_payload)
+                query_str = "\n".join(query_lines)
 
         else:
             radius = _parse_radius(radius)
@@ -719,6 +946,48 @@ class SimbadClass(SimbadBaseQuery):
                                  timeout=self.TIMEOUT, cache=cache)
         return response
 
+    def _query_region_batches(self, coordinates, radii, query_lines,
+                              batch_size, max_workers=None, cache=True,
+                              get_query_payload=False):
+        """
+        Send the ``query coo`` lines of a multi-position `query_region_async`
+        in scripts of at most ``batch_size`` lines, concurrently.
+
+        The scripts also ask for the decimal ICRS coordinates of the objects,
+        with which `_parse_result` finds the positions of ``coordinates``
+        within ``radii`` of each row.
+
+        Returns
+        -------
+        responses : ``SimbadRegionBatches``
+            The responses of the scripts, along with their positions.
+        """
+        nbatches = -(-len(query_lines) // batch_size)
+        # evenly sized batches rather than a small last one
+        bounds = [i * len(query_lines) // nbatches
+                  for i in range(nbatches + 1)]
+        header = "\n".join(["votable {" + ",".join(
+            self.get_votable_fields() + list(REGION_BATCH_FIELDS)) + "}",
+            "votable open"])
+        payloads = [{'script': "\n".join([header] + query_lines[start:stop]
+                                         + [self._get_query_footer()])}
+                    for start, stop in zip(bounds[:-1], bounds[1:])]
+        if get_query_payload:
+            return payloads
+
+        positions = commons.parse_coordinates(coordinates)
+        if not isinstance(positions, coord.SkyCoord):
+            positions = coord.SkyCoord(positions)
+        responses = self._request_many(
+            [dict(method="POST", url=self.SIMBAD_URL, data=payload,
+                  timeout=self.TIMEOUT) for payload in payloads],
+            cache=cache, max_workers=max_workers)
+        for response in responses:
+            response.raise_for_status()
+        return SimbadRegionBatches(
+            responses, bounds, positions.icrs.ravel(),
+            np.broadcast_to(coord.Angle(radii).degree, (len(query_lines),)))
+
     def query_catalog(self, catalog, verbose=False, cache=True,
                       get_query_payload=False):
         """
@@ -1043,7 +1312,17 @@ class SimbadClass(SimbadBaseQuery):
         resulting table.  If data is not retrieved or the resulting
         table is empty, return None.  In case of problems, save
         intermediate results for further debugging.
+
+        The list of responses of a multi-position `query_region_async` sent
+        in batches is parsed into a single table, with the index of the
+        position of each row in the ``INPUT_INDEX`` column.
         """
+        if isinstance(result, SimbadRegionBatches):
+            tables = [self._parse_result(response, resultclass, verbose)
+                      for response in result]
+            return _tag_region_batches(tables, result.bounds,
+                                       result.positions, result.radii)
+
         self.last_response = result
         try:
             content = result.text
@@ -1066,6 +1345,141 @@ class SimbadClass(SimbadBaseQuery):
         return resulttable
 
 
+def _parse_objects_batch(response, names, first_line, verbose=False):
+    """
+    Parse the response of a script of `SimbadClass.query_objects_bulk`
+    resolving ``names``, the first of which is on line ``first_line`` of the
+    script.
+
+    Returns
+    -------
+    results : list
+        The ``(status, message, table, row)`` of each name: the names SIMBAD
+        reports an error for are ``'not found'``, and all the names are
+        ``'failed'`` if the script could not be run or its result parsed.
+    """
+    try:
+        if isinstance(response, Exception):
+            raise response
+        response.raise_for_status()
+        with warnings.catch_warnings():
+            # the names not found are reported in the result instead
+            warnings.simplefilter("ignore")
+            parsed = SimbadVOTableResult(response.text, verbose=verbose)
+        errors = {}
+        for error in parsed.errors:
+            if not 0 <= error.line - first_line < len(names):
+                raise TableParseError("Script line {0} raised an error: {1}"
+                                      .format(error.line, error.msg))
+            errors[error.line - first_line] = error.msg
+        table = parsed.table if len(errors) < len(names) else None
+        if table is not None and len(table) != len(names) - len(errors):
+            raise TableParseError("{0} rows were returned for {1} names"
+                                  .format(len(table),
+                                          len(names) - len(errors)))
+    except Exception as ex:
+        return [('failed', str(ex), None, None)] * len(names)
+
+    results = []
+    row = 0
+    for index in range(len(names)):
+        if index in errors:
+            results.append(('not found', errors[index], None, None))
+        else:
+            results.append(('ok', '', table, row))
+            row += 1
+    return results
+
+
+def _align_objects(names, results):
+    """
+    Gather the rows of the names resolved by `SimbadClass.query_objects_bulk`
+    in a table with a (masked) row per name of ``names``.
+    """
+    # stack each table of rows once, however many names it resolved
+    tables = OrderedDict()
+    for status, message, table, row in results.values():
+        if table is not None and id(table) not in tables:
+            tables[id(table)] = table
+    offsets = dict(zip(tables, np.cumsum([0] + [len(table) for table
+                                                in tables.values()])))
+    rows = np.array([-1 if results[name][2] is None
+                     else offsets[id(results[name][2])] + results[name][3]
+                     for name in names], dtype=int)
+
+    if tables:
+        found = Table(vstack(list(tables.values()),
+                             metadata_conflicts='silent'), masked=True)
+        aligned = found[np.maximum(rows, 0)]
+        for column in aligned.itercols():
+            column.mask[rows < 0] = True
+    else:
+        aligned = Table(masked=True)
+    aligned['TYPED_ID'] = names
+    aligned['STATUS'] = [results[name][0] for name in names]
+    aligned['MESSAGE'] = [results[name][1] for name in names]
+    return aligned
+
+
+def _tag_region_batches(tables, bounds, positions, radii):
+    """
+    Merge the tables of the scripts of a multi-position query sent in
+    batches, whose positions ``positions[bounds[i]:bounds[i + 1]]`` have the
+    radii ``radii`` (in degrees), adding the index of the position of each
+    row in an ``INPUT_INDEX`` column.
+
+    A row is repeated for each position of its script within the radius of
+    the object, or given the closest one if none is (e.g. due to the
+    rounding of the coordinates).
+    """
+    tagged = []
+    errors = []
+    for table, start, stop in zip(tables, bounds[:-1], bounds[1:]):
+        if table is None:
+            continue
+        errors.extend(table.errors)
+        ra_column, dec_column = table.colnames[-len(REGION_BATCH_FIELDS):]
+        ra = np.radians(np.asarray(table[ra_column], dtype=float))
+        dec = np.radians(np.asarray(table[dec_column], dtype=float))
+        table.remove_columns([ra_column, dec_column])
+
+        # one row per object, then one per position of the object below
+        keys = (np.asarray(table['MAIN_ID']) if 'MAIN_ID' in table.colnames
+                else np.char.mod('%.10f', ra) + np.char.mod('%+.10f', dec))
+        first = np.sort(np.unique(keys, return_index=True)[1])
+        table, ra, dec = table[first], ra[first], dec[first]
+
+        objects = np.stack([np.cos(dec) * np.cos(ra),
+                            np.cos(dec) * np.sin(ra), np.sin(dec)], axis=1)
+        cones = positions[start:stop].cartesian.xyz.value
+        min_cosines = np.cos(np.radians(radii[start:stop] * (1 + 1e-6)
+                                        + 1e-6))
+        rows, cone = [], []
+        # blocks of objects keep the matrix of cosines with the positions
+        # small
+        block_size = max(1, 2 ** 20 // cones.shape[1])
+        for block_start in range(0, len(objects), block_size):
+            cosines = np.dot(objects[block_start:block_start + block_size],
+                             cones)
+            inside = cosines >= min_cosines
+            outside = ~inside.any(axis=1)
+            inside[outside, np.argmax(cosines[outside], axis=1)] = True
+            block_rows, block_cone = np.nonzero(inside)
+            rows.append(block_start + block_rows)
+            cone.append(block_cone)
+        rows, cone = np.concatenate(rows), np.concatenate(cone)
+        order = np.lexsort((rows, cone))
+        table = table[rows[order]]
+        table['INPUT_INDEX'] = start + cone[order]
+        tagged.append(table)
+
+    if not tagged:
+        return None
+    result = vstack(tagged, metadata_conflicts='silent')
+    result.errors = errors
+    return result
+
+
 def _parse_coordinates(coordinates):
     try:
         c = commons.parse_coordinates(coordinates)
@@ -1086,6 +1500,10 @@ def _has_length(x):
 
 
 def _get_frame_coords(c):
+    if _has_length(c) and isinstance(c, (coord.SkyCoord,
+                                         coord.BaseCoordinateFrame)):
+        # format the whole array at once
+        return _get_frame_coords_vector(c)
     if _has_length(c):
         # deal with vectors differently
         parsed = [_get_frame_coords(cc) for cc in c]
@@ -1110,6 +1528,62 @@ def _get_frame_coords(c):
         raise ValueError("%s is not a valid coordinate" % c)
 
 
+def _get_frame_coords_vector(c):
+    """
+    Vectorized `_get_frame_coords`, for an array of coordinates.
+    """
+    frames = {'icrs': 'ICRS', 'fk4': 'FK4', 'fk5': 'FK5', 'galactic': 'GAL'}
+    if c.frame.name not in frames:
+        raise ValueError("%s is not a valid coordinate" % c)
+    c = c.ravel()
+    if c.frame.name == 'galactic':
+        lon = c.l.degree.astype(str)
+        lat = c.b.degree.astype(str)
+        lat = np.where(np.char.startswith(lat, '-'), lat,
+                       np.char.add('+', lat))
+    else:
+        lon, lat = _to_simbad_format_vector(c.ra, c.dec)
+    return (lon.tolist(), lat.tolist(), [frames[c.frame.name]] * len(lon))
+
+
+def _to_simbad_format_vector(ra, dec):
+    """
+    Vectorized `_to_simbad_format`, for arrays of angles.
+    """
+    sign = np.where(np.signbit(dec.degree), '-', '+')
+    return (_format_sexagesimal(ra.hour),
+            np.char.add(sign, _format_sexagesimal(dec.degree)))
+
+
+def _format_sexagesimal(values):
+    """
+    Format an array of values as ``units:mm:ss.ssssssss`` strings, without
+    sign and with the trailing zeros of the seconds removed.
+
+    The fields are split and rounded with the same floating point
+    operations as `~astropy.coordinates.Angle.to_string`, so that the
+    strings are identical to those of `_to_simbad_format`.
+    """
+    fraction, units = np.modf(np.abs(values))
+    fraction, minutes = np.modf(fraction * 60.0)
+    seconds = fraction * 60.0
+    # carry the seconds rounded up to 60 at the precision of 1e-8
+    carry = seconds >= 60.0 - 1e-8
+    seconds = np.where(carry, 0.0, seconds)
+    minutes = minutes + carry
+    carry = minutes >= 60.0
+    minutes = np.where(carry, 0.0, minutes)
+    units = units + carry
+
+    seconds = np.char.rstrip(np.char.rstrip(np.char.mod('%.8f', seconds),
+                                            '0'), '.')
+    seconds = np.where((np.char.str_len(seconds) == 1)
+                       | (np.char.find(seconds, '.') == 1),
+                       np.char.add('0', seconds), seconds)
+    return np.char.add(np.char.add(np.char.mod('%d:', units),
+                                   np.char.mod('%02d:', minutes)), seconds)
+
+
 def _to_simbad_format(ra, dec):
     # This irrelevantly raises the exception
     # "AttributeError: Angle instance has no attribute 'hour'"
@@ -4,6 +4,7 @@ import re
 
 import six
 import pytest
+import requests
 import astropy.units as u
 from astropy.table import Table
 import numpy as np
@@ -308,6 +309,203 @@ def test_query_object_async(patch_post, object_name, wildcard):
     assert response1.content == response2.content
 
 
+REGION_VOTABLE = """<?xml version="1.0" encoding="UTF-8"?>
+<VOTABLE xmlns="http://www.ivoa.net/xml/VOTable/v1.2" version="1.2">
+<RESOURCE name="Simbad query" type="results">
+<TABLE ID="SimbadScript" name="default">
+<FIELD ID="MAIN_ID" name="MAIN_ID" datatype="char" arraysize="*"/>
+<FIELD ID="RA_d" name="RA_d" datatype="double"/>
+<FIELD ID="DEC_d" name="DEC_d" datatype="double"/>
+<DATA>
+<TABLEDATA>
+{rows}
+</TABLEDATA>
+</DATA>
+</TABLE>
+</RESOURCE>
+</VOTABLE>
+"""
+
+
+class RegionScripts(object):
+    """Runs the ``query coo`` scripts of multi-position region queries."""
+
+    objects = {'A': (10.005, 10), 'B': (20, 20.01), 'C': (30.5, 30),
+               'D': (40, -40)}
+
+    def __init__(self):
+        self.scripts = []
+
+    def __call__(self, method, url, data=None, **kwargs):
+        script = data['script']
+        self.scripts.append(script)
+        rows = []
+        for name, (ra, dec) in sorted(self.objects.items()):
+            for line in script.splitlines():
+                if not line.startswith('query coo '):
+                    continue
+                ra_, dec_, radius = line.split()[2:5]
+                center = commons.ICRSCoordGenerator(ra_, dec_,
+                                                    unit=(u.hour, u.deg))
+                position = commons.ICRSCoordGenerator(ra, dec, unit=u.deg)
+                radius = float(radius[len('radius='):-1]) * u.arcmin
+                if center.separation(position) <= radius:
+                    rows.append("<TR><TD>{0}</TD><TD>{1}</TD><TD>{2}</TD>"
+                                "</TR>".format(name, ra, dec))
+                    break
+        response = requests.Response()
+        response._content = ("::script::\n\n" + script + "\n\n::data::\n\n"
+                             + REGION_VOTABLE.format(rows="\n".join(rows))
+                             ).encode()
+        response.status_code = 200
+        response.url = url
+        return response
+
+
+def test_query_region_batches(tmpdir, monkeypatch):
+    sb = simbad.SimbadClass()
+    sb.cache_location = str(tmpdir)
+    scripts = RegionScripts()
+    monkeypatch.setattr(sb._session, 'request',
+                        lambda *args, **kwargs: scripts(*args, **kwargs))
+    # the regions of the first two positions overlap on A
+    positions = commons.ICRSCoordGenerator([10, 10.01, 20, 30, 40],
+                                           [10, 10, 20, 30, -40], unit=u.deg)
+
+    payloads = sb.query_region(positions, radius=1 * u.arcmin, batch_size=2,
+                               get_query_payload=True)
+    assert [payload['script'].count('query coo') for payload in payloads] \
+        == [1, 2, 2]
+    assert payloads[0]['script'] == (
+        'votable {main_id,coordinates,ra(d),dec(d)}\nvotable open\n'
+        'query coo 0:40:00 +10:00:00 radius=1.0m frame=ICRS equi=2000.0\n'
+        'votable close')
+
+    result = sb.query_region(positions, radius=1 * u.arcmin, batch_size=2)
+    assert len(scripts.scripts) == 3
+    assert result.colnames == ['MAIN_ID', 'INPUT_INDEX']
+    assert list(result['MAIN_ID']) == ['A', 'A', 'B', 'D']
+    assert list(result['INPUT_INDEX']) == [0, 1, 2, 4]
+
+    # the responses carry their positions, for interleaved queries
+    first = sb.query_region_async(positions, radius=1 * u.arcmin,
+                                  batch_size=2)
+    second = sb.query_region_async(positions[::-1], radius=1 * u.arcmin,
+                                   batch_size=2)
+    result = sb._parse_result(second)
+    assert list(result['MAIN_ID']) == ['D', 'B', 'A', 'A']
+    assert list(result['INPUT_INDEX']) == [0, 2, 3, 4]
+    for _ in range(2):
+        result = sb._parse_result(first)
+        assert list(result['INPUT_INDEX']) == [0, 1, 2, 4]
+
+
+@pytest.mark.parametrize('coordinates', [
+    multicoords, GALACTIC_COORDS, FK4_COORDS, FK5_COORDS,
+    commons.ICRSCoordGenerator([0, 359.9999999999, 83.82207],
+                               [0, 89.99999999999, -0.5], unit=u.deg)])
+def test_get_frame_coords_vector(coordinates):
+    coordinates = coordinates.reshape(-1)
+    expected = [simbad.core._get_frame_coords(c) for c in coordinates]
+    assert simbad.core._get_frame_coords(coordinates) == tuple(
+        list(column) for column in zip(*expected))
+
+
+BULK_VOTABLE = """<?xml version="1.0" encoding="UTF-8"?>
+<VOTABLE xmlns="http://www.ivoa.net/xml/VOTable/v1.2" version="1.2">
+<RESOURCE name="Simbad query" type="results">
+<TABLE ID="SimbadScript" name="default">
+<FIELD ID="MAIN_ID" name="MAIN_ID" datatype="char" arraysize="*"/>
+<DATA>
+<TABLEDATA>
+{rows}
+</TABLEDATA>
+</DATA>
+</TABLE>
+</RESOURCE>
+</VOTABLE>
+"""
+
+
+class BulkScripts(object):
+    """Runs the ``query id`` scripts of `query_objects_bulk`."""
+
+    def __init__(self):
+        self.scripts = []
+        self.crash = True
+
+    def __call__(self, method, url, data=None, **kwargs):
+        script = data['script']
+        self.scripts.append(script)
+        response = requests.Response()
+        response.url = url
+        if self.crash and 'crash' in script:
+            response.status_code = 500
+            response._content = b''
+            return response
+        errors, rows = [], []
+        for line, text in enumerate(script.splitlines(), 1):
+            if text.startswith('query id '):
+                name = text[len('query id '):]
+                if name.startswith('bad'):
+                    errors.append("[{0}] '{1}': No known catalog could be "
+                                  "found".format(line, name))
+                else:
+                    rows.append("<TR><TD>NAME {0}</TD></TR>".format(name))
+        content = "::script::\n\n" + script + "\n\n::console::\n\n"
+        if errors:
+            content += "::error::\n\n" + "\n".join(errors) + "\n\n"
+        content += "::data::\n\n" + BULK_VOTABLE.format(rows="\n".join(rows))
+        response._content = content.encode()
+        response.status_code = 200
+        return response
+
+
+def test_query_objects_bulk(tmpdir, monkeypatch):
+    sb = simbad.SimbadClass()
+    sb.cache_location = str(tmpdir)
+    scripts = BulkScripts()
+    monkeypatch.setattr(sb._session, 'request',
+                        lambda *args, **kwargs: scripts(*args, **kwargs))
+    names = ['m1', 'bad1', 'm2', 'm1', 'crash', 'm3']
+
+    with pytest.warns(UserWarning, match='3 of the 6 names were not resolved'):
+        result = sb.query_objects_bulk(names, batch_size=2)
+    # the 5 distinct names are split into 3 scripts
+    assert sorted(scripts.scripts) == sorted(
+        ['votable {main_id,coordinates}\nvotable open\n' + lines
+         + '\nvotable close' for lines in ['query id m1',
+                                           'query id bad1\nquery id m2',
+                                           'query id crash\nquery id m3']])
+    assert list(result['TYPED_ID']) == names
+    assert list(result['STATUS']) == ['ok', 'not found', 'ok', 'ok',
+                                      'failed', 'failed']
+    assert 'No known catalog' in result['MESSAGE'][1]
+    assert '500' in result['MESSAGE'][4]
+    assert list(result['MAIN_ID'].filled('')) == [
+        'NAME m1', '', 'NAME m2', 'NAME m1', '', '']
+
+    # only the failed names are sent again
+    scripts.crash = False
+    with pytest.warns(UserWarning, match='1 of the 6 names'):
+        result = sb.query_objects_bulk(names, batch_size=2)
+    assert scripts.scripts[3:] == ['votable {main_id,coordinates}\nvotable '
+                                   'open\nquery id crash\nquery id m3'
+                                   '\nvotable close']
+    assert list(result['STATUS']) == ['ok', 'not found', 'ok', 'ok',
+                                      'ok', 'ok']
+    assert list(result['MAIN_ID'].filled('')) == [
+        'NAME m1', '', 'NAME m2', 'NAME m1', 'NAME crash', 'NAME m3']
+
+    with pytest.warns(UserWarning, match='1 of the 3 names'):
+        result = sb.query_objects_bulk(['m3', 'bad1', 'm1'])
+    assert len(scripts.scripts) == 4
+    assert list(result['MAIN_ID'].filled('')) == ['NAME m3', '', 'NAME m1']
+
+    sb.query_objects_bulk(['m3'], cache=False)
+    assert len(scripts.scripts) == 5
+
+
 @pytest.mark.parametrize(('object_name', 'wildcard'),
                          [("m1", None),
                           ("m [0-9]", True),
@@ -0,0 +1,194 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import asyncio
+import functools
+import sys
+
+import pytest
+import requests
+
+from .. import query
+from ..utils import async_to_sync
+
+
+@async_to_sync
+class ChainedQuery(query.BaseQuery):
+    """Looks up an identifier, then queries with it."""
+
+    URL = 'http://localhost/'
+    _coroutine_methods = ('query_object_async', 'query_objects_async')
+
+    def query_object_async(self, name, get_query_payload=False):
+        """
+        Returns
+        -------
+        response : `requests.Response`
+        """
+        payload = {'name': name}
+        if get_query_payload:
+            return payload
+        try:
+            ident = self._request('GET', self.URL + 'resolve',
+                                  params=payload).text
+        except Exception:
+            # must not intercept the requests awaited by the coroutines
+            raise RuntimeError("resolve failed")
+        return self._request('POST', self.URL + 'query',
+                             data={'ident': ident})
+
+    def query_objects_async(self, names):
+        """
+        Returns
+        -------
+        responses : list of `requests.Response`
+        """
+        responses = self._request_many(
+            [dict(method='GET', url=self.URL + 'resolve',
+                  params={'name': name}) for name in names])
+        return self._request_many(
+            [dict(method='POST', url=self.URL + 'query',
+                  data={'ident': response.text}) for response in responses])
+
+    def query_counter_async(self):
+        """
+        Returns
+        -------
+        response : `requests.Response`
+        """
+        # a side effect that changes the requests when the method is rerun
+        self.counter = getattr(self, 'counter', 0) + 1
+        self._request('GET', self.URL + 'resolve',
+                      params={'name': self.counter})
+        return self._request('GET', self.URL + 'resolve',
+                             params={'name': 'last'})
+
+    def _parse_result(self, response, verbose=False):
+        if isinstance(response, list):
+            return [r.text for r in response]
+        return response.text
+
+
+def mock_response(method, url, params=None, data=None):
+    response = requests.Response()
+    if url.endswith('resolve'):
+        response._content = 'id-{0}'.format(params['name']).encode()
+    else:
+        response._content = 'result-{0}'.format(data['ident']).encode()
+    response.status_code = 200
+    response.url = url
+    return response
+
+
+@pytest.fixture
+def chained(tmpdir, monkeypatch):
+    qu = ChainedQuery()
+    qu.cache_location = str(tmpdir)
+    calls = []
+
+    def mock_request(method, url, params=None, data=None, **kwargs):
+        calls.append(url)
+        if params and params.get('name') == 'unknown':
+            raise requests.exceptions.ConnectionError(url)
+        return mock_response(method, url, params=params, data=data)
+
+    monkeypatch.setattr(qu._session, 'request', mock_request)
+    qu.calls = calls
+    return qu
+
+
+def test_coroutine_generated():
+    assert asyncio.iscoroutinefunction(ChainedQuery.aquery_object)
+    assert 'Coroutine' in ChainedQuery.aquery_object.__doc__
+    # only for the methods listed in _coroutine_methods
+    assert hasattr(ChainedQuery, 'query_counter')
+    assert not hasattr(ChainedQuery, 'aquery_counter')
+
+
+def test_aquery_executor(chained, monkeypatch):
+    # without httpx, requests run in the default executor
+    monkeypatch.setitem(sys.modules, 'httpx', None)
+
+    async def main():
+        return await asyncio.gather(*[chained.aquery_object(name)
+                                      for name in ('m1', 'm31', 'm1')])
+
+    assert asyncio.run(main()) == ['result-id-m1', 'result-id-m31',
+                                   'result-id-m1']
+    assert chained.query_object('m1') == 'result-id-m1'
+    assert asyncio.run(chained.aquery_object('m1', get_query_payload=True)) \
+        == {'name': 'm1'}
+
+
+def test_aquery_httpx(chained, monkeypatch):
+    httpx = pytest.importorskip('httpx')
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        if request.url.path == '/resolve':
+            params = dict(request.url.params)
+            return httpx.Response(200, content=mock_response(
+                'GET', 'http://localhost/resolve', params=params).content)
+        data = dict(p.split('=') for p in request.content.decode().split('&'))
+        return httpx.Response(200, content=mock_response(
+            'POST', str(request.url), data=data).content)
+
+    monkeypatch.setattr(httpx, 'AsyncClient', functools.partial(
+        httpx.AsyncClient, transport=httpx.MockTransport(handler)))
+
+    async def main():
+        return await asyncio.gather(chained.aquery_object('m1'),
+                                    chained.aquery_object('m31'))
+
+    assert asyncio.run(main()) == ['result-id-m1', 'result-id-m31']
+    assert len(sent) == 4
+    assert chained.calls == []
+    assert sent[0].headers['User-Agent'].startswith('astroquery')
+
+    # responses were cached like those of _request
+    assert chained.query_object('m31') == 'result-id-m31'
+    assert chained.calls == []
+    response = chained.cache_backend.get(chained._last_query.hash())
+    assert response.request.body == 'ident=id-m31'
+
+
+def test_aquery_replay(chained, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'httpx', None)
+
+    # the errors of the requests are raised within the query method
+    with pytest.raises(RuntimeError, match='resolve failed'):
+        asyncio.run(chained.aquery_object('unknown'))
+
+    # the requests are checked against the recorded ones when replayed
+    with pytest.raises(RuntimeError, match='different request'):
+        asyncio.run(chained._arun(chained.query_counter_async))
+
+
+def test_aquery_httpx_request_many(chained, monkeypatch):
+    httpx = pytest.importorskip('httpx')
+    sent = []
+    clients = []
+
+    def handler(request):
+        sent.append(request)
+        if request.url.path == '/resolve':
+            return httpx.Response(200, content='id-{0}'.format(
+                request.url.params['name']).encode())
+        return httpx.Response(200, content=b'result-'
+                              + request.content.split(b'=')[1])
+
+    def client(cls=httpx.AsyncClient, **kwargs):
+        clients.append(cls(transport=httpx.MockTransport(handler), **kwargs))
+        return clients[-1]
+
+    monkeypatch.setattr(httpx, 'AsyncClient', client)
+
+    result = asyncio.run(chained.aquery_objects(['m1', 'm31', 'm1']))
+    assert result == ['result-id-m1', 'result-id-m31', 'result-id-m1']
+    # the requests are awaited rather than sent from the thread pool, and
+    # identical requests are sent once
+    assert chained.calls == []
+    assert len(sent) == 4
+    # the clients are closed once the query is done
+    assert len(clients) == 1
+    assert clients[0].is_closed
+    assert len(chained._async_state) == 0
@@ -0,0 +1,189 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import json
+import os
+import pickle
+import time
+
+import requests
+
+from .. import query
+from ..utils.cache import FileCache, CachedResponse
+
+
+def make_response(content=b'0123456789', url='http://localhost/'):
+    response = requests.Response()
+    response._content = content
+    response.status_code = 200
+    response.url = url
+    return response
+
+
+def make_key(i):
+    return '{0:056x}'.format(i)
+
+
+def age(cache, key, seconds):
+    then = time.time() - seconds
+    for suffix in (cache.payload_suffix, cache.meta_suffix):
+        path = cache._path(key, suffix)
+        if os.path.exists(path):
+            os.utime(path, (then, then))
+
+
+def test_put_get(tmpdir):
+    cache = FileCache(str(tmpdir), timeout=0, max_size=0)
+    key = make_key(1)
+    assert cache.get(key) is None
+
+    cache.put(key, make_response(), source='test')
+    response = cache.get(key)
+    assert isinstance(response, CachedResponse)
+    assert response.content == b'0123456789'
+    response.close()
+
+    with open(cache._path(key, cache.payload_suffix), 'rb') as f:
+        assert f.read() == b'0123456789'
+    with open(cache._path(key, cache.meta_suffix)) as f:
+        meta = json.load(f)
+    assert meta['key'] == key
+    assert meta['url'] == 'http://localhost/'
+    assert meta['source'] == 'test'
+    assert meta['size'] == 10
+    # no temporary files are left behind
+    assert sorted(os.listdir(str(tmpdir))) == [key + '.body', key + '.json']
+
+    cache.delete(key)
+    assert cache.get(key) is None
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_timeout(tmpdir):
+    cache = FileCache(str(tmpdir), timeout=60, max_size=0)
+    key = make_key(1)
+    cache.put(key, make_response())
+    age(cache, key, 30)
+    assert cache.get(key) is not None
+    age(cache, key, 120)
+    assert cache.get(key) is None
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_lru_eviction(tmpdir):
+    cache = FileCache(str(tmpdir), timeout=0, max_size=0)
+    keys = [make_key(i) for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, make_response(content=b'x' * 1000))
+        age(cache, key, 100 - i)
+    total = sum(entry['size'] for entry in cache.entries().values())
+
+    # reading the oldest entry makes it the most recently used one
+    assert cache.get(keys[0]) is not None
+
+    cache.max_size = total - 1
+    assert cache.evict() == 1
+    assert set(cache.entries()) == {keys[0], keys[2], keys[3]}
+
+    # storing a new entry keeps the cache within budget
+    cache.put(make_key(10), make_response(content=b'x' * 1500))
+    assert set(cache.entries()) == {keys[0], keys[3], make_key(10)}
+
+
+def test_foreign_files_untouched(tmpdir):
+    cache = FileCache(str(tmpdir), timeout=1, max_size=1)
+    tmpdir.join('products.json').write('{}')
+    tmpdir.join('image.fits').write('SIMPLE')
+    cache.put(make_key(1), make_response())
+    age(cache, make_key(1), 10)
+    cache.evict()
+    cache.clear()
+    assert sorted(os.listdir(str(tmpdir))) == ['image.fits', 'products.json']
+
+
+def test_cached_response(tmpdir):
+    cache = FileCache(str(tmpdir), timeout=0, max_size=0)
+    key = make_key(1)
+    original = make_response(content=b'{"a": [1, 2]}')
+    original.headers['Content-Type'] = 'application/json'
+    original.request = requests.Request(
+        'POST', 'http://localhost/', data={'raty': 'a'}).prepare()
+    cache.put(key, original)
+
+    response = cache.get(key)
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/json'
+    assert response.request.method == 'POST'
+    assert 'raty=a' in response.request.body
+    assert b''.join(response.iter_content(4)) == b'{"a": [1, 2]}'
+
+    response = cache.get(key)
+    body = response.body_mmap()
+    assert body[:5] == b'{"a":'
+    body.close()
+    assert response.json() == {'a': [1, 2]}
+    assert response.text == '{"a": [1, 2]}'
+
+
+def test_cached_response_files_closed(tmpdir, monkeypatch):
+    cache = FileCache(str(tmpdir), timeout=0, max_size=0)
+    cache.put(make_key(1), make_response())
+    cache.put(make_key(2), make_response(content=b'x' * 100))
+    monkeypatch.setattr(CachedResponse, 'eager_size', 10)
+
+    # small bodies are read right away, larger ones only when needed
+    responses = [cache.get(make_key(1)) for i in range(2000)]
+    assert all(response.raw is None for response in responses)
+    assert responses[-1].content == b'0123456789'
+
+    response = cache.get(make_key(2))
+    assert response._raw is None
+    assert response.content == b'x' * 100
+    assert response.raw.closed
+    response = cache.get(make_key(2))
+    assert b''.join(response.iter_content(30)) == b'x' * 100
+    response.close()
+    assert response.raw.closed
+
+
+def test_legacy_entry(tmpdir):
+    cache = FileCache(str(tmpdir), timeout=0, max_size=0)
+    key = make_key(1)
+    legacy_file = cache._path(key, cache.legacy_suffix)
+    with open(legacy_file, 'wb') as f:
+        pickle.dump(make_response(), f)
+    age(cache, key, 3600)
+    os.utime(legacy_file, (time.time() - 3600,) * 2)
+
+    # pickles are never loaded, and are cleaned up on eviction
+    assert cache.get(key) is None
+    cache.evict()
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_request_cache(tmpdir, monkeypatch):
+    calls = []
+
+    def mock_request(method, url, **kwargs):
+        calls.append(url)
+        return make_response(url=url)
+
+    qu = query.BaseQuery()
+    qu.cache_location = str(tmpdir)
+    monkeypatch.setattr(qu._session, 'request', mock_request)
+
+    first = qu._request('GET', 'http://localhost/a')
+    second = qu._request('GET', 'http://localhost/a')
+    assert first.content == second.content
+    assert calls == ['http://localhost/a']
+    assert qu.cache_backend.location == str(tmpdir)
+
+    qu._request('GET', 'http://localhost/a', cache=False)
+    assert len(calls) == 2
+
+    qu.clear_cache()
+    qu._request('GET', 'http://localhost/a')
+    assert len(calls) == 3
+
+    qu.cache_location = None
+    assert qu.cache_backend is None
+    qu._request('GET', 'http://localhost/a')
+    assert len(calls) == 4
@@ -0,0 +1,134 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from .. import query
+
+DATA = bytes(bytearray(range(256))) * 4000
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves ``DATA``, honouring range requests unless told otherwise."""
+
+    honour_ranges = True
+    ranges = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_data(head=True)
+
+    def do_GET(self):
+        self.send_data()
+
+    def send_data(self, head=False):
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match and self.honour_ranges:
+            start = int(match.group(1))
+            stop = int(match.group(2) or len(DATA) - 1) + 1
+            self.ranges.append((start, stop))
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(
+                start, stop - 1, len(DATA)))
+        else:
+            start, stop = 0, len(DATA)
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(stop - start))
+        self.end_headers()
+        if not head:
+            self.wfile.write(DATA[start:stop])
+
+
+@pytest.fixture
+def server():
+    RangeHandler.ranges = []
+    RangeHandler.honour_ranges = True
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:{0}/data.bin'.format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def baseq(tmpdir, monkeypatch):
+    from astroquery import request_conf
+    monkeypatch.setattr(request_conf, 'min_segment_size', 1000)
+    qu = query.BaseQuery()
+    qu.cache_location = str(tmpdir)
+    return qu
+
+
+@pytest.mark.parametrize('head_safe', [False, True])
+def test_segmented_download(server, baseq, tmpdir, head_safe):
+    local_filepath = str(tmpdir.join('data.bin'))
+    response = baseq._download_file(server, local_filepath, segments=4,
+                                    head_safe=head_safe)
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    with open(local_filepath, 'rb') as f:
+        assert f.read() == DATA
+    assert sorted(RangeHandler.ranges) == [
+        (len(DATA) * i // 4, len(DATA) * (i + 1) // 4) for i in range(4)]
+    assert not os.path.exists(local_filepath + '.part')
+
+
+def test_segmented_download_fallback(server, baseq, tmpdir):
+    RangeHandler.honour_ranges = False
+    local_filepath = str(tmpdir.join('data.bin'))
+    baseq._download_file(server, local_filepath, segments=4)
+    with open(local_filepath, 'rb') as f:
+        assert f.read() == DATA
+    assert not os.path.exists(local_filepath + '.part')
+
+
+def test_single_stream_download(server, baseq, tmpdir):
+    local_filepath = str(tmpdir.join('data.bin'))
+    baseq._download_file(server, local_filepath)
+    with open(local_filepath, 'rb') as f:
+        assert f.read() == DATA
+    assert RangeHandler.ranges == []
+
+
+def test_resume_download(server, baseq, tmpdir):
+    local_filepath = str(tmpdir.join('data.bin'))
+    with open(local_filepath, 'wb') as f:
+        f.write(DATA[:1024])
+    baseq._download_file(server, local_filepath, continuation=True)
+    with open(local_filepath, 'rb') as f:
+        assert f.read() == DATA
+    assert RangeHandler.ranges == [(1024, len(DATA))]
+    assert 'Range' not in baseq._session.headers
+
+    # a server ignoring the range sends the whole file again
+    RangeHandler.honour_ranges = False
+    with open(local_filepath, 'wb') as f:
+        f.write(DATA[:1024])
+    baseq._download_file(server, local_filepath, continuation=True)
+    with open(local_filepath, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_concurrent_downloads(server, baseq, tmpdir):
+    # partial files are resumed while fresh downloads run alongside
+    paths = [str(tmpdir.join('data{0}.bin'.format(i))) for i in range(8)]
+    for path in paths[::2]:
+        with open(path, 'wb') as f:
+            f.write(DATA[:2048])
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda path: baseq._download_file(server, path),
+                      paths))
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read() == DATA
+    assert sorted(RangeHandler.ranges) == [(2048, len(DATA))] * 4
@@ -0,0 +1,74 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import io
+
+import pytest
+
+from ..query import AstroQuery
+
+
+class RecordingFile(io.BytesIO):
+    """Records the sizes of the reads made from it."""
+
+    def __init__(self, *args):
+        super(RecordingFile, self).__init__(*args)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super(RecordingFile, self).read(size)
+
+
+def test_hash_stable():
+    # The key schema is documented and must not change between versions
+    # of Python or astroquery, or existing cache entries are lost.
+    query = AstroQuery('GET', 'http://localhost/',
+                       params={'ra': 10.5, 'dec': None, 'name': 'M 31'},
+                       headers={'Accept': 'text/plain'})
+    assert query.hash() == ('c2df8f82d18877c808504cb02fd21dca'
+                            '9b250bb7f0db356f20ea0825')
+
+
+def test_hash_canonical():
+    params = {'a': 1, 'b': [1, 2], 'c': None}
+    reordered = {'c': None, 'b': [1, 2], 'a': 1}
+    assert (AstroQuery('GET', 'http://localhost/', params=params).hash()
+            == AstroQuery('GET', 'http://localhost/', params=reordered).hash())
+    assert (AstroQuery('GET', 'http://localhost/', params=[('a', 1), ('b', 2)])
+            .hash() == AstroQuery('GET', 'http://localhost/',
+                                  params=[('b', 2), ('a', 1)]).hash())
+
+    keys = {AstroQuery('GET', 'http://localhost/', params=params).hash(),
+            AstroQuery('POST', 'http://localhost/', params=params).hash(),
+            AstroQuery('GET', 'http://localhost/', data=params).hash(),
+            AstroQuery('GET', 'http://localhost/',
+                       params={'a': 1, 'b': [2, 1], 'c': None}).hash(),
+            AstroQuery('GET', 'http://localhost/',
+                       params={'a': '1', 'b': [1, 2], 'c': None}).hash(),
+            AstroQuery('GET', 'http://localhost/',
+                       params={'a': 1, 'b': [1, 2], 'c': ''}).hash()}
+    assert len(keys) == 6
+
+
+def test_hash_files():
+    content = b'x' * (3 * 2 ** 20 + 5)
+    upload = RecordingFile(content)
+    upload.seek(10)
+    key = AstroQuery('POST', 'http://localhost/',
+                     files={'table': upload}).hash()
+
+    # the upload is read in bounded chunks and rewound
+    assert all(0 < size <= 2 ** 20 for size in upload.reads)
+    assert upload.tell() == 10
+
+    upload.seek(10)
+    assert key == AstroQuery('POST', 'http://localhost/',
+                             files={'table': io.BytesIO(content[10:])}).hash()
+    assert key != AstroQuery('POST', 'http://localhost/',
+                             files={'table': io.BytesIO(content)}).hash()
+    assert key != AstroQuery('POST', 'http://localhost/',
+                             files={'table': ('t.vot', upload)}).hash()
+
+
+def test_hash_type_error():
+    with pytest.raises(TypeError):
+        AstroQuery('GET', 'http://localhost/', params=object()).hash()
@@ -0,0 +1,132 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import threading
+import time
+
+import pytest
+import requests
+
+from .. import query
+
+
+class MockSession(object):
+    """Records the requests made, and the peak concurrency per host."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.calls = []
+        self.active = {}
+        self.peak = {}
+        self.lock = threading.Lock()
+        self.session = requests.session()
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def request(self, method, url, params=None, **kwargs):
+        host = url.split('/')[2]
+        with self.lock:
+            self.calls.append((url, params))
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[host] -= 1
+        if params and params.get('fail'):
+            raise requests.exceptions.ConnectionError(url)
+        response = requests.Response()
+        response._content = '{0} {1}'.format(url, params).encode()
+        response.status_code = 200
+        response.url = url
+        return response
+
+
+@pytest.fixture
+def baseq(tmpdir):
+    qu = query.BaseQuery()
+    qu.cache_location = str(tmpdir)
+    qu._session = MockSession()
+    return qu
+
+
+def test_request_many_order(baseq):
+    queries = [query.AstroQuery('GET', 'http://host{0}/'.format(i % 2),
+                                params={'i': i})
+               for i in range(20)]
+    responses = baseq._request_many(queries, max_workers=8, max_per_host=3)
+    assert [r.content for r in responses] == [
+        '{0} {1}'.format(q.url, q.params).encode() for q in queries]
+    assert len(baseq._session.calls) == 20
+    assert max(baseq._session.peak.values()) <= 3
+
+
+def test_request_many_cache_and_duplicates(baseq):
+    first = dict(method='GET', url='http://host/', params={'i': 1})
+    baseq._request_many([first])
+    assert len(baseq._session.calls) == 1
+
+    second = dict(method='GET', url='http://host/', params={'i': 2})
+    responses = baseq._request_many([first, second, second])
+    # the first request is served from the cache, the duplicate is sent once
+    assert len(baseq._session.calls) == 2
+    assert responses[1].content == responses[2].content
+
+    baseq._request_many([first, second], cache=False)
+    assert len(baseq._session.calls) == 4
+
+
+def test_request_many_exceptions(baseq):
+    queries = [dict(method='GET', url='http://host/', params={'fail': i == 1})
+               for i in range(3)]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        baseq._request_many(queries, cache=False)
+
+    responses = baseq._request_many(queries, cache=False,
+                                    return_exceptions=True)
+    assert isinstance(responses[1], requests.exceptions.ConnectionError)
+    assert responses[0].status_code == responses[2].status_code == 200
+
+
+def test_request_many_as_completed(baseq):
+    queries = [dict(method='GET', url='http://host/', params={'i': i})
+               for i in range(5)]
+    results = baseq._request_many(queries, as_completed=True)
+    assert sorted(index for index, _ in results) == list(range(5))
+
+
+def test_request_many_as_completed_window(baseq):
+    # requests are only sent a little ahead of the responses consumed
+    queries = [dict(method='GET', url='http://host/', params={'i': i})
+               for i in range(20)]
+    results = baseq._request_many(queries, max_workers=2, as_completed=True)
+    next(results)
+    time.sleep(0.1)
+    assert len(baseq._session.calls) <= 5
+    assert len(list(results)) == 19
+    assert len(baseq._session.calls) == 20
+
+
+def test_suspend_cache_thread_local(baseq):
+    suspended = threading.Event()
+    done = threading.Event()
+    active = []
+
+    def suspend():
+        with query.suspend_cache(baseq):
+            with query.suspend_cache(baseq):
+                pass
+            active.append(baseq._cache_active)
+            suspended.set()
+            done.wait(5)
+        active.append(baseq._cache_active)
+
+    thread = threading.Thread(target=suspend)
+    thread.start()
+    suspended.wait(5)
+    # other threads keep using the cache while one of them suspends it
+    assert baseq._cache_active
+    baseq._request('GET', 'http://host/', params={'i': 1})
+    baseq._request('GET', 'http://host/', params={'i': 1})
+    done.set()
+    thread.join()
+    assert len(baseq._session.calls) == 1
+    assert active == [False, True]
@@ -36,8 +36,8 @@ def test_resume():
 
     result_2 = qu._request('GET', target_url, save=True, continuation=True)
 
-    assert 'range' in qu._session.headers
-    assert qu._session.headers['range'] == 'bytes={0}-{1}'.format(1024, length-1)
+    # the range only applied to the resumed request
+    assert 'range' not in qu._session.headers
 
     with open(result_2, 'rb') as fh:
         data = fh.read()
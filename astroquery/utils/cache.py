@@ -0,0 +1,427 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Response cache backends used by `~astroquery.query.BaseQuery._request`.
+"""
+import contextlib
+import datetime
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from astropy.logger import log
+
+__all__ = ['ResponseCache', 'FileCache', 'CachedResponse']
+
+
+class ResponseCache(object):
+    """
+    Interface of the response caches used by `~astroquery.query.BaseQuery`.
+
+    Entries are keyed by the request hash computed by
+    ``astroquery.query.AstroQuery.hash``.  A service can use a different
+    storage by assigning an instance of a subclass to its ``cache_backend``
+    attribute.
+    """
+
+    def get(self, key):
+        """
+        Return the cached response for ``key``, or `None` on a cache miss.
+        """
+        raise NotImplementedError
+
+    def put(self, key, response, **metadata):
+        """
+        Store ``response`` under ``key``.  Extra keyword arguments are kept as
+        entry metadata.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """
+        Remove the entry for ``key`` if it exists.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        raise NotImplementedError
+
+
+class CachedResponse(requests.Response):
+    """
+    A `requests.Response` served from a `FileCache` entry.
+
+    Status, headers and the originating request are restored from the entry
+    metadata.  Bodies of up to ``eager_size`` bytes are read when the
+    response is created, so that no file stays open.  Larger bodies stay on
+    disk until they are needed: ``raw`` opens the body file on first access,
+    so ``iter_content`` streams from disk, ``content`` reads the file once,
+    and `body_mmap` maps it into memory without copying it.
+
+    Parameters
+    ----------
+    body_file : str
+        Path of the raw response body.
+    metadata : dict
+        The entry metadata written by `FileCache.put`.
+    size : int, optional
+        Size of the body file in bytes, if already known.
+    """
+
+    eager_size = 1 << 20
+
+    def __init__(self, body_file, metadata, size=None):
+        super(CachedResponse, self).__init__()
+        self.body_file = body_file
+        self.status_code = metadata.get('status_code')
+        self.reason = metadata.get('reason')
+        self.url = metadata.get('url')
+        self.encoding = metadata.get('encoding')
+        self.headers = CaseInsensitiveDict(metadata.get('headers') or {})
+        self.elapsed = datetime.timedelta(seconds=metadata.get('elapsed') or 0)
+
+        request = metadata.get('request')
+        if request:
+            self.request = requests.PreparedRequest()
+            self.request.method = request.get('method')
+            self.request.url = request.get('url')
+            self.request.headers = CaseInsensitiveDict(
+                request.get('headers') or {})
+            self.request.body = request.get('body')
+
+        if size is None:
+            size = os.path.getsize(body_file)
+        if size <= self.eager_size:
+            with open(body_file, 'rb') as f:
+                self._content = f.read()
+            self._content_consumed = True
+
+    @property
+    def raw(self):
+        if self._raw is None and self._content is False:
+            self._raw = open(self.body_file, 'rb')
+        return self._raw
+
+    @raw.setter
+    def raw(self, value):
+        self._raw = value
+
+    @property
+    def content(self):
+        if self._content is False:
+            raw = self.raw
+            raw.seek(0)
+            self._content = raw.read()
+            self.close()
+            self._content_consumed = True
+        return self._content
+
+    def close(self):
+        if self._raw is not None:
+            self._raw.close()
+
+    def body_mmap(self):
+        """
+        Map the response body into memory.
+
+        Returns
+        -------
+        body : `mmap.mmap` or bytes
+            A read-only memory map of the body, or ``b''`` for an empty body.
+        """
+        with open(self.body_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _response_metadata(response):
+    """
+    JSON-serializable description of ``response``, without its body.
+    """
+    metadata = {
+        'status_code': getattr(response, 'status_code', None),
+        'reason': getattr(response, 'reason', None),
+        'url': getattr(response, 'url', None),
+        'encoding': getattr(response, 'encoding', None),
+        'headers': dict(getattr(response, 'headers', None) or {}),
+    }
+    elapsed = getattr(response, 'elapsed', None)
+    if elapsed is not None:
+        metadata['elapsed'] = elapsed.total_seconds()
+
+    request = getattr(response, 'request', None)
+    if request is not None:
+        body = request.body
+        if isinstance(body, bytes):
+            try:
+                body = body.decode('utf-8')
+            except UnicodeDecodeError:
+                # binary uploads are not kept
+                body = None
+        elif not isinstance(body, str):
+            body = None
+        metadata['request'] = {'method': request.method,
+                               'url': request.url,
+                               'headers': dict(request.headers or {}),
+                               'body': body}
+    return metadata
+
+
+class FileCache(ResponseCache):
+    """
+    Size-bounded on-disk response cache.
+
+    Each entry consists of the raw response body (``<key>.body``) and a small
+    JSON metadata file (``<key>.json``) holding the status, headers and
+    request of the response, the creation time and the body size.  Nothing is
+    unpickled when reading an entry: `get` returns a `CachedResponse` that
+    reads the body lazily.
+
+    The modification time of the metadata file records the last access, which
+    drives least-recently-used eviction once the entries take more than
+    ``max_size`` bytes.  Entries older than ``timeout`` seconds are treated as
+    missing.
+
+    The body is written before the metadata, and both are written to a
+    temporary name and renamed into place, so readers in other threads or
+    processes sharing the directory never see a partially written entry.  Any
+    other file in ``location`` (e.g. downloads made with ``save=True``) is
+    left alone, but pickled responses written by older versions of astroquery
+    are removed.
+
+    Parameters
+    ----------
+    location : str
+        The cache directory.
+    timeout : int or None
+        Lifetime of an entry in seconds, 0 to never expire.  Defaults to
+        ``astroquery.cache_conf.cache_timeout``.
+    max_size : int or None
+        Byte budget of the cache, 0 for unlimited.  Defaults to
+        ``astroquery.cache_conf.cache_max_size``.
+    """
+
+    payload_suffix = '.body'
+    meta_suffix = '.json'
+    legacy_suffix = '.pickle'
+    _tmp_prefix = '.tmp-'
+    # only files named after a request hash belong to the cache
+    _key_pattern = re.compile('^[0-9a-f]{56}$')
+    # incomplete entries younger than this (in seconds) may still be in the
+    # process of being written
+    _grace_period = 60
+
+    def __init__(self, location, timeout=None, max_size=None):
+        self.location = location
+        self._timeout = timeout
+        self._max_size = max_size
+        self._lock = threading.RLock()
+        # Running estimate of the cache size in bytes, None until the first
+        # directory scan
+        self._size = None
+
+    @property
+    def timeout(self):
+        if self._timeout is None:
+            from .. import cache_conf
+            return cache_conf.cache_timeout
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+
+    @property
+    def max_size(self):
+        if self._max_size is None:
+            from .. import cache_conf
+            return cache_conf.cache_max_size
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value):
+        self._max_size = value
+
+    def _path(self, key, suffix):
+        return os.path.join(self.location, key + suffix)
+
+    def _expired(self, created, now=None):
+        timeout = self.timeout
+        if not timeout:
+            return False
+        return (now or time.time()) - created > timeout
+
+    @contextlib.contextmanager
+    def _atomic_open(self, path):
+        fd, tmp_path = tempfile.mkstemp(prefix=self._tmp_prefix,
+                                        dir=self.location)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                yield f
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read_metadata(self, key):
+        """
+        Return the metadata of the entry for ``key``, or `None`.
+        """
+        try:
+            with open(self._path(key, self.meta_suffix), 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key):
+        metadata = self.read_metadata(key)
+        if metadata is None:
+            return None
+
+        body_file = self._path(key, self.payload_suffix)
+        try:
+            stat = os.stat(body_file)
+            if self._expired(stat.st_mtime):
+                log.debug("Cache entry {0} expired".format(body_file))
+                self.delete(key)
+                return None
+            response = CachedResponse(body_file, metadata, size=stat.st_size)
+        except OSError:
+            log.debug("Discarding incomplete cache entry {0}"
+                      .format(body_file))
+            self.delete(key)
+            return None
+
+        try:
+            os.utime(self._path(key, self.meta_suffix), None)
+        except OSError:
+            pass
+        log.debug("Retrieving data from {0}".format(body_file))
+        return response
+
+    def put(self, key, response, **metadata):
+        body_file = self._path(key, self.payload_suffix)
+        log.debug("Caching data to {0}".format(body_file))
+        with self._atomic_open(body_file) as f:
+            f.write(response.content or b'')
+        size = os.path.getsize(body_file)
+
+        metadata.update(_response_metadata(response))
+        metadata.update(key=key, created=time.time(), size=size)
+        with self._atomic_open(self._path(key, self.meta_suffix)) as f:
+            f.write(json.dumps(metadata, sort_keys=True).encode('utf-8'))
+
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+            max_size = self.max_size
+            if max_size and (self._size is None or self._size > max_size):
+                self.evict()
+
+    def delete(self, key):
+        for suffix in (self.payload_suffix, self.meta_suffix,
+                       self.legacy_suffix):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def entries(self):
+        """
+        Scan the cache directory.
+
+        Returns
+        -------
+        entries : dict
+            Maps each key to a dict with the entry ``size`` in bytes (body
+            and metadata), its ``created`` and last ``accessed`` times, and
+            whether the entry is ``complete``.
+        """
+        suffixes = (self.payload_suffix, self.meta_suffix, self.legacy_suffix)
+        entries = {}
+        try:
+            dir_entries = list(os.scandir(self.location))
+        except OSError:
+            return entries
+        for dir_entry in dir_entries:
+            key, suffix = os.path.splitext(dir_entry.name)
+            if suffix not in suffixes or not self._key_pattern.match(key):
+                continue
+            try:
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+            entry = entries.setdefault(key, {'size': 0, 'created': None,
+                                             'accessed': None,
+                                             'files': set()})
+            entry['size'] += stat.st_size
+            entry['files'].add(suffix)
+            if suffix == self.meta_suffix:
+                entry['accessed'] = stat.st_mtime
+            elif entry['created'] is None or stat.st_mtime < entry['created']:
+                entry['created'] = stat.st_mtime
+
+        complete = {self.payload_suffix, self.meta_suffix}
+        for entry in entries.values():
+            files = entry.pop('files')
+            entry['complete'] = files == complete
+            if entry['created'] is None:
+                entry['created'] = entry['accessed']
+            if entry['accessed'] is None:
+                entry['accessed'] = entry['created']
+        return entries
+
+    def evict(self):
+        """
+        Remove expired and incomplete entries, then the least recently used
+        ones until the cache fits within ``max_size``.
+
+        Returns
+        -------
+        removed : int
+            The number of entries removed.
+        """
+        with self._lock:
+            now = time.time()
+            entries = self.entries()
+            removed = 0
+            total = 0
+            live = []
+            for key, entry in entries.items():
+                if ((not entry['complete']
+                     and now - entry['accessed'] > self._grace_period)
+                        or self._expired(entry['created'], now)):
+                    self.delete(key)
+                    removed += 1
+                else:
+                    total += entry['size']
+                    live.append((entry['accessed'], entry['size'], key))
+
+            max_size = self.max_size
+            if max_size and total > max_size:
+                for _, size, key in sorted(live):
+                    if total <= max_size:
+                        break
+                    log.debug("Evicting cache entry {0}".format(key))
+                    self.delete(key)
+                    total -= size
+                    removed += 1
+
+            self._size = total
+        return removed
+
+    def clear(self):
+        with self._lock:
+            for key in self.entries():
+                self.delete(key)
+            self._size = 0
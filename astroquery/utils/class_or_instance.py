@@ -5,6 +5,7 @@ methods of a class so that they can be called either as a class method
 or as instance methods.
 """
 import functools
+import inspect
 
 __all__ = ["class_or_instance"]
 
@@ -25,6 +26,12 @@ class class_or_instance(object):
                 return self.fn(obj, *args, **kwds)
             else:
                 return self.fn(cls, *args, **kwds)
+        if inspect.iscoroutinefunction(self.fn):
+            # keep coroutine functions recognizable as such
+            g = f
+
+            async def f(*args, **kwds):
+                return await g(*args, **kwds)
         functools.update_wrapper(f, self.fn)
         return f
 
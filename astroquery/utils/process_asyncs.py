@@ -10,7 +10,13 @@ from .docstr_chompers import remove_sections
 
 def async_to_sync(cls):
     """
-    Convert all query_x_async methods to query_x methods
+    Convert all query_x_async methods to query_x methods.
+
+    The methods listed by name in the ``_coroutine_methods`` attribute of the
+    class are also converted to aquery_x coroutines that can be awaited in an
+    `asyncio` event loop.  They are run with `~astroquery.query.BaseQuery._arun`,
+    so they must have no side effects besides the requests they make with
+    ``_request`` and ``_request_many``.
 
     (see
     http://stackoverflow.com/questions/18048341/add-methods-to-a-class-generated-from-other-methods
@@ -32,7 +38,24 @@ def async_to_sync(cls):
 
         return newmethod
 
+    def create_coroutine(async_method_name):
+
+        @class_or_instance
+        async def newcoroutine(self, *args, **kwargs):
+            verbose = kwargs.pop('verbose', False)
+
+            response = await self._arun(getattr(self, async_method_name),
+                                        *args, **kwargs)
+            if kwargs.get('get_query_payload') or kwargs.get('field_help'):
+                return response
+            result = self._parse_result(response, verbose=verbose)
+            self.table = result
+            return result
+
+        return newcoroutine
+
     methods = list(cls.__dict__.keys())
+    coroutine_methods = getattr(cls, '_coroutine_methods', ())
 
     for k in list(methods):
         newmethodname = k.replace("_async", "")
@@ -50,13 +73,23 @@ def async_to_sync(cls):
 
             setattr(cls, newmethodname, newmethod)
 
+            coroutinename = 'a' + newmethodname
+            if k in coroutine_methods and coroutinename not in methods:
+                newcoroutine = create_coroutine(k)
+                newcoroutine.fn.__doc__ = async_to_sync_docstr(
+                    getattr(cls, k).__doc__, awaitable=True)
+                newcoroutine.fn.__name__ = coroutinename
+                newcoroutine.__name__ = coroutinename
+                functools.update_wrapper(newcoroutine, newcoroutine.fn)
+                setattr(cls, coroutinename, newcoroutine)
+
     return cls
 
 
-def async_to_sync_docstr(doc, returntype='table'):
+def async_to_sync_docstr(doc, returntype='table', awaitable=False):
     """
     Strip of the "Returns" component of a docstr and replace it with "Returns a
-    table" code
+    table" code.  With ``awaitable``, describe a coroutine returning the table.
     """
 
     object_dict = {'table': '~astropy.table.Table',
@@ -65,6 +98,9 @@ def async_to_sync_docstr(doc, returntype='table'):
 
     firstline = ("Queries the service and returns a {rt} object.\n"
                  .format(rt=returntype))
+    if awaitable:
+        firstline = ("Coroutine that queries the service and returns a {rt} "
+                     "object.\n".format(rt=returntype))
 
     vowels = 'aeiou'
     vowels += vowels.upper()
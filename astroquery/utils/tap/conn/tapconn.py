@@ -22,6 +22,9 @@ except ImportError:
     # python 2
     import httplib
 import mimetypes
+import select
+import socket
+import threading
 import time
 
 from six.moves.urllib.parse import urlencode
@@ -34,6 +37,8 @@ import requests
 __all__ = ['TapConn']
 
 CONTENT_TYPE_POST_DEFAULT = "application/x-www-form-urlencoded"
+# Maximum number of keep-alive connections kept per host and port
+DEFAULT_POOL_SIZE = 4
 
 
 class TapConn(object):
@@ -720,11 +725,116 @@ class TapConn(object):
             + str(self.__connPortSsl)
 
 
+class _PooledConnectionMixin(object):
+    """Keep-alive connection handed out by `ConnectionHandler`
+
+    A connection is checked out when it is handed out, and can only be handed
+    out again once the response to its request has been fully read (or
+    closed).  Before a request is sent on a reused connection, the connection
+    is reopened if the server closed it while it was idle.  Requests with an
+    idempotent method are sent again once if the server dropped the reused
+    connection nonetheless.
+    """
+
+    _RETRY_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, *args, **kwargs):
+        super(_PooledConnectionMixin, self).__init__(*args, **kwargs)
+        self._last_request = None
+        self._last_response = None
+        self._reused = False
+        self._checked_out = False
+
+    def check_out(self):
+        """Marks the connection as in use until the response to its next
+        request has been read
+        """
+        self._checked_out = True
+        self._last_response = None
+
+    def is_idle(self):
+        """Returns 'True' if the connection is not checked out, or if the
+        response to its request has been fully read (or closed), so that the
+        connection can send a new request
+        """
+        if (self._checked_out and self._last_response is not None
+                and self._last_response.isclosed()):
+            self._checked_out = False
+        return not self._checked_out
+
+    def request(self, method, url, body=None, headers={}, **kwargs):
+        self._last_request = (method, url, body, headers, kwargs)
+        if self._reused and self.__dropped():
+            self.__reconnect()
+        try:
+            super(_PooledConnectionMixin, self).request(method, url, body,
+                                                        headers, **kwargs)
+        except (httplib.HTTPException, socket.error):
+            if not self._reused or method not in self._RETRY_METHODS:
+                raise
+            self.__reconnect()
+            super(_PooledConnectionMixin, self).request(method, url, body,
+                                                        headers, **kwargs)
+
+    def getresponse(self):
+        try:
+            response = super(_PooledConnectionMixin, self).getresponse()
+        except (httplib.BadStatusLine, socket.error):
+            # the server closes idle keep-alive connections without notice;
+            # only requests without side effects can be sent again, as the
+            # server may have processed the first one
+            if (not self._reused or self._last_request is None
+                    or self._last_request[0] not in self._RETRY_METHODS):
+                raise
+            self.__reconnect()
+            method, url, body, headers, kwargs = self._last_request
+            super(_PooledConnectionMixin, self).request(method, url, body,
+                                                        headers, **kwargs)
+            response = super(_PooledConnectionMixin, self).getresponse()
+        self._last_response = response
+        self._reused = True
+        return response
+
+    def __dropped(self):
+        # an idle connection is only readable once the server closed it
+        if self.sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+        except (ValueError, socket.error):
+            return True
+        return bool(readable)
+
+    def __reconnect(self):
+        self.close()
+        self._reused = False
+
+
+class _PooledHTTPConnection(_PooledConnectionMixin, httplib.HTTPConnection):
+    pass
+
+
+class _PooledHTTPSConnection(_PooledConnectionMixin, httplib.HTTPSConnection):
+    pass
+
+
 class ConnectionHandler(object):
-    def __init__(self, host, port, sslport):
+    """HTTP(s) connection creator
+
+    Connections are kept alive and reused, per protocol, host and port, once
+    the previous response obtained through them has been completely read.
+    At most 'pool_size' connections are kept per host and port: when all of
+    them are still busy, the oldest one is handed over to its current user
+    and a new connection replaces it in the pool.
+    """
+
+    def __init__(self, host, port, sslport, pool_size=DEFAULT_POOL_SIZE):
         self.__connHost = host
         self.__connPort = port
         self.__connPortSsl = sslport
+        self.__poolSize = pool_size
+        self.__pools = {}
+        self.__lock = threading.Lock()
 
     def get_connection(self, ishttps=False, cookie=None, verbose=False):
         if (ishttps) or (cookie is not None):
@@ -734,7 +844,46 @@ class ConnectionHandler(object):
         else:
             if verbose:
                 print("------>http")
-            return httplib.HTTPConnection(self.__connHost, self.__connPort)
+            return self.__get_pooled_connection(_PooledHTTPConnection,
+                                                self.__connHost,
+                                                self.__connPort,
+                                                verbose)
 
     def get_connection_secure(self, verbose):
-        return httplib.HTTPSConnection(self.__connHost, self.__connPortSsl)
+        return self.__get_pooled_connection(_PooledHTTPSConnection,
+                                            self.__connHost,
+                                            self.__connPortSsl,
+                                            verbose)
+
+    def __get_pooled_connection(self, conn_class, host, port, verbose=False):
+        key = (conn_class, host, port)
+        with self.__lock:
+            pool = self.__pools.setdefault(key, [])
+            for conn in pool:
+                if conn.is_idle():
+                    conn.check_out()
+                    if verbose:
+                        print("reusing connection to " + str(host) + ":" +
+                              str(port))
+                    # most recently used connections are the likeliest to
+                    # still be open on the server side
+                    pool.remove(conn)
+                    pool.append(conn)
+                    return conn
+            conn = conn_class(host, port)
+            conn.check_out()
+            if self.__poolSize is not None and self.__poolSize > 0:
+                if len(pool) >= self.__poolSize:
+                    # the busy connection stays open for its current user
+                    pool.pop(0)
+                pool.append(conn)
+            return conn
+
+    def close(self):
+        """Closes all the pooled connections
+        """
+        with self.__lock:
+            for pool in self.__pools.values():
+                for conn in pool:
+                    conn.close()
+            self.__pools = {}
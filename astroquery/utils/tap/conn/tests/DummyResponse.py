@@ -58,19 +58,12 @@ class DummyResponse(object):
                 # read all
                 return v.encode(encoding='utf_8', errors='strict')
             else:
-                bodyLength = len(v)
-                if self.index < 0:
-                    return ""
-                if size >= bodyLength:
-                    size = bodyLength - 1
-                if size <= 0:
-                    return ""
-                endPos = self.index + size
-                tmp = v[self.index:endPos]
-                self.index = endPos
-                if endPos >= (bodyLength - 1):
-                    self.index = -1
-                return tmp.encode(encoding='utf_8', errors='strict')
+                # like a file: returns up to size bytes, b"" once exhausted
+                # (and then rewinds, so that the response can be reused)
+                data = v.encode(encoding='utf_8', errors='strict')
+                tmp = data[self.index:self.index + size]
+                self.index = self.index + len(tmp) if tmp else 0
+                return tmp
 
     def close(self):
         self.index = 0
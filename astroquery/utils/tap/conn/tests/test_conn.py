@@ -16,8 +16,14 @@ Created on 30 jun. 2016
 """
 import unittest
 import os
+import socket
+import threading
+import time
 
-from astroquery.utils.tap.conn.tapconn import TapConn
+import pytest
+from six.moves import BaseHTTPServer, http_client, socketserver
+
+from astroquery.utils.tap.conn.tapconn import TapConn, ConnectionHandler
 from astroquery.utils.tap.conn.tests.DummyConn import DummyConn
 
 
@@ -155,3 +161,130 @@ class ConnTest(unittest.TestCase):
         assert r.get_body() == data, \
             "Request body. Expected %s, found %s" % (data,
                                                      str(r.get_body()))
+
+
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answers with the client port, keeping the connection alive"""
+
+    protocol_version = "HTTP/1.1"
+    # drops the connection after this many requests (None: never)
+    requests_per_connection = None
+    # methods of the requests to /drop, which are never answered
+    dropped = []
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        self.served = 0
+        BaseHTTPServer.BaseHTTPRequestHandler.handle(self)
+
+    def do_GET(self):
+        self.served += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.endswith("/drop"):
+            KeepAliveHandler.dropped.append(self.command)
+            self.close_connection = True
+            return
+        body = str(self.client_address[1]).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.requests_per_connection is not None and \
+                self.served >= self.requests_per_connection:
+            self.close_connection = True
+
+    do_POST = do_GET
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                          BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class KeepAliveServer(object):
+
+    def __init__(self, requests_per_connection=None):
+        KeepAliveHandler.requests_per_connection = requests_per_connection
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.port = self.httpd.server_address[1]
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_connection_reuse():
+    server = KeepAliveServer()
+    try:
+        handler = ConnectionHandler('127.0.0.1', server.port, 443)
+        tap = TapConn(ishttps=False, host='127.0.0.1',
+                      server_context='tap', port=server.port,
+                      connhandler=handler)
+        ports = set()
+        for i in range(5):
+            response = tap.execute_tapget('async/1/phase')
+            ports.add(response.read())
+            response = tap.execute_tappost('async/1/phase', 'PHASE=RUN')
+            ports.add(response.read())
+        # a single connection served all the requests
+        assert len(ports) == 1
+
+        # a response still being read keeps its connection busy
+        busy = tap.execute_tapget('async/1/results/result')
+        other = tap.execute_tapget('async/1/phase')
+        assert other.read() != busy.read()
+        handler.close()
+    finally:
+        server.stop()
+
+
+def test_connection_dropped_by_server():
+    # the server closes the connection without warning after each request
+    server = KeepAliveServer(requests_per_connection=1)
+    try:
+        handler = ConnectionHandler('127.0.0.1', server.port, 443)
+        conn = handler.get_connection()
+        for method in ("GET", "POST", "GET"):
+            conn.request(method, "/tap/async/1/phase")
+            assert conn.getresponse().read()
+            assert handler.get_connection() is conn
+            # the connection is reopened once the server closed it while
+            # it was idle
+            time.sleep(0.1)
+        handler.close()
+    finally:
+        server.stop()
+
+
+def test_connection_dropped_before_response():
+    server = KeepAliveServer()
+    try:
+        handler = ConnectionHandler('127.0.0.1', server.port, 443)
+        for method, sent in (("GET", ["GET", "GET"]), ("POST", ["POST"])):
+            KeepAliveHandler.dropped = []
+            conn = handler.get_connection()
+            conn.request(method, "/tap/async/1/phase")
+            conn.getresponse().read()
+            assert handler.get_connection() is conn
+            conn.request(method, "/tap/drop")
+            with pytest.raises((http_client.HTTPException, socket.error)):
+                conn.getresponse()
+            # only the idempotent request was sent again
+            assert KeepAliveHandler.dropped == sent
+        handler.close()
+    finally:
+        server.stop()
+
+
+def test_connection_pool_size():
+    handler = ConnectionHandler('127.0.0.1', 80, 443, pool_size=2)
+    # connections are checked out until their response has been read, even
+    # before they send a request
+    conns = [handler.get_connection() for i in range(3)]
+    assert len(set(id(conn) for conn in conns)) == 3
+    assert handler.get_connection_secure(False) not in conns
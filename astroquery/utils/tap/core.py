@@ -242,7 +242,7 @@ class Tap(object):
     def launch_job(self, query, name=None, output_file=None,
                    output_format="votable", verbose=False,
                    dump_to_file=False, upload_resource=None,
-                   upload_table_name=None):
+                   upload_table_name=None, stream=False):
         """Launches a synchronous job
 
         Parameters
@@ -263,6 +263,9 @@ class Tap(object):
         upload_table_name : str, optional, default None
             resource temporary table name associated to the uploaded resource.
             This argument is required if upload_resource is provided.
+        stream : bool, optional, default 'False'
+            if True, the results are not loaded: they are read and parsed
+            chunk by chunk by the Job.iter_results generator
 
         Returns
         -------
@@ -342,6 +345,8 @@ class Tap(object):
                 if verbose:
                     print("Saving results to: %s" % suitableOutputFile)
                 self.__connHandler.dump_to_file(suitableOutputFile, response)
+            elif stream:
+                job.set_results_response(response)
             else:
                 results = utils.read_http_response(response, output_format)
                 job.set_results(results)
@@ -354,7 +359,7 @@ class Tap(object):
                          output_format="votable", verbose=False,
                          dump_to_file=False, background=False,
                          upload_resource=None, upload_table_name=None,
-                         autorun=True):
+                         autorun=True, stream=False):
         """Launches an asynchronous job
 
         Parameters
@@ -381,6 +386,10 @@ class Tap(object):
         autorun : boolean, optional, default True
             if 'True', sets 'phase' parameter to 'RUN',
             so the framework can start the job.
+        stream : bool, optional, default 'False'
+            if True, the results are not loaded: they are read and parsed
+            chunk by chunk by the Job.iter_results generator, once the job
+            is finished
 
         Returns
         -------
@@ -444,7 +453,7 @@ class Tap(object):
             job.remoteLocation = location
             if autorun is True:
                 job.set_phase('EXECUTING')
-                if not background:
+                if not background and not stream:
                     if verbose:
                         print("Retrieving async. results...")
                     # saveResults or getResults will block (not background)
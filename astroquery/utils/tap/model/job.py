@@ -15,7 +15,9 @@ Created on 30 jun. 2016
 
 """
 
+import random
 import time
+from xml.etree import ElementTree
 
 from astroquery.utils.tap.model import modelutils
 from astroquery.utils.tap.xmlparser import utils
@@ -25,6 +27,15 @@ import sys
 
 __all__ = ['Job']
 
+# Delay (in seconds) before the first phase poll of a running job
+POLL_INTERVAL_MIN = 0.5
+# Maximum delay (in seconds) between two phase polls
+POLL_INTERVAL_MAX = 10.0
+# Growth factor of the delay between phase polls
+POLL_BACKOFF_FACTOR = 1.5
+# Phases of a job that has not finished yet
+ACTIVE_PHASES = ('PENDING', 'QUEUED', 'EXECUTING')
+
 
 class Job(object):
     """Job class
@@ -56,6 +67,8 @@ class Job(object):
         self.responseMsg = None
         self.results = None
         self.__resultInMemory = False    # only used within class
+        # unread results response of a streamed synchronous job
+        self.__resultsResponse = None
         self.failed = False
         self.runid = None
         self.ownerid = None
@@ -248,6 +261,57 @@ class Job(object):
             self.__load_async_job_results()
             return self.results
 
+    def iter_results(self, chunk_size=utils.DEFAULT_CHUNK_SIZE):
+        """Returns the job results as consecutive tables
+        The results are read and parsed chunk by chunk (see
+        `~astroquery.utils.tap.xmlparser.utils.read_http_response_chunks`),
+        which allows processing results larger than the available memory.
+        This method will block if the job is asynchronous and the job has not
+        finished yet.
+
+        Parameters
+        ----------
+        chunk_size : int, optional, default 100000
+            maximum number of rows of each table
+
+        Returns
+        -------
+        A generator of astropy tables with at most 'chunk_size' rows each.
+        """
+        outputFormat = self.parameters['format']
+        if self.results is not None:
+            for start in range(0, max(len(self.results), 1), chunk_size):
+                yield self.results[start:start + chunk_size]
+            return
+        if modelutils.check_file_exists(self.outputFile):
+            with open(self.outputFile, "rb") as f:
+                for chunk in utils.read_http_response_chunks(f, outputFormat,
+                                                             chunk_size):
+                    yield chunk
+            return
+        if self.__resultsResponse is not None:
+            response = self.__resultsResponse
+            self.__resultsResponse = None
+        elif self.async_:
+            response = self.__get_async_results_response()
+        else:
+            # sync: result is in a file
+            return
+        for chunk in utils.read_http_response_chunks(response, outputFormat,
+                                                     chunk_size):
+            yield chunk
+
+    def set_results_response(self, response):
+        """Sets the response the job results are to be streamed from
+        (see `iter_results`)
+
+        Parameters
+        ----------
+        response : HTTP(s) response object, mandatory
+            unread results response
+        """
+        self.__resultsResponse = response
+
     def set_results(self, results):
         """Sets the job results
 
@@ -304,17 +368,34 @@ class Job(object):
                 print("Saving results to: %s" % output)
                 self.connHandler.dump_to_file(output, response)
 
-    def wait_for_job_end(self, verbose=False):
+    def wait_for_job_end(self, verbose=False, timeout=None, wait=None):
         """Waits until a job is finished
+        The phase is polled with an exponentially increasing delay (from
+        POLL_INTERVAL_MIN up to POLL_INTERVAL_MAX seconds, with random
+        jitter), which is reset each time the phase changes.
 
         Parameters
         ----------
         verbose : bool, optional, default 'False'
             flag to display information about the process
+        timeout : float, optional, default None
+            maximum time to wait, in seconds. A TimeoutError is raised if the
+            job has not finished by then. By default, waits forever.
+        wait : int, optional, default None
+            if set, the job is polled using the UWS 1.1 blocking mechanism:
+            the server holds each poll for up to 'wait' seconds, answering
+            as soon as the phase changes. Servers without blocking support
+            answer immediately, and polls are then delayed as usual.
+
+        Returns
+        -------
+        The status of the latest poll response and the final job phase
         """
         currentResponse = None
         responseData = None
         lphase = None
+        deadline = None if timeout is None else time.time() + timeout
+        interval = POLL_INTERVAL_MIN
         # execute job if not running
         if self._phase == 'PENDING':
             print("Job in PENDING phase, sending phase=RUN request.")
@@ -325,21 +406,72 @@ class Job(object):
                 if verbose:
                     print("Exception when trying to start job", ex)
         while True:
-            responseData = self.get_phase(update=True)
+            pollStart = time.time()
+            if wait is not None and lphase is not None:
+                blockFor = wait
+                if deadline is not None:
+                    blockFor = min(blockFor, int(deadline - pollStart))
+                responseData = self.__get_phase_blocking(lphase, blockFor)
+            else:
+                responseData = self.get_phase(update=True)
             currentResponse = self.__last_phase_response_status
 
+            previousPhase = lphase
             lphase = responseData.upper().strip()
             if verbose:
                 print("Job " + self.jobid + " status: " + lphase)
-            if ("PENDING" != lphase and "QUEUED" != lphase and
-                    "EXECUTING" != lphase):
-                break
             # PENDING, QUEUED, EXECUTING, COMPLETED, ERROR, ABORTED, UNKNOWN,
             # HELD, SUSPENDED, ARCHIVED:
-            time.sleep(0.5)
+            if lphase not in ACTIVE_PHASES:
+                break
+            if lphase != previousPhase:
+                interval = POLL_INTERVAL_MIN
+            now = time.time()
+            if deadline is not None and now >= deadline:
+                raise TimeoutError("Job " + str(self.jobid) + " still in " +
+                                   "phase " + lphase + " after " +
+                                   str(timeout) + " seconds")
+            # full jitter on the upper half of the interval spreads the polls
+            # of concurrent jobs; time spent blocked on the server counts
+            delay = random.uniform(interval / 2, interval) - (now - pollStart)
+            if deadline is not None:
+                delay = min(delay, deadline - now)
+            if delay > 0:
+                time.sleep(delay)
+            interval = min(interval * POLL_BACKOFF_FACTOR, POLL_INTERVAL_MAX)
         return currentResponse, lphase
 
+    def __get_phase_blocking(self, phase, wait):
+        # UWS 1.1: GET {job}?WAIT=n&PHASE=p returns the job description once
+        # the phase is no longer p, or after n seconds
+        request = "async/" + str(self.jobid) + "?WAIT=" + \
+            str(max(int(wait), 0)) + "&PHASE=" + phase
+        response = self.connHandler.execute_tapget(request)
+        self.__last_phase_response_status = response.status
+        if response.status != 200:
+            errMsg = taputils.get_http_response_error(response)
+            print(response.status, errMsg)
+            raise requests.exceptions.HTTPError(errMsg)
+        for event, element in ElementTree.iterparse(response):
+            if element.tag.split('}')[-1] == 'phase':
+                self._phase = str(element.text).strip()
+                break
+        else:
+            raise ValueError("No phase found in the job description")
+        # consume the rest of the document, so that the connection can be
+        # reused
+        while response.read(4096):
+            pass
+        return self._phase
+
     def __load_async_job_results(self, debug=False):
+        resultsResponse = self.__get_async_results_response(debug)
+        outputFormat = self.parameters['format']
+        results = utils.read_http_response(resultsResponse,
+                                           outputFormat)
+        self.set_results(results)
+
+    def __get_async_results_response(self, debug=False):
         wjResponse, phase = self.wait_for_job_end()
         subContext = "async/" + str(self.jobid) + "/results/result"
         resultsResponse = self.connHandler.execute_tapget(subContext)
@@ -364,10 +496,7 @@ class Job(object):
                 print(resultsResponse.status, errMsg)
                 raise requests.exceptions.HTTPError(errMsg)
             else:
-                outputFormat = self.parameters['format']
-                results = utils.read_http_response(resultsResponse,
-                                                   outputFormat)
-                self.set_results(results)
+                return resultsResponse
 
     def __handle_redirect_if_required(self, resultsResponse, verbose=False):
         # Thanks @emeraldTree24
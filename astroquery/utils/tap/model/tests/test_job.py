@@ -18,6 +18,7 @@ import unittest
 import os
 import pytest
 
+from astroquery.utils.tap.model import job as jobmodule
 from astroquery.utils.tap.model.job import Job
 from astroquery.utils.tap.conn.tests.DummyConnHandler import DummyConnHandler
 from astroquery.utils.tap.conn.tests.DummyResponse import DummyResponse
@@ -86,6 +87,50 @@ class TestJob(unittest.TestCase):
             if cn not in res.colnames:
                 self.fail(cn + " column name not found" + str(res.colnames))
 
+    def test_job_iter_results(self):
+        job = Job(async_job=True)
+        jobid = "12345"
+        job.jobid = jobid
+        job.parameters['format'] = "votable"
+        responseCheckPhase = DummyResponse()
+        responseCheckPhase.set_status_code(200)
+        responseCheckPhase.set_message("OK")
+        responseCheckPhase.set_data(method='GET',
+                                    context=None,
+                                    body='COMPLETED',
+                                    headers=None)
+        connHandler = DummyConnHandler()
+        connHandler.set_response("async/" + str(jobid) + "/phase",
+                                 responseCheckPhase)
+        responseGetData = DummyResponse()
+        responseGetData.set_status_code(200)
+        responseGetData.set_message("OK")
+        jobContent = utils.read_file_content(data_path('result_1.vot'))
+        responseGetData.set_data(method='GET',
+                                 context=None,
+                                 body=jobContent,
+                                 headers=None)
+        connHandler.set_response("async/" + str(jobid) + "/results/result",
+                                 responseGetData)
+        job.connHandler = connHandler
+
+        chunks = list(job.iter_results(chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert chunks[0].colnames == ['alpha', 'delta', 'source_id',
+                                      'table1_oid']
+        # results are not kept in memory
+        assert job.results is None
+
+        # streamed synchronous job
+        job = Job(async_job=False)
+        responseGetData.set_data(method='GET',
+                                 context=None,
+                                 body=jobContent,
+                                 headers=None)
+        job.set_results_response(responseGetData)
+        assert [len(chunk) for chunk in job.iter_results()] == [3]
+        assert list(job.iter_results()) == []
+
     def test_job_phase(self):
         job = Job(async_job=True)
         jobid = "12345"
@@ -116,6 +161,62 @@ class TestJob(unittest.TestCase):
             pass
 
 
+class SequenceConnHandler(object):
+    """Answers the successive GET requests with the given bodies"""
+
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+        self.requests = []
+
+    def execute_tapget(self, subcontext, verbose=False):
+        self.requests.append(subcontext)
+        response = DummyResponse()
+        response.set_status_code(200)
+        response.set_message("OK")
+        response.set_data(method='GET', context=subcontext,
+                          body=self.bodies.pop(0), headers=None)
+        return response
+
+
+def test_wait_for_job_end_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(jobmodule.time, 'sleep', delays.append)
+    job = Job(async_job=True)
+    job.jobid = "12345"
+    job.connHandler = SequenceConnHandler(['QUEUED', 'EXECUTING', 'EXECUTING',
+                                           'EXECUTING', 'COMPLETED'])
+    assert job.wait_for_job_end() == (200, 'COMPLETED')
+    assert job.connHandler.requests == ['async/12345/phase'] * 5
+    # the delay grows while the phase stays the same, and is reset when it
+    # changes
+    intervals = [0.5, 0.5, 0.75, 1.125]
+    assert len(delays) == len(intervals)
+    for delay, interval in zip(delays, intervals):
+        assert interval / 2 - 0.1 <= delay <= interval
+
+    delays[:] = []
+    job.connHandler = SequenceConnHandler(['EXECUTING'] * 30)
+    with pytest.raises(TimeoutError):
+        job.wait_for_job_end(timeout=0)
+    assert len(job.connHandler.requests) == 1
+    assert delays == []
+
+
+def test_wait_for_job_end_blocking(monkeypatch):
+    monkeypatch.setattr(jobmodule.time, 'sleep', lambda delay: None)
+    job = Job(async_job=True)
+    job.jobid = "12345"
+    jobDescription = '<?xml version="1.0" encoding="UTF-8"?>' \
+        '<uws:job xmlns:uws="http://www.ivoa.net/xml/UWS/v1.0" ' \
+        'version="1.1"><uws:jobId>12345</uws:jobId>' \
+        '<uws:phase>COMPLETED</uws:phase></uws:job>'
+    job.connHandler = SequenceConnHandler(['EXECUTING', jobDescription])
+    assert job.wait_for_job_end(wait=30) == (200, 'COMPLETED')
+    assert job.connHandler.requests == ['async/12345/phase',
+                                        'async/12345?WAIT=30&PHASE=EXECUTING']
+    assert job.get_phase() == 'COMPLETED'
+
+
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
@@ -254,6 +254,42 @@ class TestTap(unittest.TestCase):
                                     None,
                                     np.int32)
 
+    def test_launch_sync_job_stream(self):
+        connHandler = DummyConnHandler()
+        tap = TapPlus("http://test:1111/tap", connhandler=connHandler)
+        responseLaunchJob = DummyResponse()
+        responseLaunchJob.set_status_code(200)
+        responseLaunchJob.set_message("OK")
+        jobDataFile = data_path('job_1.vot')
+        jobData = utils.read_file_content(jobDataFile)
+        responseLaunchJob.set_data(method='POST',
+                                   context=None,
+                                   body=jobData,
+                                   headers=None)
+        query = 'select top 5 * from table'
+        dTmp = {"q": query}
+        dTmpEncoded = connHandler.url_encode(dTmp)
+        p = dTmpEncoded.find("=")
+        q = dTmpEncoded[p+1:]
+        dictTmp = {
+            "REQUEST": "doQuery",
+            "LANG": "ADQL",
+            "FORMAT": "votable",
+            "tapclient": str(TAP_CLIENT_ID),
+            "PHASE": "RUN",
+            "QUERY": str(q)}
+        sortedKey = taputils.taputil_create_sorted_dict_key(dictTmp)
+        jobRequest = "sync?" + sortedKey
+        connHandler.set_response(jobRequest, responseLaunchJob)
+
+        job = tap.launch_job(query, stream=True)
+        assert job.get_phase() == 'COMPLETED'
+        assert job.results is None
+        chunks = list(job.iter_results(chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert chunks[0].colnames == ['alpha', 'delta', 'source_id',
+                                      'table1_oid']
+
     def test_launch_sync_job_redirect(self):
         connHandler = DummyConnHandler()
         tap = TapPlus("http://test:1111/tap", connhandler=connHandler)
@@ -15,8 +15,13 @@ Created on 30 jun. 2016
 
 """
 
+import gzip
+import io
 import unittest
 import os
+
+import numpy as np
+from astropy.table import Table, vstack
 from astroquery.utils.tap.xmlparser.tableSaxParser import TableSaxParser
 from astroquery.utils.tap.xmlparser.jobListSaxParser import JobListSaxParser
 from astroquery.utils.tap.xmlparser.jobSaxParser import JobSaxParser
@@ -77,6 +82,58 @@ class XmlParserTest(unittest.TestCase):
             "Expected 57 columsn, found %d" % len(resultTable.columns)
         file.close()
 
+    def test_job_results_chunks(self):
+        fileName = data_path('test_job_results.xml')
+        with open(fileName, 'rb') as file:
+            resultTable = utils.read_http_response(file, 'votable')
+        # binary serialization
+        with open(fileName, 'rb') as file:
+            chunks = list(utils.read_http_response_chunks(file, 'votable',
+                                                          chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        self.__check_same_table(vstack(chunks), resultTable)
+
+        # TABLEDATA serialization, parsed while it is read
+        data = io.BytesIO()
+        resultTable.write(data, format='votable')
+        for content in (data.getvalue(), gzip.compress(data.getvalue())):
+            for chunk_size in (1, 3, 5, 10):
+                chunks = list(utils.read_http_response_chunks(
+                    io.BytesIO(content), 'votable', chunk_size=chunk_size))
+                assert max(len(chunk) for chunk in chunks) <= chunk_size
+                self.__check_same_table(vstack(chunks), resultTable)
+
+        # no rows
+        data = io.BytesIO()
+        resultTable[:0].write(data, format='votable')
+        chunks = list(utils.read_http_response_chunks(
+            io.BytesIO(data.getvalue()), 'votable'))
+        assert len(chunks) == 1
+        assert chunks[0].colnames == resultTable.colnames
+
+    def test_csv_chunks(self):
+        table = Table({'id': np.arange(7),
+                       'name': ['a "quoted",\nmultiline value'] * 7,
+                       'flux': np.linspace(0, 1, 7)})
+        data = io.StringIO()
+        table.write(data, format='ascii.csv')
+        chunks = list(utils.read_http_response_chunks(
+            io.BytesIO(data.getvalue().encode('utf-8')), 'csv',
+            chunk_size=3))
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        self.__check_same_table(vstack(chunks), table)
+
+        chunks = list(utils.read_http_response_chunks(
+            io.BytesIO(b"id,name\n"), 'csv'))
+        assert len(chunks) == 1
+        assert chunks[0].colnames == ['id', 'name']
+
+    def __check_same_table(self, table, expected):
+        assert table.colnames == expected.colnames
+        assert len(table) == len(expected)
+        for cn in expected.colnames:
+            assert str(list(table[cn])) == str(list(expected[cn])), cn
+
     def __check_table(self, table, baseName, numColumns, columnsData):
         qualifiedName = "public.%s" % baseName
         assert str(table.get_qualified_name()) == str(qualifiedName), \
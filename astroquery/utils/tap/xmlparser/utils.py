@@ -16,10 +16,26 @@ Created on 30 jun. 2016
 """
 
 import io
+import re
+import tempfile
+import zlib
 from astropy import units as u
+from astropy.io import ascii
 from astropy.table import Table as APTable
 import six
 
+# Number of rows of each table yielded by read_http_response_chunks
+DEFAULT_CHUNK_SIZE = 100000
+# Size of the blocks read from the HTTP(s) response
+READ_BLOCK_SIZE = 2 ** 16
+
+_XML_MARKUP = re.compile(br'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<[?!][^>]*>', re.S)
+_XML_TAG = re.compile(br'<(/?)([\w:.-]+)((?:[^>"\']|"[^"]*"|\'[^\']*\')*?)(/?)>')
+_VOTABLE_DATA = re.compile(br'<(?:[\w.-]+:)?(TABLEDATA|BINARY2?|FITS)\b'
+                           br'(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+_VOTABLE_ROW_END = re.compile(br'</(?:[\w.-]+:)?TR\s*>')
+_VOTABLE_TABLEDATA_END = re.compile(br'</(?:[\w.-]+:)?TABLEDATA\s*>')
+
 
 def util_create_string_from_buffer(buffer):
     if six.PY2:
@@ -37,24 +53,257 @@ def read_http_response(response, outputFormat, correct_units=True):
         result = APTable.read(response, format=astropyFormat)
     else:
         # 3.0
-        # If we want to use astropy.table, we have to read the data
-        data = io.BytesIO(response.read())
-        result = APTable.read(data, format=astropyFormat)
+        # astropy needs a seekable file: the response is spooled to a
+        # temporary file, so that the raw data is not kept in memory
+        # alongside the parsed table
+        with _spool_http_response(response) as data:
+            result = APTable.read(data, format=astropyFormat)
 
     if correct_units:
-        for cn in result.colnames:
-            col = result[cn]
-            if isinstance(col.unit, u.UnrecognizedUnit):
-                try:
-                    col.unit = u.Unit(col.unit.name.replace(".", " ").replace("'", ""))
-                except Exception as ex:
-                    pass
-            elif isinstance(col.unit, str):
-                col.unit = col.unit.replace(".", " ").replace("'", "")
+        correct_table_units(result)
 
     return result
 
 
+def read_http_response_chunks(response, outputFormat,
+                              chunk_size=DEFAULT_CHUNK_SIZE,
+                              correct_units=True):
+    """Parses an HTTP(s) response into consecutive tables
+
+    The response is read block by block and each table is built as soon as
+    its rows have been received, so that results of any size can be
+    processed in bounded memory. This is the case of CSV results and of
+    VOTables serialized as TABLEDATA (e.g. 'votable_plain' output format).
+    Other results (e.g. BINARY VOTables) are spooled to a temporary file,
+    parsed as a whole and then split.
+
+    Parameters
+    ----------
+    response : HTTP(s) response object, mandatory
+        HTTP(s) response (or file opened in binary mode)
+    outputFormat : str, mandatory
+        results format
+    chunk_size : int, optional, default DEFAULT_CHUNK_SIZE
+        maximum number of rows of each table
+    correct_units : bool, optional, default 'True'
+        flag to fix the units not recognized by astropy
+
+    Returns
+    -------
+    A generator of astropy tables, all of them with the same columns. At
+    least one (possibly empty) table is generated.
+    """
+    if chunk_size is None or chunk_size < 1:
+        raise ValueError("chunk_size must be a positive number of rows")
+    astropyFormat = get_suitable_astropy_format(outputFormat)
+    response = _DecompressingReader(response)
+    if "csv" in astropyFormat:
+        chunks = _read_csv_chunks(response, astropyFormat, chunk_size)
+    elif "votable" in astropyFormat:
+        chunks = _read_votable_chunks(response, chunk_size)
+    else:
+        chunks = _read_split_chunks(response, b"", astropyFormat,
+                                    chunk_size)
+    for chunk in chunks:
+        if correct_units:
+            correct_table_units(chunk)
+        yield chunk
+
+
+def correct_table_units(table):
+    for cn in table.colnames:
+        col = table[cn]
+        if isinstance(col.unit, u.UnrecognizedUnit):
+            try:
+                col.unit = u.Unit(col.unit.name.replace(".", " ").replace("'", ""))
+            except Exception as ex:
+                pass
+        elif isinstance(col.unit, str):
+            col.unit = col.unit.replace(".", " ").replace("'", "")
+
+
+class _DecompressingReader(object):
+    """Reads an HTTP(s) response, uncompressing it if it is gzipped
+    """
+
+    def __init__(self, response):
+        self.__response = response
+        self.__decompressor = None
+        self.__head = response.read(READ_BLOCK_SIZE) or b""
+        if self.__head[:2] == b"\x1f\x8b":
+            self.__decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def read(self, size=READ_BLOCK_SIZE):
+        while True:
+            if self.__head:
+                data, self.__head = self.__head, b""
+            else:
+                data = self.__response.read(size) or b""
+            if self.__decompressor is None:
+                return data
+            if not data:
+                return self.__decompressor.flush()
+            data = self.__decompressor.decompress(data)
+            if data:
+                return data
+
+
+def _spool_http_response(response, head=b""):
+    spool = tempfile.TemporaryFile()
+    spool.write(head)
+    while True:
+        data = response.read(READ_BLOCK_SIZE)
+        if not data:
+            break
+        spool.write(data)
+    spool.seek(0)
+    return spool
+
+
+def _read_split_chunks(response, head, astropyFormat, chunk_size):
+    with _spool_http_response(response, head) as data:
+        result = APTable.read(data, format=astropyFormat)
+    if len(result) == 0:
+        yield result
+    for start in range(0, len(result), chunk_size):
+        yield result[start:start + chunk_size]
+
+
+def _read_csv_records(response):
+    pending = b""
+    record = []
+    quotes = 0
+    while True:
+        data = response.read(READ_BLOCK_SIZE)
+        if not data:
+            break
+        lines = (pending + data).split(b"\n")
+        # the last line is complete only at the end of the response
+        pending = lines.pop()
+        for line in lines:
+            record.append(line)
+            # a newline within a quoted value does not end the record
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                yield b"\n".join(record)
+                record = []
+                quotes = 0
+    if pending:
+        record.append(pending)
+    if record:
+        yield b"\n".join(record)
+
+
+def _read_csv_chunks(response, astropyFormat, chunk_size):
+    records = _read_csv_records(response)
+    header = next(records, b"")
+    converters = None
+    rows = []
+    for record in records:
+        if not record.strip():
+            continue
+        rows.append(record)
+        if len(rows) == chunk_size:
+            chunk = _read_csv_chunk(header, rows, astropyFormat, converters)
+            if converters is None:
+                converters = _csv_converters(chunk)
+            rows = []
+            yield chunk
+    if rows or converters is None:
+        yield _read_csv_chunk(header, rows, astropyFormat, converters)
+
+
+def _read_csv_chunk(header, rows, astropyFormat, converters):
+    data = io.BytesIO(b"\n".join([header] + rows + [b""]))
+    if converters:
+        return APTable.read(data, format=astropyFormat,
+                            converters=converters)
+    return APTable.read(data, format=astropyFormat)
+
+
+def _csv_converters(table):
+    # the types guessed from the first rows are kept for the next chunks,
+    # only allowing them to be promoted
+    promotions = {'b': [bool, int, float, str], 'i': [int, float, str],
+                  'u': [int, float, str], 'f': [float, str]}
+    converters = {}
+    for cn in table.colnames:
+        types = promotions.get(table[cn].dtype.kind, [str])
+        converters[cn] = [ascii.convert_numpy(t) for t in types]
+    return converters
+
+
+def _read_votable_chunks(response, chunk_size):
+    data = bytearray()
+    match = None
+    while match is None:
+        block = response.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        data += block
+        match = _VOTABLE_DATA.search(data)
+    if match is None or bytes(match.group(1)) != b"TABLEDATA":
+        # no table, or binary serialization: it can only be read as a whole
+        for chunk in _read_split_chunks(response, bytes(data), "votable",
+                                        chunk_size):
+            yield chunk
+        return
+
+    header = bytes(data[:match.end()])
+    footer = _votable_closing_tags(header)
+    rows = data[match.end():]
+    del data
+    scanned = 0
+    nrows = 0
+    empty = True
+    finished = False
+    while not finished:
+        end = _VOTABLE_TABLEDATA_END.search(rows, scanned)
+        limit = end.start() if end is not None else len(rows)
+        cut = None
+        for row_end in _VOTABLE_ROW_END.finditer(rows, scanned, limit):
+            nrows += 1
+            scanned = row_end.end()
+            if nrows == chunk_size:
+                cut = scanned
+                break
+        if cut is None:
+            if end is None:
+                block = response.read(READ_BLOCK_SIZE)
+                if block:
+                    rows += block
+                    continue
+                # truncated document: the parser reports the error
+                cut = len(rows)
+            else:
+                cut = end.start()
+            finished = True
+        if nrows or empty:
+            empty = False
+            yield APTable.read(io.BytesIO(header + bytes(rows[:cut]) + footer),
+                               format="votable")
+        del rows[:cut]
+        scanned = 0
+        nrows = 0
+    # consume the rest of the document, so that the connection can be reused
+    while response.read(READ_BLOCK_SIZE):
+        pass
+
+
+def _votable_closing_tags(header):
+    stack = []
+    for tag in _XML_TAG.finditer(_XML_MARKUP.sub(b"", header)):
+        if tag.group(4):
+            # empty element
+            continue
+        if tag.group(1):
+            if stack:
+                stack.pop()
+        else:
+            stack.append(tag.group(2))
+    return b"".join(b"</" + name + b">" for name in reversed(stack))
+
+
 def get_suitable_astropy_format(outputFormat):
     if "csv" == outputFormat:
         return "ascii.csv"
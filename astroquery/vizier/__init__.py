@@ -42,6 +42,11 @@ class Conf(_config.ConfigNamespace):
         'Maximum number of rows that will be fetched from the result '
         '(set to -1 for unlimited).')
 
+    max_positions = _config.ConfigItem(
+        1000,
+        'Maximum number of positions sent in one multi-position region '
+        'query; longer lists are split into queries sent concurrently.')
+
 
 conf = Conf()
 
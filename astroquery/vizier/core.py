@@ -2,6 +2,7 @@
 from __future__ import print_function
 
 import os
+import sys
 import warnings
 import json
 import copy
@@ -9,20 +10,24 @@ import re
 
 import six
 from six import BytesIO
+import numpy as np
 import astropy.units as u
 import astropy.coordinates as coord
 import astropy.table as tbl
 import astropy.utils.data as aud
 from collections import OrderedDict
 import astropy.io.votable as votable
+from astropy.io.votable import converters as votable_converters
+from astropy.io.votable import tree as votable_tree
 from astropy.io import ascii, fits
+from astropy.utils.xml import iterparser
 
 from ..query import BaseQuery
 from ..utils import commons
 from ..utils import async_to_sync
 from ..utils import schema
 from . import conf
-from ..exceptions import TableParseError
+from ..exceptions import TableParseError, MaxResultsWarning
 
 
 __all__ = ['Vizier', 'VizierClass']
@@ -44,6 +49,9 @@ class VizierClass(BaseQuery):
     _schema_catalog = schema.Schema(
         schema.Or([_str_schema], _str_schema, None),
         error="catalog must be a list of strings or a single string")
+    # the *_async methods also available as aquery_* coroutines
+    _coroutine_methods = ('get_catalogs_async', 'query_object_async',
+                          'query_region_async', 'query_constraints_async')
 
     def __init__(self, columns=["*"], column_filters={}, catalog=None,
                  keywords=None, ucd="", timeout=conf.timeout,
@@ -350,26 +358,24 @@ class VizierClass(BaseQuery):
 
         Returns
         -------
-        response : `requests.Response`
-            The response of the HTTP request.
+        response : `requests.Response` or list of `requests.Response`
+            The response of the HTTP request.  Queries of more than
+            ``astroquery.vizier.conf.max_positions`` positions are split
+            into several queries, sent concurrently, and their responses
+            are returned as a ``VizierPositionChunks`` list, which also
+            records the index of the first position of each query (the
+            row limit applies to each of them).
 
         """
         catalog = VizierClass._schema_catalog.validate(catalog)
         center = {}
         columns = []
+        positions = None
         if isinstance(coordinates, (commons.CoordClasses,) + six.string_types):
             c = commons.parse_coordinates(coordinates).transform_to('fk5')
 
             if not c.isscalar:
-                pos_list = []
-                for pos in c:
-                    ra_deg = pos.ra.to_string(unit="deg", decimal=True,
-                                              precision=8)
-                    dec_deg = pos.dec.to_string(unit="deg", decimal=True,
-                                                precision=8, alwayssign=True)
-                    pos_list += ["{}{}".format(ra_deg, dec_deg)]
-                center["-c"] = "<<;" + ";".join(pos_list)
-                columns += ["_q"]  # request a reference to the input table
+                positions = _format_positions(c)
             else:
                 ra = c.ra.to_string(unit='deg', decimal=True, precision=8)
                 dec = c.dec.to_string(unit="deg", decimal=True, precision=8,
@@ -378,25 +384,25 @@ class VizierClass(BaseQuery):
         elif isinstance(coordinates, tbl.Table):
             if (("_RAJ2000" in coordinates.keys()) and ("_DEJ2000" in
                                                         coordinates.keys())):
-                pos_list = []
                 sky_coord = coord.SkyCoord(coordinates["_RAJ2000"],
                                            coordinates["_DEJ2000"],
                                            unit=(coordinates["_RAJ2000"].unit,
                                                  coordinates["_DEJ2000"].unit))
-                for (ra, dec) in zip(sky_coord.ra, sky_coord.dec):
-                    ra_deg = ra.to_string(unit="deg", decimal=True,
-                                          precision=8)
-                    dec_deg = dec.to_string(unit="deg", decimal=True,
-                                            precision=8, alwayssign=True)
-                    pos_list += ["{}{}".format(ra_deg, dec_deg)]
-                center["-c"] = "<<;" + ";".join(pos_list)
-                columns += ["_q"]  # request a reference to the input table
+                positions = _format_positions(sky_coord)
             else:
                 raise ValueError("Table must contain '_RAJ2000' and "
                                  "'_DEJ2000' columns!")
         else:
             raise TypeError("Coordinates must be one of: string, astropy "
                             "coordinates, or table containing coordinates!")
+
+        if positions is not None:
+            chunk_size = conf.max_positions
+            chunks = [positions[start:start + chunk_size]
+                      for start in range(0, len(positions), chunk_size)]
+            center["-c"] = "<<;" + ";".join(chunks[0])
+            columns += ["_q"]  # request a reference to the input table
+
         # decide whether box or radius
         if radius is not None:
             # is radius a disk or an annulus?
@@ -437,6 +443,26 @@ class VizierClass(BaseQuery):
         data_payload = self._args_to_payload(center=center, columns=columns,
                                              catalog=catalog, column_filters=column_filters)
 
+        if positions is not None and len(chunks) > 1:
+            payloads = [data_payload]
+            for chunk in chunks[1:]:
+                center["-c"] = "<<;" + ";".join(chunk)
+                payloads.append(self._args_to_payload(
+                    center=center, columns=columns, catalog=catalog,
+                    column_filters=column_filters))
+
+            if get_query_payload:
+                return payloads
+
+            url = self._server_to_url(return_type=return_type)
+            responses = self._request_many(
+                [dict(method='POST', url=url, data=payload,
+                      timeout=self.TIMEOUT) for payload in payloads],
+                cache=cache)
+            # the _q column of each chunk counts its positions from 1
+            return VizierPositionChunks(
+                responses, [chunk_size * index for index in range(len(chunks))])
+
         if get_query_payload:
             return data_payload
 
@@ -512,6 +538,168 @@ class VizierClass(BaseQuery):
             data=data_payload, timeout=self.TIMEOUT, cache=cache)
         return response
 
+    def query_constraints_paginated(self, column, catalog, bounds=None,
+                                    store=None, max_workers=None, cache=True,
+                                    **kwargs):
+        """
+        Same as `query_constraints`, but returns all the rows of a table,
+        fetched in pages of at most ``row_limit`` rows.
+
+        The rows are sorted by ``column``, a sortable numerical column of the
+        table (e.g. an identifier or a coordinate), and each page starts at
+        the value where the previous full page ended.  The values of
+        ``column`` can also be divided into partitions by ``bounds``, whose
+        pages are fetched concurrently.
+
+        Parameters
+        ----------
+        column : str
+            The column used to partition and page the rows.  Rows without a
+            value in this column are not returned.
+        catalog : str
+            The table to query, e.g. ``'I/239/hip_main'``.
+        bounds : list, optional
+            Increasing values of ``column``.  The partition ``i`` has the
+            rows with ``bounds[i] <= column < bounds[i + 1]``, the last one
+            also includes ``bounds[-1]``.  By default the whole table is a
+            single partition.
+        store : str, optional
+            Directory where the pages are written as ECSV files, instead of
+            being kept in memory.  The pages written are listed in a
+            manifest file in the directory, and an interrupted query run
+            again with the same arguments resumes after the last pages
+            written.
+        max_workers : int, optional
+            Number of pages fetched concurrently.  Defaults to
+            ``astroquery.request_conf.max_workers``.
+        cache : bool
+            Defaults to True.
+        kwargs : dict
+            Any key/value pairs besides "catalog" will be parsed
+            as additional column filters.
+
+        Returns
+        -------
+        result : `~astropy.table.Table` or list of str
+            The rows of the table sorted by ``column``, or if ``store`` is
+            given, the paths of the page files in the same order.
+        """
+        if column in kwargs:
+            raise ValueError("Column {0} is used for the pages, it cannot "
+                             "also be constrained.".format(column))
+        if bounds is None:
+            partitions = [_Partition(0, None, None)]
+        else:
+            partitions = [_Partition(index, low, high,
+                                     high_inclusive=index == len(bounds) - 2)
+                          for index, (low, high)
+                          in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+        manifest_path = None
+        if store is not None:
+            if not os.path.isdir(store):
+                os.makedirs(store)
+            manifest_path = os.path.join(store, PAGES_MANIFEST)
+            for entry in _read_pages_manifest(manifest_path):
+                partitions[entry['partition']].add_page(
+                    os.path.join(store, entry['file']), entry['next'])
+
+        url = self._server_to_url(return_type='votable')
+        active = [partition for partition in partitions if not partition.done]
+        while active:
+            queries = []
+            for partition in active:
+                column_filters = dict(kwargs)
+                if partition.constraint():
+                    column_filters[column] = partition.constraint()
+                queries.append(dict(
+                    method='POST', url=url, timeout=self.TIMEOUT,
+                    data=self._args_to_payload(
+                        catalog=catalog, columns=['+' + column],
+                        column_filters=column_filters,
+                        center={'-c.rd': 180})))
+
+            responses = self._request_many(queries, cache=cache,
+                                           max_workers=max_workers)
+            for partition, response in zip(active, responses):
+                page, next_low = self._parse_page(
+                    response, column, bounded=partition.low is not None)
+                if manifest_path is None:
+                    partition.add_page(page, next_low)
+                    continue
+                filename = 'page-{0:04d}-{1:04d}.ecsv'.format(
+                    partition.index, len(partition.pages))
+                page.write(os.path.join(store, filename), format='ascii.ecsv',
+                           overwrite=True)
+                with open(manifest_path, 'a') as manifest:
+                    manifest.write(json.dumps({
+                        'partition': partition.index, 'file': filename,
+                        'next': next_low}) + '\n')
+                partition.add_page(os.path.join(store, filename), next_low)
+
+            active = [partition for partition in active if not partition.done]
+
+        pages = [page for partition in partitions for page in partition.pages]
+        if store is not None:
+            return pages
+        pages = [page for page in pages if len(page)] or pages[:1]
+        return pages[0] if len(pages) == 1 else tbl.vstack(pages)
+
+    def _parse_page(self, response, column, bounded=True):
+        """
+        Parse a page of `query_constraints_paginated`, of a partition without
+        lower bound if ``bounded`` is False.
+
+        Returns
+        -------
+        page : `~astropy.table.Table`
+            The rows of the page.
+        next_low : list or None
+            ``[value, inclusive]``, where the next page starts, or None if
+            this page was the last one.
+        """
+        result = self._parse_result(response)
+        if len(result) > 1:
+            raise ValueError("Paginated queries need a catalog with a single "
+                             "table, got {0}".format(result.keys()))
+        if not len(result):
+            return tbl.Table(), None
+
+        page = result[0]
+        full = 0 <= self.ROW_LIMIT <= len(page)
+        values = page[column]
+        if getattr(values, 'mask', None) is not None:
+            page = page[~np.ma.getmaskarray(values)]
+            values = page[column]
+
+        if full and not len(page):
+            # a full page of rows without value, which may sort first
+            if bounded:
+                warnings.warn("A full page of rows without {0} was returned, "
+                              "the rows after it are missing.".format(column),
+                              MaxResultsWarning)
+                return page, None
+            warnings.warn("A full page of rows without {0} was returned, "
+                          "continuing with the rows with a value."
+                          .format(column))
+            return page, [-sys.float_info.max, True]
+
+        if not full:
+            return page, None
+
+        # the rows with the last value of the page may continue on the next
+        # page, they are fetched again there
+        last = values[-1]
+        complete = values < last
+        last = _format_boundary(last)
+        if complete.any():
+            return page[complete], [last, True]
+
+        warnings.warn("{0} or more rows have {1} = {2}, only {0} of them are "
+                      "returned, increase the row limit to get them all."
+                      .format(self.ROW_LIMIT, column, last), MaxResultsWarning)
+        return page, [last, False]
+
     def _args_to_payload(self, *args, **kwargs):
         """
         accepts the arguments for different query functions and
@@ -634,12 +822,11 @@ class VizierClass(BaseQuery):
         invalid : 'warn', 'mask' or 'exception'
             (only for VOTABLE queries)
             The behavior if a VOTABLE cannot be parsed. The default is
-            'warn', which will try to parse the table, but if an
-            exception is raised during parsing, the exception will be
-            issued as a warning instead and a masked table will be
-            returned. A value of 'exception' will not catch the
-            exception, while a value of 'mask' will simply always mask
-            invalid values.
+            'warn', which will mask the invalid values and issue a
+            warning for each column with invalid values, giving their
+            number and the first exception raised. A value of 'exception'
+            will not catch the exception, while a value of 'mask' will
+            simply always mask invalid values.
 
         Returns
         -------
@@ -648,6 +835,16 @@ class VizierClass(BaseQuery):
             as a string.
 
         """
+        if isinstance(response, VizierPositionChunks):
+            # the responses of a multi-position query split in chunks
+            results = [self._parse_result(resp, get_catalog_names=get_catalog_names,
+                                          verbose=verbose, invalid=invalid)
+                       for resp in response]
+            if get_catalog_names or not all(isinstance(result, commons.TableList)
+                                            for result in results):
+                return results
+            return _merge_position_chunks(results, response.offsets)
+
         if response.content[:5] == b'<?xml':
             try:
                 return parse_vizier_votable(
@@ -683,6 +880,112 @@ class VizierClass(BaseQuery):
         return self._valid_keyword_dict
 
 
+PAGES_MANIFEST = "pages_manifest.jsonl"
+
+
+class _Partition(object):
+    """
+    A range of values of the column of `VizierClass.query_constraints_paginated`,
+    and the pages of rows fetched so far.
+    """
+
+    def __init__(self, index, low, high, high_inclusive=False):
+        self.index = index
+        self.low = low
+        self.low_inclusive = True
+        self.high = high
+        self.high_inclusive = high_inclusive
+        self.pages = []
+        self.done = False
+
+    def constraint(self):
+        """
+        The Vizier constraint selecting the rows of the next page.
+        """
+        parts = []
+        if self.low is not None:
+            parts.append('{0}{1}'.format('>=' if self.low_inclusive else '>',
+                                         self.low))
+        if self.high is not None:
+            parts.append('{0}{1}'.format('<=' if self.high_inclusive else '<',
+                                         self.high))
+        return ' & '.join(parts)
+
+    def add_page(self, page, next_low):
+        self.pages.append(page)
+        if next_low is None:
+            self.done = True
+        else:
+            self.low, self.low_inclusive = next_low
+
+
+def _format_boundary(value):
+    """
+    A value of the column of `VizierClass.query_constraints_paginated` for
+    the constraint of a page, at the precision of the column, e.g. ``10.3``
+    rather than ``10.300000190734863`` for a float32 column, so that the
+    rows with this value are selected.
+    """
+    if isinstance(value, np.floating):
+        return np.format_float_positional(value, unique=True, trim='-')
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _read_pages_manifest(manifest_path):
+    """
+    Read the pages listed in a manifest of `VizierClass.query_constraints_paginated`,
+    ignoring a last line cut short by an interruption.
+    """
+    if not os.path.exists(manifest_path):
+        return []
+    entries = []
+    with open(manifest_path) as manifest:
+        for line in manifest:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+    return entries
+
+
+def _format_positions(sky_coord):
+    """
+    Format the positions of a non-scalar coordinate for a multi-position
+    query, as ``ra+dec`` strings in decimal degrees.
+    """
+    ra = np.char.mod('%.8f', sky_coord.ra.deg)
+    dec = np.char.mod('%+.8f', sky_coord.dec.deg)
+    return np.char.add(ra, dec).tolist()
+
+
+class VizierPositionChunks(list):
+    """
+    The responses of the chunks of a multi-position query, with the number
+    of positions of the chunks before each of them in ``offsets``.
+    """
+
+    def __init__(self, responses, offsets):
+        super(VizierPositionChunks, self).__init__(responses)
+        self.offsets = offsets
+
+
+def _merge_position_chunks(results, offsets):
+    """
+    Merge the tables of the chunks of a multi-position query, shifting the
+    ``_q`` column (the index of the position in the query, from 1) of each
+    chunk by the number of positions of the chunks before it.
+    """
+    table_dict = OrderedDict()
+    for result, offset in zip(results, offsets):
+        for name, table in zip(result.keys(), result.values()):
+            if offset and '_q' in table.colnames:
+                table['_q'] += offset
+            table_dict.setdefault(name, []).append(table)
+
+    return commons.TableList([(name, tables[0] if len(tables) == 1 else tbl.vstack(tables))
+                              for name, tables in table_dict.items()])
+
+
 def parse_vizier_tsvfile(data, verbose=False):
     """
     Parse a Vizier-generated list of tsv data tables into a list of astropy
@@ -717,11 +1020,11 @@ def parse_vizier_votable(data, verbose=False, invalid='warn',
     if invalid == 'mask':
         vo_tree = votable.parse(tf, pedantic=False, invalid='mask')
     elif invalid == 'warn':
-        try:
-            vo_tree = votable.parse(tf, pedantic=False, invalid='exception')
-        except Exception as ex:
-            warnings.warn("VOTABLE parsing raised exception: {0}".format(ex))
-            vo_tree = votable.parse(tf, pedantic=False, invalid='mask')
+        vo_tree, invalid_values = _parse_votable_counting_invalid(tf)
+        for (table_name, column), (count, ex) in invalid_values.items():
+            warnings.warn("VOTABLE parsing masked {0} invalid value(s) in column "
+                          "'{1}' of table '{2}', first exception: {3}"
+                          .format(count, column, table_name, ex))
     elif invalid == 'exception':
         vo_tree = votable.parse(tf, pedantic=False, invalid='exception')
     else:
@@ -749,6 +1052,66 @@ def parse_vizier_votable(data, verbose=False, invalid='warn',
         return commons.TableList(table_dict)
 
 
+def _parse_votable_counting_invalid(source):
+    """
+    Parse a VOTable in a single pass, masking the values that cannot be
+    parsed like ``votable.parse(source, invalid='mask')`` does, but
+    counting them per column instead of masking them silently.
+
+    The converters of the columns of each table are wrapped when its data
+    starts, once its fields are known.  Strings are always valid, so the
+    converters of string columns are left alone.
+
+    Returns
+    -------
+    vo_tree : `~astropy.io.votable.tree.VOTableFile`
+    invalid_values : `~collections.OrderedDict`
+        The number of invalid values and the first exception raised, keyed
+        by (table name, column name).
+    """
+    invalid_values = OrderedDict()
+
+    def counting(parse, table_name, column):
+        def parse_counting(*args):
+            try:
+                return parse(*args)
+            except Exception as ex:
+                count, first_ex = invalid_values.get((table_name, column), (0, ex))
+                invalid_values[table_name, column] = (count + 1, first_ex)
+                raise
+        return parse_counting
+
+    # the configuration of votable.parse(source, pedantic=False, invalid='mask')
+    config = {'columns': None, 'invalid': 'mask', 'verify': 'warn',
+              'pedantic': False, 'chunk_size': votable_tree.DEFAULT_CHUNK_SIZE,
+              'table_number': None, 'table_id': None, 'filename': None,
+              'unit_format': None, 'datatype_mapping': {}}
+    vo_tree = votable_tree.VOTableFile(config=config, pos=(1, 1))
+    wrapped = set()
+
+    def wrap_converters(iterator):
+        for start, tag, data, pos in iterator:
+            if start and tag in ('TABLEDATA', 'BINARY', 'BINARY2'):
+                for table in vo_tree.iter_tables():
+                    for field in table.fields:
+                        converter = field.converter
+                        if isinstance(converter, (votable_converters.Char,
+                                                  votable_converters.UnicodeChar)):
+                            continue
+                        # tables referencing another table share its fields
+                        if id(converter) not in wrapped:
+                            wrapped.add(id(converter))
+                            column = field.name or field.ID
+                            converter.parse = counting(converter.parse, table.name, column)
+                            converter.binparse = counting(converter.binparse, table.name, column)
+            yield start, tag, data, pos
+
+    with iterparser.get_xml_iterator(source) as iterator:
+        vo_tree.parse(wrap_converters(iterator), config)
+
+    return vo_tree, invalid_values
+
+
 def _parse_angle(angle):
     """
     Returns the Vizier-formatted units and values for box/radius
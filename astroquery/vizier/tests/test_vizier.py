@@ -1,8 +1,12 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 import os
+import re
+import sys
 import requests
+import numpy as np
 from numpy import testing as npt
 import pytest
+from astropy.coordinates import SkyCoord
 from astropy.table import Table
 import astropy.units as u
 import six
@@ -10,6 +14,7 @@ from six.moves import urllib_parse as urlparse
 from ... import vizier
 from ...utils import commons
 from ...utils.testing_tools import MockResponse
+from ...exceptions import MaxResultsWarning
 
 if six.PY3:
     str, = six.string_types
@@ -117,6 +122,55 @@ def test_parse_result(filepath, objlen):
     assert isinstance(result[result.keys()[0]], Table)
 
 
+INVALID_VOTABLE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<VOTABLE version="1.3" xmlns="http://www.ivoa.net/xml/VOTable/v1.3">
+<RESOURCE>
+<TABLE name="J/A/1" ID="t1">
+<FIELD name="N" datatype="int"/>
+<FIELD name="Vmag" datatype="float"/>
+<DATA><TABLEDATA>
+<TR><TD>1</TD><TD>10.5</TD></TR>
+<TR><TD>x2</TD><TD>11.0</TD></TR>
+<TR><TD>3</TD><TD>11.5</TD></TR>
+<TR><TD>x4</TD><TD></TD></TR>
+</TABLEDATA></DATA>
+</TABLE>
+<TABLE name="J/A/2">
+<FIELD name="Name" datatype="char" arraysize="*"/>
+<FIELD name="Flag" datatype="boolean"/>
+<DATA><TABLEDATA>
+<TR><TD>a</TD><TD>T</TD></TR>
+<TR><TD>b</TD><TD>maybe</TD></TR>
+</TABLEDATA></DATA>
+</TABLE>
+</RESOURCE>
+</VOTABLE>
+"""
+
+
+def test_parse_vizier_votable_invalid():
+    with pytest.warns(UserWarning) as warnings:
+        result = vizier.core.parse_vizier_votable(INVALID_VOTABLE)
+    messages = [str(w.message) for w in warnings
+                if 'VOTABLE parsing' in str(w.message)]
+    assert len(messages) == 2
+    assert "masked 2 invalid value(s) in column 'N' of table 'J/A/1'" in messages[0]
+    assert "'x2'" in messages[0]
+    assert "masked 1 invalid value(s) in column 'Flag' of table 'J/A/2'" in messages[1]
+
+    # the invalid values are masked, the others are kept
+    npt.assert_array_equal(result['J/A/1']['N'].mask, [False, True, False, True])
+    npt.assert_array_equal(result['J/A/1']['Vmag'].mask, [False, False, False, True])
+    assert list(result['J/A/2']['Name']) == ['a', 'b']
+    npt.assert_array_equal(result['J/A/2']['Flag'].mask, [False, True])
+
+    masked = vizier.core.parse_vizier_votable(INVALID_VOTABLE, invalid='mask')
+    npt.assert_array_equal(masked['J/A/1']['N'].mask, result['J/A/1']['N'].mask)
+
+    with pytest.raises(ValueError):
+        vizier.core.parse_vizier_votable(INVALID_VOTABLE, invalid='exception')
+
+
 def test_query_region_async(patch_post):
     target = commons.ICRSCoordGenerator(ra=299.590, dec=35.201,
                                         unit=(u.deg, u.deg))
@@ -150,6 +204,172 @@ def test_query_regions(patch_post):
                                     catalog=["HIP", "NOMAD", "UCAC"])
 
 
+def test_query_regions_chunks(monkeypatch):
+    requests_sent = []
+
+    def positions_mockreturn(self, method, url, data=None, **kwargs):
+        # one row per position, identified by its index in the query (_q)
+        positions = dict(line.split('=', 1) for line in data.split('\n'))['-c']
+        positions = positions[len('<<;'):].split(';')
+        requests_sent.append(positions)
+        rows = ''.join('<TR><TD>{0}</TD><TD>{1}</TD></TR>'.format(index + 1, position)
+                       for index, position in enumerate(positions))
+        content = ('<?xml version="1.0"?><VOTABLE version="1.3"><RESOURCE>'
+                   '<TABLE name="J/A/1"><FIELD name="_q" datatype="int"/>'
+                   '<FIELD name="pos" datatype="char" arraysize="*"/>'
+                   '<DATA><TABLEDATA>' + rows + '</TABLEDATA></DATA>'
+                   '</TABLE></RESOURCE></VOTABLE>')
+        return MockResponse(content.encode())
+
+    monkeypatch.setattr(requests.Session, 'request', positions_mockreturn)
+    targets = SkyCoord(ra=[10, 20, 30, 40, 50], dec=[-1, 2, -3, 4, 5.5],
+                       unit=(u.deg, u.deg), frame='fk5')
+    expected = ['10.00000000-1.00000000', '20.00000000+2.00000000',
+                '30.00000000-3.00000000', '40.00000000+4.00000000',
+                '50.00000000+5.50000000']
+
+    with vizier.conf.set_temp('max_positions', 2):
+        payloads = vizier.core.Vizier.query_region(
+            targets, radius=1 * u.arcmin, catalog="J/A/1",
+            get_query_payload=True)
+        assert len(payloads) == 3
+        assert all('_q' in payload for payload in payloads)
+
+        result = vizier.core.Vizier.query_region(
+            targets, radius=1 * u.arcmin, catalog="J/A/1", cache=False)
+        responses = vizier.core.Vizier.query_region_async(
+            targets, radius=1 * u.arcmin, catalog="J/A/1", cache=False)
+
+    assert sorted(requests_sent[:3]) == [expected[:2], expected[2:4],
+                                         expected[4:]]
+    assert list(result['J/A/1']['_q']) == [1, 2, 3, 4, 5]
+    assert list(result['J/A/1']['pos']) == expected
+    # the offsets of the chunks are kept with their responses
+    assert responses.offsets == [0, 2, 4]
+    for _ in range(2):
+        result = vizier.core.Vizier._parse_result(responses)
+        assert list(result['J/A/1']['_q']) == [1, 2, 3, 4, 5]
+
+    # without splitting, the positions are sent in one query
+    del requests_sent[:]
+    result = vizier.core.Vizier.query_region(
+        targets, radius=1 * u.arcmin, catalog="J/A/1", cache=False)
+    assert requests_sent == [expected]
+    assert list(result['J/A/1']['_q']) == [1, 2, 3, 4, 5]
+
+
+class PagedCatalog(object):
+    """Serves the rows of a table matching the constraint on N, sorted by N."""
+
+    def __init__(self, values, fail_after=None, datatype='int'):
+        self.values = values
+        self.fail_after = fail_after
+        self.datatype = datatype
+        self.constraints = []
+
+    def request(self, session, method, url, data=None, **kwargs):
+        if self.fail_after is not None and len(self.constraints) >= self.fail_after:
+            raise requests.exceptions.ConnectionError(url)
+        body = dict(line.split('=', 1) for line in data.split('\n'))
+        assert body['-sort'] == 'N'
+        # the rows without value sort first
+        selected = ([None] * self.values.count(None)
+                    + sorted(v for v in self.values if v is not None))
+        constraint = body.get('N', '')
+        self.constraints.append(constraint)
+        for part in filter(None, constraint.split(' & ')):
+            op, value = re.match(r'([<>]=?)(.*)', part).groups()
+            value = float(value)
+            selected = [v for v in selected if v is not None
+                        and {'<': v < value, '<=': v <= value,
+                             '>': v > value, '>=': v >= value}[op]]
+        selected = selected[:int(body['-out.max'])]
+        rows = ''.join('<TR><TD>{0}</TD></TR>'.format('' if v is None else v)
+                       for v in selected)
+        content = ('<?xml version="1.0"?><VOTABLE version="1.3"><RESOURCE>'
+                   '<TABLE name="I/1/main"><FIELD name="N" datatype="'
+                   + self.datatype + '"/><DATA><TABLEDATA>' + rows + '</TABLEDATA></DATA>'
+                   '</TABLE></RESOURCE></VOTABLE>')
+        return MockResponse(content.encode())
+
+
+def test_query_constraints_paginated(monkeypatch):
+    values = [1, 2, 2, 2, 3, 5, 5, 8, 9, 9, 9, 9, 12, 13]
+    catalog = PagedCatalog(values)
+    monkeypatch.setattr(requests.Session, 'request',
+                        lambda *args, **kwargs: catalog.request(*args, **kwargs))
+    viz = vizier.core.Vizier(row_limit=5)
+
+    result = viz.query_constraints_paginated('N', 'I/1/main', cache=False)
+    assert list(result['N']) == values
+    assert catalog.constraints == ['', '>=3', '>=9', '>=12']
+
+    # partitions are paged concurrently
+    catalog.constraints = []
+    result = viz.query_constraints_paginated('N', 'I/1/main', bounds=[0, 6, 13],
+                                             cache=False)
+    assert list(result['N']) == values
+    assert sorted(catalog.constraints[:2]) == ['>=0 & <6', '>=6 & <=13']
+
+    # rows with the same value beyond the row limit are missed
+    catalog.constraints = []
+    viz.ROW_LIMIT = 3
+    with pytest.warns(MaxResultsWarning) as warnings:
+        result = viz.query_constraints_paginated('N', 'I/1/main', cache=False)
+    assert [str(w.message)[:30] for w in warnings] == ['3 or more rows have N = 2, onl',
+                                                      '3 or more rows have N = 9, onl']
+    assert list(result['N']) == [1, 2, 2, 2, 3, 5, 5, 8, 9, 9, 9, 12, 13]
+    assert '>9' in catalog.constraints
+
+    with pytest.raises(ValueError):
+        viz.query_constraints_paginated('N', 'I/1/main', N='>3')
+
+    # a first page of rows without value does not end the pages
+    catalog = PagedCatalog([None] * 4 + values)
+    catalog.constraints = []
+    with pytest.warns(UserWarning, match='full page of rows without N'):
+        result = viz.query_constraints_paginated('N', 'I/1/main', cache=False)
+    assert list(result['N']) == [1, 2, 2, 2, 3, 5, 5, 8, 9, 9, 9, 12, 13]
+    assert catalog.constraints[1] == '>={0!r}'.format(-sys.float_info.max)
+
+
+def test_query_constraints_paginated_float(monkeypatch):
+    # the values of a float column are not exact in binary
+    values = [9.5, 10.1, 10.3, 10.3, 10.3, 10.7, 11.2]
+    catalog = PagedCatalog(values, datatype='float')
+    monkeypatch.setattr(requests.Session, 'request',
+                        lambda *args, **kwargs: catalog.request(*args, **kwargs))
+    viz = vizier.core.Vizier(row_limit=4)
+
+    result = viz.query_constraints_paginated('N', 'I/1/main', cache=False)
+    assert result['N'].dtype == np.float32
+    assert list(result['N']) == list(np.float32(values))
+    assert catalog.constraints == ['', '>=10.3', '>=10.7']
+
+
+def test_query_constraints_paginated_store(monkeypatch, tmpdir):
+    values = list(range(20))
+    catalog = PagedCatalog(values, fail_after=3)
+    monkeypatch.setattr(requests.Session, 'request',
+                        lambda *args, **kwargs: catalog.request(*args, **kwargs))
+    viz = vizier.core.Vizier(row_limit=4)
+    store = str(tmpdir.join('pages'))
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        viz.query_constraints_paginated('N', 'I/1/main', store=store, cache=False)
+
+    # the query resumes after the pages already written
+    catalog.fail_after = None
+    catalog.constraints = []
+    paths = viz.query_constraints_paginated('N', 'I/1/main', store=store,
+                                            cache=False)
+    assert catalog.constraints[0] == '>=9'
+    assert [os.path.basename(path) for path in paths] == [
+        'page-0000-{0:04d}.ecsv'.format(index) for index in range(7)]
+    pages = [Table.read(path, format='ascii.ecsv') for path in paths]
+    assert [n for page in pages for n in page['N']] == values
+
+
 def test_query_object_async(patch_post):
     response = vizier.core.Vizier.query_object_async(
         "HD 226868", catalog=["NOMAD", "UCAC"])